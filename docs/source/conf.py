@@ -16,6 +16,7 @@ import sys
 sys.path.append(os.path.abspath("../../"))
 sys.path.append(os.path.abspath("../../src/algorithms/"))
 sys.path.append(os.path.abspath("../../src/exceptions/"))
+sys.path.append(os.path.abspath("../../src/extern/"))
 sys.path.append(os.path.abspath("../../src/spaces/"))
 sys.path.append(os.path.abspath("../../src/policies/"))
 sys.path.append(os.path.abspath("../../src/parallel/"))
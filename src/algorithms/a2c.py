@@ -9,7 +9,7 @@ from dataclasses import dataclass
 from src.utils import INFO
 from src.utils.episode_info import EpisodeInfo
 from src.utils.function_wraps import time_func_wrapper
-from src.utils.replay_buffer import ReplayBuffer
+from src.utils.rollout_storage import RolloutStorage
 from src.spaces.time_step import VectorTimeStep
 from src.maths.pytorch_optimizer_config import PyTorchOptimizerConfig
 from src.maths.pytorch_optimizer_builder import pytorch_optimizer_builder
@@ -41,6 +41,9 @@ class A2CConfig(object):
     n_workers: int = 1
     batch_size: int = 0
     normalize_advantages: bool = True
+    no_grad_rollouts: bool = False
+    clip_epsilon: float = None
+    n_epochs: int = 1
     device: str = 'cpu'
     action_sampler: Callable = None
     a2cnet: nn.Module = None
@@ -56,48 +59,90 @@ class _ActResult(object):
     entropies: torch.Tensor
 
 
-def create_discounts_array(end: int, base: float, start=0, endpoint=False):
-    """ Create an array of floating point numbers in [start, end)
-    with the given base
+def calculate_discounted_returns(rewards: torch.Tensor, gamma: float, bootstrap_values: torch.Tensor = None,
+                                 dones: torch.Tensor = None) -> torch.Tensor:
+    """Calculate the discounted returns from the episode rewards
+    with the backward recursion G_t = r_t + gamma * G_{t+1}. The
+    return after the last step is the bootstrap value. A done step
+    does not bootstrap from the steps after it
 
     Parameters
     ----------
-    end
-    base
-    start
-    endpoint
+    rewards: The rewards of shape (T, n_workers)
+    gamma: The discount factor
+    bootstrap_values: The value estimate of the state after the last step of every worker. If None it is zero
+    dones: Whether every step of shape (T, n_workers) ended the episode of the worker. If None no step did
 
     Returns
     -------
 
+    A tensor of shape (T, n_workers) with the return at every step
     """
-    return np.logspace(start, end, num=end, base=base, endpoint=endpoint)
 
+    # T
+    total_time = rewards.shape[0]
+
+    returns = torch.zeros_like(rewards)
+    next_return = torch.zeros_like(rewards[0]) if bootstrap_values is None else bootstrap_values
+    for t in reversed(range(total_time)):
+
+        if dones is not None:
+            next_return = next_return * (1.0 - dones[t])
+
+        next_return = rewards[t] + gamma * next_return
+        returns[t] = next_return
+
+    return returns
 
-def calculate_discounted_returns(rewards: np.array, discounts: np.array, n_workers: int = 1) -> np.array:
-    """Calculate the discounted returns from the episode rewards
+
+def calculate_gae(rewards: torch.Tensor, values: torch.Tensor, gamma: float, tau: float,
+                  bootstrap_values: torch.Tensor = None, dones: torch.Tensor = None,
+                  normalize: bool = False) -> torch.Tensor:
+    """Calculate the generalized advantage estimates with the backward
+    recursion A_t = delta_t + gamma * tau * A_{t+1} where
+    delta_t = r_t + gamma * V_{t+1} - V_t is the TD error. The value after
+    the last step is the bootstrap value. A done step does not bootstrap from
+    the steps after it
 
     Parameters
     ----------
-    rewards: The list of rewards
-    discounts: The discount factor
-    n_workers: The number of workers
+    rewards: The rewards of shape (T, n_workers)
+    values: The value estimates of shape (T, n_workers)
+    gamma: The discount factor
+    tau: The GAE parameter
+    bootstrap_values: The value estimate of the state after the last step of every worker. If None it is zero
+    dones: Whether every step of shape (T, n_workers) ended the episode of the worker. If None no step did
+    normalize: If true the TD errors are normalized before they are accumulated
 
     Returns
     -------
 
+    A tensor of shape (T, n_workers) with the advantage at every step
     """
 
-    # T
-    total_time = len(rewards)
-
-    # Return numbers spaced evenly on a log scale.
-    # In linear space, the sequence starts at base ** start
-    # (base to the power of start) and ends with base ** stop (see endpoint below).
-    # The return is the sum of discounted rewards from step until the
-    # final step T
-    returns = np.array([[np.sum(discounts[: total_time - t] * rewards[t:, w]) for t in range(total_time)] for w in range(n_workers)])
-    return returns
+    next_values = torch.zeros_like(values)
+    next_values[:-1] = values[1:]
+    if bootstrap_values is not None:
+        next_values[-1] = bootstrap_values
+
+    not_dones = torch.ones_like(values) if dones is None else 1.0 - dones
+
+    # TD errors: R_t + gamma*V_{t+1} - V_t for t=0 to T-1
+    advantages = rewards + gamma * not_dones * next_values - values
+
+    if normalize:
+        std = advantages.std(unbiased=False)
+
+        if std > 1.0e-4:
+            advantages = (advantages - advantages.mean()) / std
+
+    gaes = torch.zeros_like(advantages)
+    next_gae = torch.zeros_like(advantages[0])
+    for t in reversed(range(advantages.shape[0])):
+        next_gae = advantages[t] + gamma * tau * not_dones[t] * next_gae
+        gaes[t] = next_gae
+
+    return gaes
 
 
 class A2C(Generic[Optimizer]):
@@ -133,6 +178,10 @@ class A2C(Generic[Optimizer]):
         self.optimizer: Optimizer = None
         self.name = "A2C"
 
+        # allocated on the first episode when
+        # the shape of the states is known
+        self.rollouts: RolloutStorage = None
+
     @property
     def a2c_net(self) -> nn.Module:
         return self.config.a2cnet
@@ -156,6 +205,12 @@ class A2C(Generic[Optimizer]):
             raise InvalidParamValue(param_name="self.config.n_workers",
                                     param_value=str(self.config.n_workers) + " not equal to " + str(env.n_workers))
 
+        if self.config.clip_epsilon is not None and self.config.clip_epsilon <= 0.0:
+            raise InvalidParamValue(param_name="self.config.clip_epsilon", param_value=str(self.config.clip_epsilon))
+
+        if self.config.n_epochs < 1:
+            raise InvalidParamValue(param_name="self.config.n_epochs", param_value=str(self.config.n_epochs))
+
         # build the optimizer we need in order to train the model
         self.optimizer = pytorch_optimizer_builder(opt_type=self.config.optimizer_config.optimizer_type,
                                                    model_params=self.parameters(),
@@ -195,12 +250,24 @@ class A2C(Generic[Optimizer]):
         """
 
         episode_info: EpisodeInfo = options["episode_info"]
-        buffer: ReplayBuffer = episode_info.info["buffer"]
+        rollouts: RolloutStorage = episode_info.info["buffer"]
+
+        if self.config.clip_epsilon is not None:
+            self._optimize_model_clipped(rollouts=rollouts, last_states=episode_info.info["last_states"])
+            return
 
-        self._optimize_model(rewards=buffer.get_item_as_torch_tensor("reward"),
-                             logprobs=buffer.get_torch__tensor_info_item_as_torch_tensor("logprobs"),
-                             values=buffer.get_torch__tensor_info_item_as_torch_tensor("values"),
-                             entropies=buffer.get_torch__tensor_info_item_as_torch_tensor("entropies"))
+        if self.config.no_grad_rollouts:
+
+            # the rollout has only the states and the actions.
+            # Recompute the rest in one pass over all the steps
+            act_result = self._evaluate_actions(states=rollouts.states, actions=rollouts.actions)
+        else:
+            act_result = _ActResult(logprobs=rollouts.logprobs, values=rollouts.values,
+                                    actions=rollouts.actions, entropies=rollouts.entropies)
+
+        self._optimize_model(rewards=rollouts.rewards, logprobs=act_result.logprobs,
+                             values=act_result.values, entropies=act_result.entropies,
+                             dones=rollouts.dones, last_states=episode_info.info["last_states"])
 
     def on_episode(self, env: Env, episode_idx: int,  **options) -> EpisodeInfo:
         """Train the algorithm on the episode
@@ -251,7 +318,7 @@ class A2C(Generic[Optimizer]):
         time_step: VectorTimeStep = env.reset()
         states = time_step.stack_observations()
 
-        buffer = ReplayBuffer(buffer_size=self.config.n_iterations_per_episode)
+        rollouts = self._get_rollouts(state_shape=states.shape[1:])
 
         for itr in range(self.config.n_iterations_per_episode):
 
@@ -265,15 +332,21 @@ class A2C(Generic[Optimizer]):
             episode_score += np.mean(reward)
             total_distortion += np.mean(total_distortions)
 
-            # append the roll outs
-            buffer.add(state=states, next_state=next_states,
-                       reward=time_step.stack_rewards(),
-                       action=act_result.actions,
-                       done=time_step.stack_dones(),
-                       info={"values": act_result.values,
-                             "entropies": act_result.entropies,
-                             "logprobs": act_result.logprobs})
-
+            # write the roll outs in place. Without gradients
+            # only the states and the actions are needed
+            if self.config.no_grad_rollouts:
+                rollouts.insert(states=states, actions=act_result.actions,
+                                rewards=reward, dones=time_step.stack_dones())
+            else:
+                rollouts.insert(states=states, actions=act_result.actions,
+                                rewards=reward, dones=time_step.stack_dones(),
+                                values=act_result.values, logprobs=act_result.logprobs,
+                                entropies=act_result.entropies)
+
+            # a worker that finishes before the others is
+            # reset by the environment and its next state is
+            # the reset state. The done flags stored above stop
+            # its returns at the end of the episode
             states = next_states
 
             if time_step.done:
@@ -281,14 +354,38 @@ class A2C(Generic[Optimizer]):
 
             episode_iterations += 1
 
-        # what do we do with this?
+        # the returns bootstrap from the
+        # values of the last states
         last_states = states
 
         episode_info = EpisodeInfo(episode_score=episode_score,
                                    total_distortion=total_distortion, episode_itrs=episode_iterations,
-                                   info={"buffer": buffer, "last_states": last_states})
+                                   info={"buffer": rollouts, "last_states": last_states})
         return episode_info
 
+    def _get_rollouts(self, state_shape: tuple) -> RolloutStorage:
+        """Returns the rollout storage reset for a new rollout.
+        The storage is allocated only when the shape of the
+        states changes
+
+        Parameters
+        ----------
+        state_shape: The shape of the state of a worker
+
+        Returns
+        -------
+
+        An instance of RolloutStorage
+        """
+
+        if self.rollouts is None or self.rollouts.state_shape != tuple(state_shape):
+            self.rollouts = RolloutStorage(n_steps=self.config.n_iterations_per_episode,
+                                           n_workers=self.config.n_workers,
+                                           state_shape=tuple(state_shape), device=self.config.device)
+
+        self.rollouts.reset()
+        return self.rollouts
+
     def _act(self, state) -> _ActResult:
         """The agent acts on the presented state by
         choosing the actions
@@ -308,8 +405,10 @@ class A2C(Generic[Optimizer]):
             torch_state = state
 
         # policy and critic values. The policy
-        # values are assumed raw
-        logits, values = self.a2c_net(torch_state)
+        # values are assumed raw. No graph is built
+        # when the rollout is collected without gradients
+        with torch.set_grad_enabled(torch.is_grad_enabled() and not self.config.no_grad_rollouts):
+            logits, values = self.a2c_net(torch_state)
 
         # log_softmax may not sum up to one
         # and can be negative as well
@@ -332,45 +431,54 @@ class A2C(Generic[Optimizer]):
 
         return full_pass_result
 
-    def _compute_advantages(self, rewards: np.array, values: np.array) -> np.array:
-        """Computes an estimate of the advantage function
+    def _evaluate_actions(self, states: torch.Tensor, actions: torch.Tensor) -> _ActResult:
+        """Evaluate the given actions at the given states with a single
+        pass of the network over all the steps and workers
 
         Parameters
         ----------
-        rewards: The rewards
-        values: The value estimates on the rollout
+        states: The states of shape (T, n_workers, ...)
+        actions: The actions taken at the states of shape (T, n_workers)
 
         Returns
         -------
 
-        A numpy array representing the advantage estimate
+        An instance of _ActResult with tensors of shape (T, n_workers)
         """
-        # T
-        total_time = len(rewards)
 
-        # (gamma*tau)^t
-        tau_discounts = np.logspace(0, total_time - 1, num=total_time - 1,
-                                    base=self.config.gamma * self.config.tau, endpoint=False)
+        total_time, n_workers = actions.shape
+
+        logits, values = self.a2c_net(states.reshape((total_time * n_workers,) + tuple(states.shape[2:])))
 
-        rewards_ = rewards.squeeze()
-        values_ = values.squeeze()
+        action_sampler_dist = self.config.action_sampler(logits)
+        log_probs = action_sampler_dist.log_prob(actions.reshape(-1))
+        entropies = action_sampler_dist.entropy()
 
-        # create TD errors: R_t + gamma*V_{t+1} - V_t for t=0 to T
-        advantages = rewards_[:-1] + self.config.gamma * values_[1:] - values_[: -1]
+        return _ActResult(logprobs=log_probs.reshape(total_time, n_workers),
+                          values=values.reshape(total_time, n_workers),
+                          actions=actions,
+                          entropies=entropies.reshape(total_time, n_workers))
 
-        if self.config.normalize_advantages:
+    def _compute_advantages(self, rewards: torch.Tensor, values: torch.Tensor,
+                            bootstrap_values: torch.Tensor = None, dones: torch.Tensor = None) -> torch.Tensor:
+        """Computes an estimate of the advantage function
+
+        Parameters
+        ----------
+        rewards: The rewards of shape (T, n_workers)
+        values: The value estimates on the rollout of shape (T, n_workers)
+        bootstrap_values: The value estimates of the last states
+        dones: Whether every step ended the episode of the worker
 
-            std = np.std(advantages)
+        Returns
+        -------
 
-            if std > 1.0e-4:
-                # normalize advantages
-                advantages = (advantages - np.mean(advantages)) / np.std(advantages)
+        A tensor of shape (T, n_workers) representing the advantage estimate
+        """
 
-        # create the GAES by multiplying the tau discounts times the TD errors
-        gaes = np.array(
-            [[np.sum(tau_discounts[: total_time - 1 - t] * advantages[t:, w]) for t in range(total_time - 1 )] for w in
-             range(self.config.n_workers)])
-        return gaes
+        return calculate_gae(rewards=rewards, values=values, gamma=self.config.gamma, tau=self.config.tau,
+                             bootstrap_values=bootstrap_values, dones=dones,
+                             normalize=self.config.normalize_advantages)
 
     def _compute_loss_function(self, advantages: torch.Tensor, logprobs: torch.Tensor,
                                returns: torch.Tensor, values: torch.Tensor, entropies: torch.Tensor) -> torch.Tensor:
@@ -379,8 +487,35 @@ class A2C(Generic[Optimizer]):
         Parameters
         ----------
 
+        advantages: The advantage estimates of shape (T, n_workers)
+        logprobs: The log probabilities of shape (T, n_workers)
+        returns: The discounted returns of shape (T, n_workers)
+        values: The value function of shape (T, n_workers)
+        entropies: The entropies
+
+        Returns
+        -------
+
+        A tensor representing the mixed loss function
+        """
+
+        value_loss_function = mse(returns=returns, values=values)
+        policy_loss = - (advantages * logprobs).mean()
+        return self._mix_losses(policy_loss=policy_loss, value_loss_function=value_loss_function,
+                                entropies=entropies)
+
+    def _compute_clipped_loss_function(self, advantages: torch.Tensor, logprobs: torch.Tensor,
+                                       old_logprobs: torch.Tensor, returns: torch.Tensor, values: torch.Tensor,
+                                       entropies: torch.Tensor) -> torch.Tensor:
+        """Compute the loss mixture function with the clipped surrogate
+        policy loss of PPO
+
+        Parameters
+        ----------
+
         advantages: The advantage estimates
-        logprobs: The log probabilities
+        logprobs: The log probabilities of the current policy
+        old_logprobs: The log probabilities of the policy that collected the rollout
         returns: The discounted returns
         values: The value function
         entropies: The entropies
@@ -391,8 +526,30 @@ class A2C(Generic[Optimizer]):
         A tensor representing the mixed loss function
         """
 
+        ratios = torch.exp(logprobs - old_logprobs)
+        clipped_ratios = torch.clamp(ratios, 1.0 - self.config.clip_epsilon, 1.0 + self.config.clip_epsilon)
+
         value_loss_function = mse(returns=returns, values=values)
-        policy_loss = - (advantages.T * logprobs).mean()
+        policy_loss = - torch.min(ratios * advantages, clipped_ratios * advantages).mean()
+        return self._mix_losses(policy_loss=policy_loss, value_loss_function=value_loss_function,
+                                entropies=entropies)
+
+    def _mix_losses(self, policy_loss: torch.Tensor, value_loss_function: torch.Tensor,
+                    entropies: torch.Tensor) -> torch.Tensor:
+        """Weight the policy, value and entropy losses
+
+        Parameters
+        ----------
+
+        policy_loss: The policy loss
+        value_loss_function: The value loss
+        entropies: The entropies
+
+        Returns
+        -------
+
+        A tensor representing the mixed loss function
+        """
 
         # compute a total loss function to minimize
         if self.config.beta is not None:
@@ -411,15 +568,17 @@ class A2C(Generic[Optimizer]):
 
     @time_func_wrapper(show_time=False)
     def _optimize_model(self, logprobs: torch.Tensor, entropies: torch.Tensor, values: torch.Tensor,
-                        rewards: torch.Tensor) -> None:
+                        rewards: torch.Tensor, dones: torch.Tensor = None, last_states: Any = None) -> None:
         """Optimize the model
 
         Parameters
         ----------
-        logprobs
-        entropies
-        values
-        rewards
+        logprobs: The log probabilities of the actions at every step
+        entropies: The entropies of the policy at every step
+        values: The value estimates at every step
+        rewards: The rewards at every step
+        dones: Whether every step ended the episode of the worker
+        last_states: The states after the last step. The returns bootstrap from their values
 
         Returns
         -------
@@ -428,21 +587,31 @@ class A2C(Generic[Optimizer]):
 
         print("{0} optimizing model={1}".format(INFO, self.name))
 
-        discounts: np.array = create_discounts_array(end=len(rewards),
-                                                     base=self.config.gamma, start=0, endpoint=False)
+        # T
+        total_time = len(rewards)
+
+        # every tensor is (T, n_workers)
+        rewards = rewards.reshape(total_time, -1)
+        values = values.reshape(total_time, -1)
+        logprobs = logprobs.reshape(total_time, -1)
+
+        if dones is not None:
+            dones = dones.reshape(total_time, -1).float()
+
+        bootstrap_values = self._bootstrap_values(last_states=last_states)
 
         # get the discounted returns
-        discounted_returns: np.array = calculate_discounted_returns(rewards.numpy(),
-                                                                    discounts,
-                                                                    n_workers=self.config.n_workers)
+        discounted_returns: torch.Tensor = calculate_discounted_returns(rewards=rewards, gamma=self.config.gamma,
+                                                                        bootstrap_values=bootstrap_values,
+                                                                        dones=dones)
 
-        advantages: np.array = self._compute_advantages(rewards=rewards.numpy(),
-                                                        values=values.detach().numpy())
+        advantages: torch.Tensor = self._compute_advantages(rewards=rewards, values=values.detach(),
+                                                            bootstrap_values=bootstrap_values, dones=dones)
 
-        loss: torch.Tensor = self._compute_loss_function(advantages=torch.from_numpy(advantages), values=values,
+        loss: torch.Tensor = self._compute_loss_function(advantages=advantages, values=values,
                                                          entropies=entropies,
-                                                         returns=torch.from_numpy(discounted_returns),
-                                                         logprobs=logprobs[:-1])
+                                                         returns=discounted_returns,
+                                                         logprobs=logprobs)
 
         self.optimizer.zero_grad()
         loss.backward()
@@ -457,6 +626,107 @@ class A2C(Generic[Optimizer]):
 
         print("{0} Finished optimization step....".format(INFO))
 
+    @time_func_wrapper(show_time=False)
+    def _optimize_model_clipped(self, rollouts: RolloutStorage, last_states: Any = None) -> None:
+        """Optimize the model with the clipped surrogate loss of PPO. The
+        rollout is reused for n_epochs epochs. Every epoch shuffles the
+        (T * n_workers) steps of the rollout into minibatches of batch_size
+        steps and takes a gradient step on every minibatch. A batch_size of
+        zero uses the whole rollout as one minibatch
+
+        Parameters
+        ----------
+        rollouts: The rollout of the episode
+        last_states: The states after the last step. The returns bootstrap from their values
+
+        Returns
+        -------
+
+        None
+        """
+
+        print("{0} optimizing model={1}".format(INFO, self.name))
+
+        rewards = rollouts.rewards
+        dones = rollouts.dones
+
+        # the policy and the values of the rollout. These
+        # stay fixed while the rollout is reused
+        with torch.no_grad():
+            if self.config.no_grad_rollouts:
+                act_result = self._evaluate_actions(states=rollouts.states, actions=rollouts.actions)
+                old_logprobs, old_values = act_result.logprobs, act_result.values
+            else:
+                old_logprobs, old_values = rollouts.logprobs.detach(), rollouts.values.detach()
+
+            bootstrap_values = self._bootstrap_values(last_states=last_states)
+            returns = calculate_discounted_returns(rewards=rewards, gamma=self.config.gamma,
+                                                   bootstrap_values=bootstrap_values, dones=dones)
+            advantages = calculate_gae(rewards=rewards, values=old_values, gamma=self.config.gamma,
+                                       tau=self.config.tau, bootstrap_values=bootstrap_values, dones=dones)
+
+        # every step of every worker is a sample
+        n_samples = rewards.numel()
+        states = rollouts.states.reshape((n_samples, 1) + tuple(rollouts.states.shape[2:]))
+        actions = rollouts.actions.reshape(n_samples, 1)
+        old_logprobs = old_logprobs.reshape(n_samples)
+        returns = returns.reshape(n_samples)
+        advantages = advantages.reshape(n_samples)
+
+        batch_size = self.config.batch_size if 0 < self.config.batch_size < n_samples else n_samples
+
+        for epoch in range(self.config.n_epochs):
+            permutation = torch.randperm(n_samples)
+
+            for start in range(0, n_samples, batch_size):
+                batch = permutation[start: start + batch_size]
+
+                batch_advantages = advantages[batch]
+                if self.config.normalize_advantages:
+                    std = batch_advantages.std(unbiased=False)
+
+                    if std > 1.0e-4:
+                        batch_advantages = (batch_advantages - batch_advantages.mean()) / std
+
+                act_result = self._evaluate_actions(states=states[batch], actions=actions[batch])
+
+                loss = self._compute_clipped_loss_function(advantages=batch_advantages,
+                                                           logprobs=act_result.logprobs.reshape(-1),
+                                                           old_logprobs=old_logprobs[batch],
+                                                           returns=returns[batch],
+                                                           values=act_result.values.reshape(-1),
+                                                           entropies=act_result.entropies)
+
+                self.optimizer.zero_grad()
+                loss.backward()
+
+                # clip the grad if needed
+                torch.nn.utils.clip_grad_norm_(self.parameters(),
+                                               self.config.max_grad_norm)
+                self.optimizer.step()
+
+        print("{0} Finished optimization step....".format(INFO))
+
+    def _bootstrap_values(self, last_states: Any) -> torch.Tensor:
+        """Returns the value estimates of the given states without gradients
+
+        Parameters
+        ----------
+        last_states: The states after the last step of every worker
+
+        Returns
+        -------
+
+        A tensor with the value of every worker or None if there are no states
+        """
+
+        if last_states is None:
+            return None
+
+        with torch.no_grad():
+            _, bootstrap_values = self.a2c_net(torch.Tensor(np.asarray(last_states)))
+            return bootstrap_values.reshape(-1)
+
     def set_train_mode(self) -> None:
         """Set the model to a training mode
 
@@ -0,0 +1,336 @@
+"""
+Exact dynamic programming over the generalization lattice
+of a DiscreteStateEnvironment
+"""
+
+import enum
+import numpy as np
+from typing import TypeVar
+from dataclasses import dataclass
+
+from src.exceptions.exceptions import InvalidParamValue
+from src.spaces.env_type import DiscreteEnvType
+from src.spaces.generalization_lattice import GeneralizationLattice
+from src.utils.q_table import QTable
+
+Env = TypeVar('Env')
+
+
+class DPSolverMethod(enum.IntEnum):
+    """Enumeration of the methods the dynamic
+    programming solver supports
+
+    """
+
+    INVALID = -1
+    VALUE_ITERATION = 0
+    POLICY_ITERATION = 1
+
+
+@dataclass(init=True, repr=True)
+class DPSolverConfig(object):
+    """Configuration for the dynamic programming solver"""
+
+    gamma: float = 0.99
+    method: DPSolverMethod = DPSolverMethod.VALUE_ITERATION
+    tolerance: float = 1.0e-8
+    n_itrs: int = 1000
+    max_level: int = 100
+    n_processes: int = 1
+
+
+class DPSolver(object):
+    """Solves the environment exactly with value iteration
+    or policy iteration. The states of the underlying problem are
+    the nodes of the generalization lattice of the environment.
+    Transitions between nodes are deterministic and the reward of
+    every transition is given by the reward manager of the environment.
+    A transition terminates the episode when the total distortion exceeds
+    the maximum total distortion or, for a TOTAL_DISTORTION_STATE environment,
+    when the next state is out of the state space.
+
+    The termination conditions of the environment that depend on the
+    history of an episode, i.e. visiting all the columns and the number
+    of rounds below the minimum distortion, are not modelled.
+
+    The values computed over nodes are projected on the aggregated
+    states the environment observes by taking, for every aggregated state
+    and action, the maximum over the nodes that are observed as that state.
+    This gives a Q-table that can be used wherever the Q-table of QLearning
+    is used
+
+    """
+
+    def __init__(self, algo_config: DPSolverConfig):
+        """Constructor. Construct an instance of the algorithm
+        by passing the configuration parameters
+
+        Parameters
+        ----------
+        algo_config: The configuration parameters
+
+        """
+        self.config = algo_config
+        self.q_table: QTable = None
+
+        # the lattice and the per node model
+        # computed by the last call to solve
+        self.lattice: GeneralizationLattice = None
+        self.rewards: np.ndarray = None
+        self.dones: np.ndarray = None
+        self.node_states: list = []
+        self.node_q_values: np.ndarray = None
+        self.values: np.ndarray = None
+        self.policy: np.ndarray = None
+        self.n_itrs_performed = 0
+
+    @property
+    def name(self) -> str:
+        return "DPSolver"
+
+    def solve(self, env: Env) -> QTable:
+        """Solve the given environment
+
+        Parameters
+        ----------
+        env: The environment to solve
+
+        Returns
+        -------
+
+        The Q-table over the aggregated states of the environment
+        """
+
+        if env.config.state_as_distances:
+            raise InvalidParamValue(param_name="state_as_distances", param_value=str(env.config.state_as_distances))
+
+        self.build_model(env=env)
+
+        if self.config.method == DPSolverMethod.VALUE_ITERATION:
+            self._value_iteration()
+        elif self.config.method == DPSolverMethod.POLICY_ITERATION:
+            self._policy_iteration()
+        else:
+            raise InvalidParamValue(param_name="method", param_value=str(self.config.method))
+
+        self.q_table = self._project_q_values(env=env)
+        return self.q_table
+
+    def build_model(self, env: Env) -> None:
+        """Build the transition and reward model of the given
+        environment. The environment is reset when this
+        function returns
+
+        Parameters
+        ----------
+        env: The environment to model
+
+        Returns
+        -------
+
+        None
+        """
+
+        self.lattice = env.generalization_lattice
+        if self.lattice is None:
+            self.lattice = GeneralizationLattice.build(data_set=env.config.data_set,
+                                                       action_space=env.config.action_space,
+                                                       distortion_calculator=env.config.distortion_calculator,
+                                                       max_level=self.config.max_level,
+                                                       n_processes=self.config.n_processes)
+
+        # the distortions after a reset. Only the
+        # identifying columns are distorted
+        time_step = env.reset()
+        self.start_state = time_step.observation
+        start_distances = dict(env.column_distances)
+
+        # the total distortion and the observed
+        # state of every node
+        totals = np.zeros(self.lattice.n_nodes)
+        self.node_states = []
+        for node in range(self.lattice.n_nodes):
+
+            env.column_distances = dict(start_distances)
+            for c, name in enumerate(self.lattice.column_names):
+                env.column_distances[name] = self.lattice.column_distortions[node, c]
+
+            totals[node] = env.total_current_distortion()
+            self.node_states.append(env.get_aggregated_state(state_val=totals[node], column_name=None))
+
+        min_dist_bin = env.get_min_aggregated_state()
+        self.rewards = np.zeros((self.lattice.n_nodes, self.lattice.n_actions))
+        for node in range(self.lattice.n_nodes):
+            for action_idx in range(self.lattice.n_actions):
+                next_node = self.lattice.successors[node, action_idx]
+                action = env.get_action(action_idx)
+
+                if action.column_name in self.lattice.column_indices:
+                    column_dist = self.lattice.column_distortion(node=next_node, column_name=action.column_name)
+                else:
+                    column_dist = start_distances[action.column_name]
+
+                self.rewards[node, action_idx] = \
+                    env.config.reward_manager.get_reward_for_state(total_distortion=totals[next_node],
+                                                                   current_state=self.node_states[node],
+                                                                   next_state=self.node_states[next_node],
+                                                                   min_dist_bins=min_dist_bin,
+                                                                   **{"action": action,
+                                                                      "column_distortion": column_dist})
+
+        next_totals = totals[self.lattice.successors]
+        self.dones = next_totals > env.config.max_total_distortion
+        if env.env_type == DiscreteEnvType.TOTAL_DISTORTION_STATE:
+            next_states = np.array(self.node_states)[self.lattice.successors]
+            self.dones |= next_states >= env.n_states
+
+        env.reset()
+
+    def _backup(self, values: np.ndarray) -> np.ndarray:
+        """Returns the Q-values of every node given the node values
+
+        Parameters
+        ----------
+        values: The value of every node
+
+        Returns
+        -------
+
+        An array of shape (n_nodes, n_actions)
+        """
+        return self.rewards + self.config.gamma * np.where(self.dones, 0.0, values[self.lattice.successors])
+
+    def _value_iteration(self) -> None:
+        """Run value iteration until the values change less than
+        the tolerance or the maximum number of iterations is reached
+
+        Returns
+        -------
+
+        None
+        """
+
+        values = np.zeros(self.lattice.n_nodes)
+
+        self.n_itrs_performed = 0
+        for itr in range(self.config.n_itrs):
+
+            q_values = self._backup(values=values)
+            new_values = q_values.max(axis=1)
+            self.n_itrs_performed += 1
+
+            converged = np.max(np.abs(new_values - values)) < self.config.tolerance
+            values = new_values
+
+            if converged:
+                break
+
+        self.node_q_values = self._backup(values=values)
+        self.values = values
+        self.policy = np.argmax(self.node_q_values, axis=1)
+
+    def _policy_iteration(self) -> None:
+        """Run policy iteration until the policy is stable or
+        the maximum number of iterations is reached. Every policy
+        is evaluated iteratively up to the tolerance
+
+        Returns
+        -------
+
+        None
+        """
+
+        nodes = np.arange(self.lattice.n_nodes)
+        policy = np.zeros(self.lattice.n_nodes, dtype=np.int64)
+        values = np.zeros(self.lattice.n_nodes)
+
+        self.n_itrs_performed = 0
+        for itr in range(self.config.n_itrs):
+
+            # evaluate the policy
+            for evaluation_itr in range(self.config.n_itrs):
+                new_values = self._backup(values=values)[nodes, policy]
+                converged = np.max(np.abs(new_values - values)) < self.config.tolerance
+                values = new_values
+
+                if converged:
+                    break
+
+            # improve the policy. Keep the current action
+            # on ties so that the iteration terminates
+            q_values = self._backup(values=values)
+            new_policy = np.argmax(q_values, axis=1)
+            keep = q_values[nodes, policy] >= q_values[nodes, new_policy]
+            new_policy[keep] = policy[keep]
+            self.n_itrs_performed += 1
+
+            if np.array_equal(new_policy, policy):
+                break
+
+            policy = new_policy
+
+        self.node_q_values = self._backup(values=values)
+        self.values = values
+        self.policy = policy
+
+    def _project_q_values(self, env: Env) -> QTable:
+        """Project the Q-values of the nodes reachable from the
+        start of an episode on the aggregated states
+
+        Parameters
+        ----------
+        env: The environment
+
+        Returns
+        -------
+
+        The Q-table over the aggregated states
+        """
+
+        if env.env_type == DiscreteEnvType.MULTI_COLUMN_STATE:
+
+            # as in QLearning the multi-column state space
+            # is not enumerated
+            q_table = QTable(n_actions=env.n_actions)
+        else:
+
+            # every aggregated state the environment
+            # can observe starts at zero
+            q_table = QTable(n_actions=env.n_actions, n_states=env.n_states)
+
+        # the observation on reset is not the state of
+        # the root node so project the root on both
+        projected = {}
+        for node, state in [(0, self.start_state)] + [(node, self.node_states[node]) for node in self._reachable_nodes()]:
+            if state in projected:
+                projected[state] = np.maximum(projected[state], self.node_q_values[node])
+            else:
+                projected[state] = self.node_q_values[node]
+
+        for state in projected:
+            row = q_table.row(state=state)
+            q_table.values[row] = projected[state]
+
+        return q_table
+
+    def _reachable_nodes(self) -> list:
+        """Returns the nodes that can be reached from
+        the root without terminating the episode
+
+        Returns
+        -------
+
+        A list of node indices
+        """
+
+        visited = np.zeros(self.lattice.n_nodes, dtype=bool)
+        visited[0] = True
+        frontier = np.array([0])
+
+        while len(frontier) != 0:
+            next_nodes = self.lattice.successors[frontier][~self.dones[frontier]]
+            next_nodes = np.unique(next_nodes[~visited[next_nodes]])
+            visited[next_nodes] = True
+            frontier = next_nodes
+
+        return list(np.flatnonzero(visited))
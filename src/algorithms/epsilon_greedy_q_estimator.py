@@ -46,6 +46,11 @@ class EpsilonGreedyQEstimator(WithEstimatorMixin):
         self.gamma: float = config.gamma
         self.env: Env = config.env
         self.weights: np.array = None
+
+        # the (state, features) pairs of the last two states
+        # seen. SARSA updates the weights with the features of
+        # the current and the next state
+        self._features_cache: list = []
         self.initialize()
 
     def initialize(self) -> None:
@@ -57,16 +62,17 @@ class EpsilonGreedyQEstimator(WithEstimatorMixin):
         None
 
         """
-        self.weights: np.array = np.zeros((self.env.n_states * self.env.n_actions))
+        self.weights: np.array = np.zeros(self.env.n_features)
 
     def q_hat_value(self, state_action_vec: StateActionVec) -> float:
         """Returns the `:math: \hat{q}` approximate value for the
-        given state-action vector
+        given state-action vector. The features are binary so
+        the value is the sum of the weights of the active tiles
 
         Parameters
         ----------
 
-        state_action_vec: The state-action tiled vector
+        state_action_vec: The indices of the active tiles of the state-action pair
 
         Returns
         -------
@@ -77,10 +83,13 @@ class EpsilonGreedyQEstimator(WithEstimatorMixin):
         if self.weights is None:
             raise InvalidParamValue(param_name="weights", param_value="None. Have you called initialize?")
 
-        return self.weights.dot(state_action_vec)
+        return float(self.weights[state_action_vec].sum())
 
-    def on_state(self, state: State) -> Action:
-        """Returns the action on the given state
+    def state_action_features(self, state: State) -> np.ndarray:
+        """Returns the indices of the active tiles of the given state
+        for every action. The features of the last two states are
+        cached so asking again for the same state object does not
+        featurize it again
 
         Parameters
         ----------
@@ -90,20 +99,58 @@ class EpsilonGreedyQEstimator(WithEstimatorMixin):
         Returns
         -------
 
-        An environment specific Action type
+        An integer array where row a holds the active tiles of action a
+        """
+
+        for cached_state, features in self._features_cache:
+            if cached_state is state:
+                return features
+
+        features = self.env.featurize_state_actions(state=state)
+        self._features_cache = self._features_cache[-1:] + [(state, features)]
+        return features
+
+    def q_hat_values(self, state: State) -> np.ndarray:
+        """Returns the `:math: \\hat{q}` approximate value of
+        every action at the given state
+
+        Parameters
+        ----------
+
+        state: The state observed
+
+        Returns
+        -------
+
+        An array with the value of every action
         """
 
-        # get the approximation of the  q-values
-        # given the state
+        if self.weights is None:
+            raise InvalidParamValue(param_name="weights", param_value="None. Have you called initialize?")
+
+        return self.weights[self.state_action_features(state=state)].sum(axis=1)
+
+    def on_state(self, state: State) -> Action:
+        """Returns the action on the given state
+
+        Parameters
+        ----------
+
+        state: The state observed
 
-        q_values = []
+        Returns
+        -------
 
-        for a in range(self.env.n_actions):
-            tiled_vector = self.env.featurize_state_action(action=a, state=state)
-            q_values.append(self.q_hat_value(tiled_vector))
+        An environment specific Action type
+        """
 
-        # choose an action at the current state
-        action = self.eps_policy(q_values, state)
+        # choose an action at the current state. The
+        # approximation of the q-values given the state
+        # is only needed when the action is not random
+        if self.eps_policy.explore():
+            action = self.eps_policy.random_action()
+        else:
+            action = int(np.argmax(self.q_hat_values(state=state)))
 
         # this is an integer get the ActionBase instead
         action = self.env.get_action(action)
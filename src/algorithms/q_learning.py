@@ -3,14 +3,17 @@ Simple Q-learning algorithm
 """
 
 import numpy as np
-from typing import TypeVar
+from typing import TypeVar, List
 from dataclasses import dataclass
 
 from src.exceptions.exceptions import InvalidParamValue
 from src.utils.mixins import WithMaxActionMixin, WithQTableMixinBase
+from src.utils.q_table import QTable
 from src.utils.episode_info import EpisodeInfo
 from src.utils.function_wraps import time_func_wrapper
+from src.utils.replay_buffer import ExperienceTuple
 from src.spaces.env_type import DiscreteEnvType
+from src.spaces.batched_discrete_state_environment import BatchedDiscreteStateEnvironment
 
 Env = TypeVar('Env')
 Policy = TypeVar('Policy')
@@ -25,6 +28,7 @@ class QLearnConfig(object):
     alpha: float = 0.1
     n_itrs_per_episode: int = 100
     policy: Policy = None
+    q_table_dtype: type = np.float64
 
 
 class QLearning(WithMaxActionMixin):
@@ -71,14 +75,12 @@ class QLearning(WithMaxActionMixin):
             if len(env.state_space) == 0:
                 raise ValueError("The state space is empty")
 
-            for state in env.state_space:
-                for action in range(env.n_actions):
-                    self.q_table[state, action] = 0.0
+            # the state space is typically too large to
+            # enumerate so the Q-values of a state are only
+            # allocated when the state is first visited
+            self.q_table = QTable(n_actions=env.n_actions, dtype=self.config.q_table_dtype)
         else:
-
-            for state in range(1, env.n_states + 1):
-                for action in range(env.n_actions):
-                    self.q_table[state, action] = 0.0
+            self.q_table = QTable(n_actions=env.n_actions, n_states=env.n_states, dtype=self.config.q_table_dtype)
 
     def actions_before_episode_begins(self, env: Env, episode_idx, **options) -> None:
         """Execute any actions the algorithm needs before
@@ -164,10 +166,74 @@ class QLearning(WithMaxActionMixin):
         An instance of EpisodeInfo
         """
 
-        episode_info, total_time = self._do_train(env, episode_idx, **options)
+        if isinstance(env, BatchedDiscreteStateEnvironment):
+            episode_info, total_time = self._do_train_batched(env, episode_idx, **options)
+        else:
+            episode_info, total_time = self._do_train(env, episode_idx, **options)
+
         episode_info.total_execution_time = total_time
         return episode_info
 
+    def update_q_table_batch(self, states: List, actions: np.ndarray,
+                             rewards: np.ndarray, next_states: List) -> None:
+        """Update the tabular state-action function with a batch
+        of transitions. All the TD targets are computed from the
+        Q-table before the update. A (state, action) pair that appears
+        m times in the batch is updated as if the mean of its targets
+        was applied m times in a row, i.e. its weight is (1 - alpha)^m.
+        This does not depend on the order of the transitions and
+        for a single transition it is the update of _update_q_table
+
+        Parameters
+        ----------
+        states: The states observed
+        actions: The actions taken
+        rewards: The rewards observed
+        next_states: The next states observed
+
+        Returns
+        -------
+
+        None
+        """
+
+        rows = self.q_table.rows(states=states)
+        next_rows = self.q_table.rows(states=next_states)
+        actions = np.asarray(actions, dtype=np.int64)
+
+        # as in _update_q_table the value
+        # of the next state is always used
+        targets = np.asarray(rewards, dtype=np.float64) + \
+            self.config.gamma * self.q_table.values[next_rows].max(axis=1)
+
+        # group the duplicate (state, action) pairs
+        pairs, pair_indices, pair_counts = np.unique(rows * self.q_table.n_actions + actions,
+                                                     return_inverse=True, return_counts=True)
+        mean_targets = np.bincount(pair_indices, weights=targets) / pair_counts
+        weights = (1.0 - self.config.alpha) ** pair_counts
+
+        q_values = self.q_table.values.reshape(-1)
+        q_values[pairs] = weights * q_values[pairs] + (1.0 - weights) * mean_targets
+
+    def update_q_table_from_experiences(self, experiences: List[ExperienceTuple]) -> None:
+        """Update the tabular state-action function with a batch
+        of experiences e.g. a sample from a ReplayBuffer
+
+        Parameters
+        ----------
+        experiences: The experiences
+
+        Returns
+        -------
+
+        None
+        """
+
+        self.update_q_table_batch(states=[experience.state for experience in experiences],
+                                  actions=np.array([experience.action for experience in experiences]),
+                                  rewards=np.array([experience.reward for experience in experiences]),
+                                  next_states=[experience.next_state for experience in experiences])
+
     @time_func_wrapper(show_time=False)
     def _do_train(self, env: Env, episode_idx: int, **option) -> EpisodeInfo:
         """Train the algorithm on the episode
@@ -219,6 +285,78 @@ class QLearning(WithMaxActionMixin):
         episode_info = EpisodeInfo(episode_score=episode_score, total_distortion=total_distortion, episode_itrs=counter)
         return episode_info
 
+    @time_func_wrapper(show_time=False)
+    def _do_train_batched(self, env: BatchedDiscreteStateEnvironment, episode_idx: int, **option) -> EpisodeInfo:
+        """Train the algorithm on the episode using a batch of
+        environments. Every iteration steps all the environments and
+        updates the Q-table with all the transitions at once. The
+        environments that finish are reset by the environment so the
+        episode always has n_itrs_per_episode iterations. The score and
+        the distortion reported are the averages over the environments
+
+        Parameters
+        ----------
+
+        env: The batch of environments to train on
+        episode_idx: The index of the training episode
+        options: Any keyword based options passed by the client code
+
+        Returns
+        -------
+
+        An instance of EpisodeInfo
+        """
+
+        episode_score = 0.0
+        total_distortion = 0.0
+
+        env.reset()
+        states = self._batch_states(observations=env.observations)
+
+        for itr in range(self.config.n_itrs_per_episode):
+
+            # epsilon-greedy action selection
+            actions = np.array([self.config.policy(q_table=self.q_table, state=state) for state in states],
+                               dtype=np.int64)
+
+            # take actions A, observe R, S'
+            time_step = env.step(actions)
+            next_states = self._batch_states(observations=time_step.observations)
+
+            episode_score += time_step.rewards.sum()
+            total_distortion += time_step.total_distortions.sum()
+            self.update_q_table_batch(states=states, actions=actions, rewards=time_step.rewards,
+                                      next_states=next_states)
+
+            # the environments that finished
+            # have started a new episode
+            states = self._batch_states(observations=env.observations)
+
+        episode_info = EpisodeInfo(episode_score=episode_score / env.n_envs,
+                                   total_distortion=total_distortion / env.n_envs,
+                                   episode_itrs=self.config.n_itrs_per_episode)
+        return episode_info
+
+    @staticmethod
+    def _batch_states(observations: np.ndarray) -> List:
+        """Returns the states of a batch of observations as
+        the objects a single environment observes
+
+        Parameters
+        ----------
+        observations: The observations. Row i is the observation of the i-th environment
+
+        Returns
+        -------
+
+        A list of states
+        """
+
+        if observations.ndim == 1:
+            return observations.tolist()
+
+        return [tuple(observation) for observation in observations.tolist()]
+
     def _update_q_table(self, state: int, action: int, n_actions: int,
                         reward: float, next_state: int = None) -> None:
         """ Update the tabular state-action function
@@ -238,14 +376,14 @@ class QLearning(WithMaxActionMixin):
         """
 
         # estimate in Q-table (for current state, action pair)
-        q_s = self.q_table[state, action]
+        row = self.q_table.row(state=state)
+        q_s = self.q_table.values[row, action]
 
         # value of next state
-        Qsa_next = \
-            self.q_table[next_state, self.max_action(next_state, n_actions=n_actions)] if next_state is not None else 0
+        Qsa_next = self.q_table.max_value(state=next_state) if next_state is not None else 0
+
         # construct TD target
         target = reward + (self.config.gamma * Qsa_next)
 
         # get updated value
-        new_value = q_s + (self.config.alpha * (target - q_s))
-        self.q_table[state, action] = new_value
+        self.q_table.values[row, action] = q_s + (self.config.alpha * (target - q_s))
@@ -6,6 +6,7 @@ second edition 2020
 
 """
 
+import numpy as np
 from dataclasses import dataclass
 from typing import TypeVar
 
@@ -247,14 +248,14 @@ class SemiGradSARSA(object):
         if not isinstance(action, int):
             action_id = action.idx
 
-        # get a copy of the weights
-        weights = self.config.policy.weights
+        # the policy has featurized the state when it selected the action
+        active_tiles = self.config.policy.state_action_features(state=state)[action_id]
+        v1 = self.config.policy.q_hat_value(state_action_vec=active_tiles)
 
-        tiled_state = env.featurize_state_action(action=action_id, state=state)
-        v1 = self.config.policy.q_hat_value(state_action_vec=tiled_state)
-
-        weights += self.config.alpha / t * (reward - v1) * tiled_state
-        self.config.policy.weights = weights
+        # the gradient is one at the active tiles and zero
+        # everywhere else so only those weights change. Hashed
+        # tiles may collide so repeated indices are accumulated
+        np.add.at(self.config.policy.weights, active_tiles, self.config.alpha / t * (reward - v1))
 
     def _weights_update(self, env: Env, state: State, action: Action, reward: float,
                         next_state: State, next_action: Action, t: float = 1.0) -> None:
@@ -285,16 +286,18 @@ class SemiGradSARSA(object):
         if not isinstance(action, int):
             action_id_2 = next_action.idx
 
-        # get a copy of the weights
-        weights = self.config.policy.weights
+        # the policy has featurized both states
+        # when it selected the actions
+        active_tiles1 = self.config.policy.state_action_features(state=state)[action_id_1]
+        active_tiles2 = self.config.policy.state_action_features(state=next_state)[action_id_2]
 
-        tiled_state1 = env.featurize_state_action(action=action_id_1, state=state)
-        tiled_state2 = env.featurize_state_action(action=action_id_2, state=next_state)
+        v1 = self.config.policy.q_hat_value(state_action_vec=active_tiles1)
+        v2 = self.config.policy.q_hat_value(state_action_vec=active_tiles2)
 
-        v1 = self.config.policy.q_hat_value(state_action_vec=tiled_state1)
-        v2 = self.config.policy.q_hat_value(state_action_vec=tiled_state2)
-        weights += self.config.alpha / t * (reward + self.config.gamma * v2 - v1) * tiled_state1
-        self.config.policy.weights = weights
+        # the gradient is one at the active tiles and zero
+        # everywhere else so only those weights change. Hashed
+        # tiles may collide so repeated indices are accumulated
+        np.add.at(self.config.policy.weights, active_tiles1, self.config.alpha / t * (reward + self.config.gamma * v2 - v1))
 
     def _init(self) -> None:
         """Any initializations needed before starting the training
@@ -5,7 +5,7 @@ as an environment suitable for RL algorithms
 """
 from pathlib import Path
 import abc
-from typing import Generic, TypeVar
+from typing import Generic, TypeVar, Any
 import pandas as pd
 import numpy as np
 
@@ -135,6 +135,48 @@ class PandasDSWrapper(DSWrapper[pd.DataFrame]):
             for col in options["column_normalization"]:
                 self.normalize_column(column_name=col)
 
+        if "categorical_columns" in options and \
+                options["categorical_columns"] is not None:
+            for col in options["categorical_columns"]:
+                self.encode_categorical_column(column_name=col)
+
+    def encode_categorical_column(self, column_name: str) -> None:
+        """Store the column with the given name as integer codes
+        plus a dictionary of the distinct values (pd.Categorical).
+        String actions that use a hierarchy act on such columns with
+        a single gather over the codes
+
+        Parameters
+        ----------
+        column_name: The name of the column to encode
+
+        Returns
+        -------
+
+        None
+        """
+
+        data_type = self.columns[column_name]
+
+        if data_type is not str:
+            raise InvalidDataTypeException(param_name=column_name, param_type=data_type, param_types="[str]")
+
+        self.ds[column_name] = self.ds[column_name].astype("category")
+
+    def is_categorical_column(self, col_name: str) -> bool:
+        """Returns true if the column is stored as pd.Categorical
+
+        Parameters
+        ----------
+        col_name: The name of the column
+
+        Returns
+        -------
+
+        A boolean
+        """
+        return isinstance(self.ds[col_name].dtype, pd.CategoricalDtype)
+
     def normalize_column(self, column_name) -> None:
         """
         Normalizes the column with the given name using the following
@@ -225,3 +267,186 @@ class PandasDSWrapper(DSWrapper[pd.DataFrame]):
         column = self.get_column(col_name=column_name)
         column = transform.act(**{"data": column.values})
         self.ds[transform.column_name] = column
+
+
+class CopyOnWriteDSWrapper(DSWrapper[pd.DataFrame]):
+    """Copy-on-write view over a PandasDSWrapper. The view
+    shares the column buffers of the wrapped data set and only copies
+    a column the first time a transform writes to it. Resetting the view
+    simply drops the copied columns so that the cost of a reset is
+    proportional to the number of columns touched and not to the size
+    of the data set
+
+    """
+
+    def __init__(self, data_set: PandasDSWrapper) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        data_set: The data set to wrap. It is never modified by the view
+
+        """
+        super(CopyOnWriteDSWrapper, self).__init__()
+        self.data_set: PandasDSWrapper = data_set
+
+        # the columns that have been written to. These
+        # shadow the columns of the wrapped data set
+        self.overlays: dict = {}
+
+    @property
+    def ds(self) -> pd.DataFrame:
+        """Returns a DataFrame that represents the current view.
+        Columns that have not been written to are shared with the
+        wrapped data set
+
+        Returns
+        -------
+
+        An instance of pd.DataFrame
+        """
+        if len(self.overlays) == 0:
+            return self.data_set.ds
+
+        return self.data_set.ds.assign(**{name: self.get_column(col_name=name)
+                                          for name in self.overlays})
+
+    @ds.setter
+    def ds(self, value: pd.DataFrame) -> None:
+        # the view never owns a DataFrame. This is needed
+        # because DSWrapper.__init__ initializes self.ds
+        if value is not None:
+            raise ValueError("Cannot set the DataFrame of a CopyOnWriteDSWrapper")
+
+    @property
+    def columns(self) -> dict:
+        return self.data_set.columns
+
+    @property
+    def n_rows(self) -> int:
+        return self.data_set.n_rows
+
+    @property
+    def n_columns(self) -> int:
+        return self.data_set.n_columns
+
+    def read(self, filename: Path, **options) -> None:
+        raise NotImplementedError("A CopyOnWriteDSWrapper cannot read a data set")
+
+    def reset(self) -> None:
+        """Drop all the copied columns so that the view
+        is identical to the wrapped data set
+
+        Returns
+        -------
+
+        None
+        """
+        self.overlays = {}
+
+    def is_column_modified(self, col_name: str) -> bool:
+        """Returns true if the column has been written to
+        since the last reset
+
+        Parameters
+        ----------
+        col_name: The name of the column
+
+        Returns
+        -------
+
+        A boolean
+        """
+        return col_name in self.overlays
+
+    def get_column(self, col_name: str):
+        """Returns the column with the given name
+
+        Parameters
+        ----------
+        col_name: The name of the column
+
+        Returns
+        -------
+
+        An instance of pd.Series
+        """
+        if col_name in self.overlays:
+            column = self.data_set.get_column(col_name=col_name)
+            return pd.Series(self.overlays[col_name], index=column.index, name=col_name, copy=False)
+
+        return self.data_set.get_column(col_name=col_name)
+
+    def get_column_unique_values(self, col_name: str):
+        col = self.get_column(col_name=col_name)
+        vals = col.values.ravel()
+        return pd.unique(vals)
+
+    def get_columns_types(self):
+        return list(self.ds.dtypes)
+
+    def get_column_type(self, col_name: str):
+        return self.get_column(col_name=col_name).dtype
+
+    def get_columns_names(self):
+        return self.data_set.get_columns_names()
+
+    def save_to_csv(self, filename: Path, save_index: bool) -> None:
+        """Save the current view to the given file
+
+        Parameters
+        ----------
+        filename: The filepath to save the dataset
+        save_index: If true saves also the index
+
+        Returns
+        -------
+
+        None
+        """
+        self.ds.to_csv(filename, index=save_index)
+
+    def apply_column_transform(self, column_name: str, transform: Transform) -> None:
+        """Apply the given transformation on the view. The column is
+        copied the first time it is written to since the last reset
+
+        Parameters
+        ----------
+        column_name: The column to transform
+        transform: The transformation to apply
+
+        Returns
+        -------
+
+        None
+        """
+
+        if column_name in self.overlays:
+            values = self.overlays[column_name]
+        else:
+            # transforms work in place so never hand
+            # them the buffer of the wrapped data set
+            values = self.data_set.get_column(col_name=column_name).values.copy()
+
+        self.overlays[transform.column_name] = transform.act(**{"data": values})
+
+    def set_column_values(self, column_name: str, values: Any) -> None:
+        """Replace the values of the given column in the view.
+        The view takes ownership of the given values
+
+        Parameters
+        ----------
+        column_name: The column to replace
+        values: The new values of the column
+
+        Returns
+        -------
+
+        None
+        """
+
+        if len(values) != self.n_rows:
+            raise ValueError("Invalid number of values {0} for column {1}. "
+                             "Expected {2}".format(len(values), column_name, self.n_rows))
+
+        self.overlays[column_name] = values
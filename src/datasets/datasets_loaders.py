@@ -43,6 +43,10 @@ class MockSubjectsData(object):
     # list of columns to be normalized
     NORMALIZED_COLUMNS: List[str] = field(default_factory=list)
 
+    # list of string columns to be stored as
+    # integer codes plus a dictionary of values
+    CATEGORICAL_COLUMNS: List[str] = field(default_factory=list)
+
 
 class MockSubjectsLoader(PandasDSWrapper):
     """The class MockSubjectsLoader. Loads the  mocksubjects.csv
@@ -51,12 +55,14 @@ class MockSubjectsLoader(PandasDSWrapper):
     @classmethod
     def from_options(cls, *, filename: Path,
                      column_types: dir, features_drop_names: List[str],
-                     names: List[str], drop_na: bool, change_col_vals: dict, column_normalization: List[str]):
+                     names: List[str], drop_na: bool, change_col_vals: dict, column_normalization: List[str],
+                     categorical_columns: List[str] = None):
 
         data = MockSubjectsData(FILENAME=filename, COLUMNS_TYPES=column_types,
                                 FEATURES_DROP_NAMES=features_drop_names, NAMES=names,
                                 DROP_NA=drop_na, CHANGE_COLS_VALS=change_col_vals,
-                                NORMALIZED_COLUMNS=column_normalization)
+                                NORMALIZED_COLUMNS=column_normalization,
+                                CATEGORICAL_COLUMNS=categorical_columns if categorical_columns is not None else [])
         return cls(data=data)
 
     def __init__(self, data: MockSubjectsData, do_read: bool = True):
@@ -68,4 +74,5 @@ class MockSubjectsLoader(PandasDSWrapper):
                          "names": data.NAMES,
                          "drop_na": data.DROP_NA,
                          "change_col_vals": data.CHANGE_COLS_VALS,
-                         "column_normalization": data.NORMALIZED_COLUMNS})
+                         "column_normalization": data.NORMALIZED_COLUMNS,
+                         "categorical_columns": data.CATEGORICAL_COLUMNS})
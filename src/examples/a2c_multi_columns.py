@@ -146,8 +146,10 @@ if __name__ == '__main__':
                                                                    optimizer_learning_rate=ALPHA))
 
 
-    # the multiprocess environment
-    env = MultiprocessEnv(env_builder=env_loader, env_args={}, n_workers=N_WORKERS)
+    # the multiprocess environment. The workers write
+    # their time steps in shared memory
+    env = MultiprocessEnv(env_builder=env_loader, env_args={}, n_workers=N_WORKERS,
+                          observation_size=N_COLUMNS)
 
     try:
 
@@ -0,0 +1,144 @@
+"""Module tile_coding. Implements hashed tile coding. The
+tiles of all the tilings are mapped to the indices of an index
+hash table with a fixed size so that the memory needed does not
+depend on the number of tiled variables. The implementation follows
+the tile coding software described in the book by Sutton and Barto:
+Reinforcement Learning An Introduction second edition 2020
+
+"""
+
+import math
+from typing import List
+
+
+class IHT(object):
+    """The IHT class. An index hash table that assigns
+    consecutive indices to the tile coordinates it sees until
+    it is full. After that the coordinates are hashed to an index
+    in [0, size) and the collisions are counted
+
+    """
+
+    def __init__(self, size: int) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        size: The maximum number of indices
+
+        """
+
+        if size <= 0:
+            raise ValueError("Invalid size {0}. Should be greater than zero".format(size))
+
+        self.size = size
+        self.overfull_count = 0
+        self.dictionary = {}
+
+    def __len__(self) -> int:
+        return len(self.dictionary)
+
+    def count(self) -> int:
+        """Returns the number of coordinates that have an index
+
+        Returns
+        -------
+
+        An integer
+        """
+        return len(self.dictionary)
+
+    def full(self) -> bool:
+        """Returns true if every index has been assigned
+
+        Returns
+        -------
+
+        A boolean
+        """
+        return len(self.dictionary) >= self.size
+
+    def get_index(self, coordinates: tuple, read_only: bool = False) -> int:
+        """Returns the index of the given tile coordinates
+
+        Parameters
+        ----------
+        coordinates: The coordinates of the tile
+        read_only: If true the coordinates seen for the first
+        time are not added to the table and None is returned
+
+        Returns
+        -------
+
+        The index of the tile
+        """
+
+        if coordinates in self.dictionary:
+            return self.dictionary[coordinates]
+
+        if read_only:
+            return None
+
+        if self.full():
+            self.overfull_count += 1
+            return hash(coordinates) % self.size
+
+        index = len(self.dictionary)
+        self.dictionary[coordinates] = index
+        return index
+
+
+def tile_coordinates(num_tilings: int, floats: List[float]) -> List[tuple]:
+    """Returns the coordinates of the active tile in every tiling. The floats
+    should be scaled so that a unit is the width of a tile. Every tiling
+    is displaced by an asymmetric fraction of the tile width
+
+    Parameters
+    ----------
+    num_tilings: The number of tilings
+    floats: The scaled values of the tiled variables
+
+    Returns
+    -------
+
+    A list with num_tilings tuples of coordinates
+    """
+
+    quantized = [math.floor(value * num_tilings) for value in floats]
+
+    coordinates = []
+    for tiling in range(num_tilings):
+        tiling_x2 = tiling * 2
+        tiling_coordinates = [tiling]
+
+        offset = tiling
+        for q in quantized:
+            tiling_coordinates.append((q + offset) // num_tilings)
+            offset += tiling_x2
+
+        coordinates.append(tuple(tiling_coordinates))
+
+    return coordinates
+
+
+def tiles(iht: IHT, num_tilings: int, floats: List[float], ints: List[int] = None,
+          read_only: bool = False) -> List[int]:
+    """Returns the index of the active tile in every tiling
+
+    Parameters
+    ----------
+    iht: The index hash table
+    num_tilings: The number of tilings
+    floats: The scaled values of the tiled variables. See tile_coordinates
+    ints: Integer variables that are not tiled, e.g. the action index
+    read_only: If true the tiles seen for the first time are not added to the table
+
+    Returns
+    -------
+
+    A list with num_tilings tile indices
+    """
+
+    ints = () if ints is None else tuple(ints)
+    return [iht.get_index(coordinates + ints, read_only=read_only)
+            for coordinates in tile_coordinates(num_tilings=num_tilings, floats=floats)]
@@ -0,0 +1,112 @@
+"""Module distortion_cache. Specifies a bounded
+least-recently-used cache for column distortions
+
+"""
+
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class DistortionCache(object):
+    """The DistortionCache class. Maps a column state
+    to the distortion of the column. When the cache is full the
+    least recently used entry is evicted. The cache keeps
+    hit/miss counters so that its effect can be measured
+
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        max_size: The maximum number of entries the cache holds
+
+        """
+
+        if max_size <= 0:
+            raise ValueError("max_size should be greater than zero")
+
+        self.max_size: int = max_size
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    @property
+    def hit_rate(self) -> float:
+        """Returns the fraction of lookups that were hits
+
+        Returns
+        -------
+
+        A float in [0, 1]
+        """
+        n_lookups = self.hits + self.misses
+
+        if n_lookups == 0:
+            return 0.0
+
+        return self.hits / n_lookups
+
+    def get(self, key: Hashable) -> Any:
+        """Returns the value stored for the key or None
+        if the key is not in the cache
+
+        Parameters
+        ----------
+        key: The key to look up
+
+        Returns
+        -------
+
+        The stored value or None
+        """
+
+        value = self._entries.get(key, None)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store the value for the given key. If the cache
+        is full the least recently used entry is evicted
+
+        Parameters
+        ----------
+        key: The key
+        value: The value to store
+
+        Returns
+        -------
+
+        None
+        """
+
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries and zero the counters
+
+        Returns
+        -------
+
+        None
+        """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -2,10 +2,13 @@
 utilities for dataset distortion calculation
 """
 import enum
+from collections import Counter
 from typing import TypeVar
+import numpy as np
+import pandas as pd
 from src.maths.numeric_distance_type import NumericDistanceType
 from src.maths.numeric_distance_calculator import NumericDistanceCalculator
-from src.maths.string_distance_calculator import StringDistanceType, TextDistanceCalculator
+from src.maths.string_distance_calculator import StringDistanceType, TextDistanceCalculator, character_histogram
 from src.exceptions.exceptions import InvalidParamValue
 
 Vector = TypeVar('Vector')
@@ -59,6 +62,49 @@ class DistortionCalculator(object):
                                                                                                              state2=vec2)
         raise InvalidParamValue(param_name='datatype', param_value=datatype)
 
+    def can_calculate_from_counts(self) -> bool:
+        """Returns true if the distortion of string columns
+        can be calculated from the value counts of the columns
+
+        Returns
+        -------
+
+        A boolean
+        """
+        return self.string_column_distortion_metric_type in TextDistanceCalculator.COUNTS_DISTANCE_TYPES
+
+    def calculate_from_counts(self, counts1: dict, counts2: dict) -> float:
+        """Calculate the distortion between two string columns
+        given the value counts of each column
+
+        Parameters
+        ----------
+        counts1: Map from every distinct value of the first column to its count
+        counts2: Map from every distinct value of the second column to its count
+
+        Returns
+        -------
+        A floating point value representing the distortion
+        """
+        return TextDistanceCalculator(dist_type=self.string_column_distortion_metric_type).calculate_from_counts(counts1=counts1,
+                                                                                                                counts2=counts2)
+
+    def calculate_from_histograms(self, histogram1: Counter, histogram2: Counter) -> float:
+        """Calculate the distortion between two string columns
+        given the character counts of each joined column
+
+        Parameters
+        ----------
+        histogram1: Map from every character of the first column to its count
+        histogram2: Map from every character of the second column to its count
+
+        Returns
+        -------
+        A floating point value representing the distortion
+        """
+        return TextDistanceCalculator(dist_type=self.string_column_distortion_metric_type).calculate_from_histograms(histogram1=histogram1,
+                                                                                                                    histogram2=histogram2)
+
     def total_distortion(self, distortions: Vector) -> float:
 
         """Given a vector of distortions calculate the total distortion
@@ -80,3 +126,101 @@ class DistortionCalculator(object):
 
         raise InvalidParamValue(param_name='dataset_distortion_type', param_value=self.dataset_distortion_type.name)
 
+    def total_distortions(self, distortions: np.ndarray) -> np.ndarray:
+        """Given a matrix of distortions where every row holds the column
+        distortions of a data set calculate the total distortion of every
+        data set. The columns are summed in order so that every total
+        is identical to the one total_distortion returns
+
+        Parameters
+        ----------
+        distortions: Matrix of distortions of shape (n_data_sets, n_columns)
+
+        Returns
+        -------
+
+        The total distortion of every data set
+        """
+
+        totals = np.zeros(distortions.shape[0])
+        for c in range(distortions.shape[1]):
+            totals += distortions[:, c]
+
+        if self.dataset_distortion_type == DistortionCalculationType.SUM:
+            return totals
+        elif self.dataset_distortion_type == DistortionCalculationType.AVG:
+            return totals / distortions.shape[1]
+
+        raise InvalidParamValue(param_name='dataset_distortion_type', param_value=self.dataset_distortion_type.name)
+
+
+class ColumnDistortion(object):
+    """Callable that calculates the distortion of a column with
+    respect to a fixed original column. The character counts of
+    a string column are only computed once
+
+    """
+
+    def __init__(self, start_column: pd.Series, distortion_calculator: DistortionCalculator,
+                 datatype: str) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        start_column: The original column
+        distortion_calculator: The calculator to use
+        datatype: The type held by the column
+
+        """
+        self.start_column = start_column
+        self.distortion_calculator = distortion_calculator
+        self.datatype = datatype
+
+        # character counts of the original column. Only used
+        # for string columns when the metric allows it
+        self.start_histogram: Counter = None
+
+    def __call__(self, current_column: pd.Series) -> float:
+        """Calculate the distortion of the given column
+
+        Parameters
+        ----------
+        current_column: The distorted column
+
+        Returns
+        -------
+        A floating point value representing the distortion
+        """
+
+        if self.datatype == 'str' and self.distortion_calculator.can_calculate_from_counts():
+
+            # the distortion only depends on the character
+            # counts so avoid joining the columns into strings
+            if self.start_histogram is None:
+                self.start_histogram = self._character_histogram(column=self.start_column)
+
+            return self.distortion_calculator.calculate_from_histograms(self._character_histogram(column=current_column),
+                                                                        self.start_histogram)
+
+        if self.datatype == 'str':
+            return self.distortion_calculator.calculate("".join(current_column.values),
+                                                        "".join(self.start_column.values), self.datatype)
+
+        return self.distortion_calculator.calculate(current_column, self.start_column, self.datatype)
+
+    def _character_histogram(self, column: pd.Series) -> Counter:
+        """Returns the character counts of the given
+        string column when joined into a single string. The
+        counts are computed from the value counts of the column
+
+        Parameters
+        ----------
+        column: The string column
+
+        Returns
+        -------
+
+        An instance of collections.Counter
+        """
+
+        return character_histogram(counts=column.value_counts(sort=False).to_dict())
@@ -1,6 +1,7 @@
 import numpy as np
 import textdistance
 import enum
+from collections import Counter
 from src.exceptions.exceptions import Error
 
 
@@ -27,6 +28,10 @@ class TextDistanceCalculator(object):
     NORMALIZED_DISTANCE_TYPES = [StringDistanceType.COSINE_NORMALIZE,
                                  StringDistanceType.HAMMING_NORMALIZE]
 
+    # distance types that only depend on the character
+    # counts of the strings
+    COUNTS_DISTANCE_TYPES = [StringDistanceType.COSINE, StringDistanceType.COSINE_NORMALIZE]
+
     @staticmethod
     def build_calculator(dist_type: StringDistanceType):
 
@@ -78,12 +83,91 @@ class TextDistanceCalculator(object):
 
         return calculator.distance(txt1, txt2)
 
+    def calculate_from_counts(self, counts1: dict, counts2: dict) -> float:
+        """Calculate the distance between the strings formed by joining
+        the values of two columns without forming the strings. The columns are
+        given as maps from each distinct value to the number of times it appears.
+        The character histogram of a joined column is the sum over the values of
+        count times the character histogram of the value. This gives the same
+        result as calculate for the COSINE and COSINE_NORMALIZE types
+
+        Parameters
+        ----------
+        counts1: The value counts of the first column
+        counts2: The value counts of the second column
+
+        Returns
+        -------
+
+        A floating point number representing the distance between the
+        two joined columns
+        """
 
+        return self.calculate_from_histograms(histogram1=character_histogram(counts=counts1),
+                                              histogram2=character_histogram(counts=counts2))
 
+    def calculate_from_histograms(self, histogram1: Counter, histogram2: Counter) -> float:
+        """Calculate the distance between two strings given
+        the number of times every character appears in each string.
+        This gives the same result as calculate for the COSINE
+        and COSINE_NORMALIZE types
 
+        Parameters
+        ----------
+        histogram1: The character counts of the first string
+        histogram2: The character counts of the second string
 
+        Returns
+        -------
 
+        A floating point number representing the distance between the
+        two strings
+        """
+
+        if self._dist_type not in TextDistanceCalculator.COUNTS_DISTANCE_TYPES:
+            raise Error("Distance type '{0}' cannot be calculated from counts".format(str(self._dist_type)))
+
+        total1 = sum(histogram1.values())
+        total2 = sum(histogram2.values())
+
+        if total1 == 0 and total2 == 0:
+            similarity = 1.0
+        elif total1 == 0 or total2 == 0:
+            similarity = 0.0
+        else:
+            intersection = sum(min(n_times, histogram2[character])
+                               for character, n_times in histogram1.items() if character in histogram2)
+            similarity = intersection / pow(total1 * total2, 1.0 / 2)
+
+        # the maximum similarity is one so the distance
+        # and the normalized distance coincide
+        return 1 - similarity
+
+
+def character_histogram(counts: dict) -> Counter:
+    """Returns the character histogram of the string formed by
+    joining count copies of every value
+
+    Parameters
+    ----------
+    counts: Map from every value to the number of times it appears
+
+    Returns
+    -------
+
+    An instance of collections.Counter
+    """
 
+    histogram = Counter()
 
+    for value, count in counts.items():
+        if count == 0:
+            continue
 
+        # use python integers so that the result is
+        # identical to textdistance.Cosine
+        count = int(count)
+        for character, n_times in Counter(value).items():
+            histogram[character] += count * n_times
 
+    return histogram
@@ -119,15 +119,35 @@ class EpsilonGreedyPolicy(WithMaxActionMixin):
         # update the store q_table
         self.q_table = q_table
 
-        # select greedy action with probability epsilon
-        if random.random() > self._eps:
-            return self.max_action(state=state, n_actions=self._n_actions)
-        else:
-
-            # otherwise, select an action randomly
-            # what happens if we select an action that
-            # has exhausted it's transforms?
-            return random.choice(np.arange(self._n_actions))
+        # select greedy action with probability 1 - epsilon.
+        # Otherwise, select an action randomly. What happens
+        # if we select an action that has exhausted it's transforms?
+        if self.explore():
+            return self.random_action()
+
+        return self.max_action(state=state, n_actions=self._n_actions)
+
+    def explore(self) -> bool:
+        """Draw whether the next action is selected randomly.
+        Client code that computes the action values itself should
+        call this first and compute the values only when it returns False
+
+        Returns
+        -------
+
+        True with probability epsilon
+        """
+        return random.random() <= self._eps
+
+    def random_action(self) -> int:
+        """Returns an action index selected uniformly at random
+
+        Returns
+        -------
+
+        An integer representing the action index
+        """
+        return random.randrange(self._n_actions)
 
     def on_state(self, state: State) -> int:
         """ Returns the optimal action on the current state
@@ -8,11 +8,16 @@ import abc
 import enum
 from typing import List, TypeVar, Any
 import numpy as np
+import pandas as pd
 
 from src.utils.mixins import WithHierarchyTable
 
 Hierarchy = TypeVar("Hierarchy")
 
+# code used in the precompiled code tables for
+# categories that are not in the hierarchy
+_MISSING_CODE = -2
+
 
 class ActionType(enum.IntEnum):
     """Defines the type of an Action
@@ -44,6 +49,109 @@ class ActionType(enum.IntEnum):
         return self is ActionType.RESTORE
 
 
+def _assign_values(col_vals: Any, values: np.ndarray) -> Any:
+    """Write the given values in the column in place.
+    Actions modify the data they are given so callers that hold a
+    reference to the data observe the change
+
+    Parameters
+    ----------
+    col_vals: The column data. Either a numpy array or a list
+    values: The new values
+
+    Returns
+    -------
+
+    The column data
+    """
+
+    if isinstance(col_vals, np.ndarray):
+        col_vals[:] = values
+    else:
+        col_vals[:] = values.tolist()
+
+    return col_vals
+
+
+class CodesTable(object):
+    """Precompiled code -> code table of a hierarchy for a given
+    set of categories. It allows to apply a hierarchy on a dictionary
+    encoded (pd.Categorical) column with a single gather instead
+    of a lookup per row
+
+    """
+
+    def __init__(self, table: Hierarchy, categories: pd.Index) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        table: The hierarchy to compile. It must implement __getitem__
+        categories: The categories of the column the table is applied on
+
+        """
+        self.categories: pd.Index = categories
+
+        new_categories = list(categories)
+        category_codes = {category: code for code, category in enumerate(new_categories)}
+
+        # the last entry maps the code of the missing values
+        # to itself so that codes can index the lookup directly
+        self.lookup = np.full(len(categories) + 1, -1, dtype=np.int64)
+
+        for code, category in enumerate(categories):
+
+            try:
+                value = table[category]
+            except KeyError:
+                self.lookup[code] = _MISSING_CODE
+                continue
+
+            if value not in category_codes:
+                category_codes[value] = len(new_categories)
+                new_categories.append(value)
+
+            self.lookup[code] = category_codes[value]
+
+        self.new_categories = pd.Index(new_categories)
+
+    def matches(self, categories: pd.Index) -> bool:
+        """Returns true if the table has been compiled for the given categories
+
+        Parameters
+        ----------
+        categories: The categories to check
+
+        Returns
+        -------
+
+        A boolean
+        """
+        return self.categories.equals(categories)
+
+    def apply(self, data: pd.Categorical) -> pd.Categorical:
+        """Apply the table on the given column
+
+        Parameters
+        ----------
+        data: The dictionary encoded column
+
+        Returns
+        -------
+
+        A new pd.Categorical with the mapped values
+        """
+
+        codes = self.lookup[data.codes]
+
+        missing = codes == _MISSING_CODE
+        if missing.any():
+            # same error as looking up the value in the hierarchy
+            raise KeyError(data[np.argmax(missing)])
+
+        return pd.Categorical.from_codes(codes, categories=self.new_categories)
+
+
 class ActionBase(metaclass=abc.ABCMeta):
     """Base class for actions
     """
@@ -155,9 +263,15 @@ class ActionTransform(ActionBase):
         # get the values of the column
         col_vals = ops['data']
 
-        # generalize the data given
-        for i, item in enumerate(ops["data"]):
-            col_vals[i] = self.transform
+        if isinstance(col_vals, pd.Categorical):
+            ops["data"] = pd.Categorical.from_codes(np.zeros(len(col_vals), dtype=np.int64),
+                                                    categories=[self.transform])
+            return ops['data']
+
+        if isinstance(col_vals, np.ndarray):
+            col_vals.fill(self.transform)
+        else:
+            col_vals[:] = [self.transform] * len(col_vals)
 
         ops["data"] = col_vals
         return ops['data']
@@ -171,6 +285,7 @@ class ActionSuppress(ActionBase, WithHierarchyTable):
         super(ActionSuppress, self).__init__(column_name=column_name, action_type=ActionType.SUPPRESS)
 
         self.table = suppress_table
+        self.codes_table: CodesTable = None
 
     def act(self, **ops) -> None:
         """
@@ -181,6 +296,15 @@ class ActionSuppress(ActionBase, WithHierarchyTable):
         # get the values of the column
         col_vals = ops['data'] #.values
 
+        # a dictionary encoded column is suppressed
+        # with a single gather over the codes
+        if isinstance(col_vals, pd.Categorical):
+            if self.codes_table is None or not self.codes_table.matches(col_vals.categories):
+                self.codes_table = CodesTable(table=self.table, categories=col_vals.categories)
+
+            ops["data"] = self.codes_table.apply(col_vals)
+            return ops['data']
+
         # generalize the data given
         for i, item in enumerate(ops["data"]):
 
@@ -209,6 +333,10 @@ class ActionStringGeneralize(ActionBase, WithHierarchyTable):
         super(ActionStringGeneralize, self).__init__(column_name=column_name, action_type=ActionType.GENERALIZE)
         self.table = generalization_table
 
+        # compiled table used when the column is
+        # dictionary encoded
+        self.codes_table: CodesTable = None
+
     def act(self, **ops) -> Any:
         """Performs the action
 
@@ -226,6 +354,15 @@ class ActionStringGeneralize(ActionBase, WithHierarchyTable):
         # get the values of the column
         col_vals = ops['data']
 
+        # a dictionary encoded column is generalized
+        # with a single gather over the codes
+        if isinstance(col_vals, pd.Categorical):
+            if self.codes_table is None or not self.codes_table.matches(col_vals.categories):
+                self.codes_table = CodesTable(table=self.table, categories=col_vals.categories)
+
+            ops["data"] = self.codes_table.apply(col_vals)
+            return ops['data']
+
         # generalize the data given
         for i, item in enumerate(col_vals):
 
@@ -252,6 +389,10 @@ class ActionStringGeneralize(ActionBase, WithHierarchyTable):
         """
         self.table.add(key, value)
 
+        # the hierarchy changed so the compiled
+        # table is no longer valid
+        self.codes_table = None
+
 
 class ActionNumericBinGeneralize(ActionBase, WithHierarchyTable):
     """Generalization Action for numeric columns using bins
@@ -275,6 +416,9 @@ class ActionNumericBinGeneralize(ActionBase, WithHierarchyTable):
             self.bins.append((start, self.table[i]))
             start = self.table[i]
 
+        # the value every bin is generalized to
+        self.midpoints = np.array([(high + low)*0.5 for low, high in self.bins])
+
     def act(self, **ops) -> Any:
         """
         Perform the action
@@ -289,27 +433,20 @@ class ActionNumericBinGeneralize(ActionBase, WithHierarchyTable):
 
         # get the values of the column
         col_vals = ops['data'] #.values
+        values = np.asarray(col_vals)
 
-        # generalize the data given
-        for i, item in enumerate(col_vals):
-
-            # find out the bin it belongs to
-            bin_idx = np.digitize(item, self.table)
+        # find out the bin every value belongs to
+        bin_idx = np.digitize(values, self.table)
 
-            if bin_idx == 0 or bin_idx == len(self.table):
-                # this means data is out of bounds
-                raise ValueError("Invalid bin index for value {0}. "
-                                 "Bin index={1} not in [1, {2}]".format(item, bin_idx, len(self.table)))
+        out_of_bounds = (bin_idx == 0) | (bin_idx == len(self.table))
+        if np.any(out_of_bounds):
+            # this means data is out of bounds
+            raise ValueError("Invalid bin index for values {0}. "
+                             "Bin indices={1} not in [1, {2}]".format(list(values[out_of_bounds]),
+                                                                      list(bin_idx[out_of_bounds]),
+                                                                      len(self.table)))
 
-            low = self.bins[bin_idx - 1][0]
-            high = self.bins[bin_idx - 1][1]
-
-            # How do we update the generalizations?
-            # use
-            value = (high + low)*0.5
-            col_vals[i] = value
-
-        ops["data"] = col_vals
+        ops["data"] = _assign_values(col_vals, self.midpoints[bin_idx - 1])
         return ops['data']
 
 
@@ -327,13 +464,9 @@ class ActionNumericStepGeneralize(ActionBase):
 
         # get the values of the column
         col_vals = ops['data']
+        values = np.asarray(col_vals)
 
-        # generalize the data given
-        for i, item in enumerate(col_vals):
-            value = item + self.step*item
-            col_vals[i] = value
-
-        ops["data"] = col_vals
+        ops["data"] = _assign_values(col_vals, values + self.step*values)
         return ops['data']
 
 
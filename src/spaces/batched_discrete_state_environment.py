@@ -0,0 +1,319 @@
+"""Module batched_discrete_state_environment. Specifies
+an environment that steps a batch of independent
+DiscreteStateEnvironment instances in the same process
+
+"""
+
+import dataclasses
+import numpy as np
+import torch
+from typing import TypeVar, Any
+
+from src.datasets import ColumnType
+from src.spaces.env_type import DiscreteEnvType, DiscreteEnvBackendType
+from src.spaces.actions import ActionBase
+from src.spaces.time_step import BatchedTimeStep, StepType
+from src.spaces.discrete_state_environment import DiscreteEnvConfig, DiscreteStateEnvironment
+
+ActionVector = TypeVar('ActionVector')
+DataSet = TypeVar("DataSet")
+
+
+class BatchedDiscreteStateEnvironment(object):
+    """The BatchedDiscreteStateEnvironment class. Holds the
+    state of n_envs environments as arrays. The generalization
+    level of every column of every environment is a node of the
+    GeneralizationLattice of the configuration so a step of all
+    the environments is a handful of array operations. An environment
+    that finishes its episode is reset automatically and the time step
+    returned holds the last time step of that episode, as in MultiprocessEnv.
+    The distorted data set of an environment is only built on demand
+
+    """
+
+    IS_TILED_ENV_CONSTRAINT = False
+
+    def __init__(self, env_config: DiscreteEnvConfig, n_envs: int) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        env_config: The configuration of every environment. The
+        backend is always DiscreteEnvBackendType.TABLE
+        n_envs: The number of environments
+
+        """
+
+        if n_envs < 1:
+            raise ValueError("Invalid number of environments {0}. Should be at least 1".format(n_envs))
+
+        # the environment that provides the lattice, the state
+        # bins and materializes the distorted data sets
+        self.env = DiscreteStateEnvironment(env_config=dataclasses.replace(env_config,
+                                                                          backend=DiscreteEnvBackendType.TABLE))
+        self.n_envs = n_envs
+        self.lattice = self.env.generalization_lattice
+
+        column_indices = {name: i for i, name in enumerate(self.env.column_names)}
+
+        for name in self.lattice.column_names:
+            if self.config.column_types[name] == ColumnType.IDENTIFYING_ATTRIBUTE:
+                raise ValueError("Column {0} is an identifying column and cannot be distorted "
+                                 "by the action space".format(name))
+
+        # the columns of the lattice and the column every
+        # action acts on as indices in the distances matrix
+        self.lattice_columns = np.array([column_indices[name] for name in self.lattice.column_names], dtype=np.int64)
+        self.action_columns = np.array([column_indices[action.column_name]
+                                        for action in self.env.action_space.actions], dtype=np.int64)
+
+        # the columns that make up the observation
+        if self.config.state_as_distances:
+            self.observation_type = list
+            self.observation_columns = [column_indices[name] for name in self.env.column_bins]
+        elif self.env_type == DiscreteEnvType.MULTI_COLUMN_STATE:
+            self.observation_type = tuple
+            self.observation_columns = [column_indices[name] for name in self.env.column_bins
+                                        if self.config.column_types[name] == ColumnType.QUASI_IDENTIFYING_ATTRIBUTE]
+        else:
+            self.observation_type = int
+            self.observation_columns = []
+
+        # the state of an environment after a reset
+        time_step = self.env.reset()
+        self.start_distances = np.array([self.env.column_distances[name] for name in self.env.column_names])
+        self.start_visits = np.array([self.env.column_visits[name] for name in self.env.column_names], dtype=np.int64)
+        self.start_observation = np.array(time_step.observation)
+        self.min_dist_bin = self.env.get_min_aggregated_state()
+
+        self.nodes = np.zeros(n_envs, dtype=np.int64)
+        self.column_distances = np.tile(self.start_distances, (n_envs, 1))
+        self.column_visits = np.tile(self.start_visits, (n_envs, 1))
+        self.n_rounds_below_min_distortion = np.zeros(n_envs, dtype=np.int64)
+        self.observations = np.stack([self.start_observation] * n_envs)
+
+    @property
+    def config(self) -> DiscreteEnvConfig:
+        return self.env.config
+
+    @property
+    def n_workers(self) -> int:
+        return self.n_envs
+
+    @property
+    def action_space(self):
+        return self.env.action_space
+
+    @property
+    def n_actions(self) -> int:
+        return self.env.n_actions
+
+    @property
+    def n_states(self) -> int:
+        return self.env.n_states
+
+    @property
+    def env_type(self) -> DiscreteEnvType:
+        return self.env.env_type
+
+    @property
+    def state_space(self):
+        return self.env.state_space
+
+    def __len__(self) -> int:
+        return self.n_envs
+
+    def close(self, **kwargs) -> None:
+        pass
+
+    def get_action(self, aidx: int) -> ActionBase:
+        """Returns the action if the global aidx index
+
+        Parameters
+        ----------
+
+        aidx: The index of the action to return
+
+        Returns
+        -------
+
+        An instance of ActionBase
+
+        """
+        return self.env.get_action(aidx=aidx)
+
+    def total_current_distortions(self) -> np.ndarray:
+        """The total distortion of every environment
+
+        Returns
+        -------
+        An array with the total distortion of every environment
+        """
+        return self.config.distortion_calculator.total_distortions(self.column_distances)
+
+    def materialize_distorted_data_set(self, env_idx: int) -> DataSet:
+        """Build the distorted data set of the given environment.
+        The data set returned is overwritten by the next call
+
+        Parameters
+        ----------
+        env_idx: The index of the environment
+
+        Returns
+        -------
+
+        The distorted data set
+        """
+
+        self.env.reset()
+        for c, name in enumerate(self.lattice.column_names):
+            self.env.column_levels[name] = int(self.lattice.levels[self.nodes[env_idx], c])
+
+        return self.env.materialize_distorted_data_set()
+
+    def reset(self, **options) -> BatchedTimeStep:
+        """Starts a new sequence in every environment
+
+        Parameters
+        ----------
+        options
+
+        Returns
+        -------
+
+        An instance of BatchedTimeStep
+        """
+
+        self._reset_envs(np.ones(self.n_envs, dtype=bool))
+
+        return BatchedTimeStep(step_types=np.full(self.n_envs, StepType.FIRST, dtype=np.int64),
+                               rewards=np.zeros(self.n_envs),
+                               observations=self.observations.copy(),
+                               total_distortions=np.zeros(self.n_envs),
+                               discount=self.config.gamma,
+                               observation_type=self.observation_type)
+
+    def step(self, actions: ActionVector) -> BatchedTimeStep:
+        """Step every environment with its action
+
+        Parameters
+        ----------
+        actions: The index of the action of every environment
+
+        Returns
+        -------
+
+        An instance of BatchedTimeStep
+        """
+
+        actions = self._to_action_indices(actions=actions)
+        envs = np.arange(self.n_envs)
+
+        # apply the actions and update
+        # the distortions and the column counts
+        columns = self.action_columns[actions]
+        self.column_visits[envs, columns] += 1
+        self.nodes = self.lattice.successors[self.nodes, actions]
+        self.column_distances[:, self.lattice_columns] = self.lattice.column_distortions[self.nodes]
+
+        column_distortions = self.column_distances[envs, columns]
+        current_distortions = self.total_current_distortions()
+
+        # the episode of an environment ends when all columns
+        # have been visited or the distortion is above the maximum
+        done = np.all(self.column_visits != 0, axis=1) | (current_distortions > self.config.max_total_distortion)
+
+        # or when it is trapped below the minimum distortion
+        # for more than the allowed number of rounds
+        trapped = ~done & (current_distortions < self.config.min_total_distortion) & \
+            (self.n_rounds_below_min_distortion >= self.config.n_rounds_below_min_distortion)
+        self.n_rounds_below_min_distortion[~done & ~trapped] += 1
+        done |= trapped
+
+        next_observations = self._observations(current_distortions=current_distortions)
+
+        rewards = self.config.reward_manager.get_rewards_for_states(total_distortions=current_distortions,
+                                                                    current_states=self.observations,
+                                                                    next_states=next_observations,
+                                                                    min_dist_bins=self.min_dist_bin,
+                                                                    **{"actions": actions,
+                                                                       "action_space": self.action_space,
+                                                                       "column_distortions": column_distortions})
+
+        if self.env_type == DiscreteEnvType.TOTAL_DISTORTION_STATE and not self.config.state_as_distances:
+            done |= next_observations >= self.n_states
+
+        time_step = BatchedTimeStep(step_types=np.where(done, StepType.LAST, StepType.MID),
+                                    rewards=rewards, observations=next_observations,
+                                    total_distortions=current_distortions,
+                                    discount=self.config.gamma,
+                                    observation_type=self.observation_type)
+
+        # the environments that finished start a new episode
+        self.observations = next_observations.copy()
+        self._reset_envs(done)
+        return time_step
+
+    def _reset_envs(self, envs: np.ndarray) -> None:
+        """Reset the environments given by the boolean mask
+
+        Parameters
+        ----------
+        envs: Boolean mask of the environments to reset
+
+        Returns
+        -------
+
+        None
+        """
+        self.nodes[envs] = 0
+        self.column_distances[envs] = self.start_distances
+        self.column_visits[envs] = self.start_visits
+        self.n_rounds_below_min_distortion[envs] = 0
+        self.observations[envs] = self.start_observation
+
+    def _observations(self, current_distortions: np.ndarray) -> np.ndarray:
+        """Returns the observation of every environment
+
+        Parameters
+        ----------
+        current_distortions: The total distortion of every environment
+
+        Returns
+        -------
+
+        An array where row i is the observation of the i-th environment
+        """
+
+        if self.observation_type == list:
+            return self.column_distances[:, self.observation_columns]
+
+        if self.observation_type == tuple:
+            return np.stack([np.digitize(self.column_distances[:, c], self.env.column_bins[self.env.column_names[c]])
+                             for c in self.observation_columns], axis=1)
+
+        return np.digitize(current_distortions, self.env.state_bins)
+
+    def _to_action_indices(self, actions: ActionVector) -> np.ndarray:
+        """Returns the given actions as an array of indices
+
+        Parameters
+        ----------
+        actions: The actions as a list, an array or a torch tensor
+
+        Returns
+        -------
+
+        An array of action indices
+        """
+
+        if isinstance(actions, torch.Tensor):
+            actions = actions.detach().cpu().numpy()
+
+        actions = np.asarray(actions, dtype=np.int64).reshape(-1)
+
+        if len(actions) != self.n_envs:
+            raise ValueError("Number of actions {0} is not equal to the "
+                             "number of environments {1}".format(len(actions), self.n_envs))
+
+        return actions
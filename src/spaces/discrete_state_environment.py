@@ -3,18 +3,23 @@ RL Environment API taken from
 https://github.com/deepmind/dm_env/blob/master/dm_env/_environment.py
 """
 
-import copy
 import numpy as np
 import torch
 from pathlib import Path
 from typing import TypeVar, List, Any
 from dataclasses import dataclass
 
-from src.spaces.env_type import DiscreteEnvType
+from src.spaces.env_type import DiscreteEnvType, DiscreteEnvBackendType
 from src.spaces.actions import ActionBase, ActionType
 from src.spaces.time_step import TimeStep, StepType
 from src.datasets import ColumnType
+from src.datasets.dataset_wrapper import CopyOnWriteDSWrapper
+from src.maths.distortion_cache import DistortionCache
+from src.maths.distortion_calculator import ColumnDistortion
 from src.spaces.actions import ActionTransform
+from src.spaces.generalization_levels import ColumnGeneralizationLevels
+from src.spaces.generalization_lattice import GeneralizationLattice
+from src.spaces.multi_column_state_space import MultiColumnStateSpace
 
 DataSet = TypeVar("DataSet")
 RewardManager = TypeVar("RewardManager")
@@ -45,6 +50,9 @@ class DiscreteEnvConfig(object):
     use_identifying_column_dist_in_total_dist: bool = True
     use_identifying_column_dist_factor: float = 1.0
     state_as_distances: bool = False
+    distortion_cache_size: int = 0
+    backend: DiscreteEnvBackendType = DiscreteEnvBackendType.DATASET
+    generalization_lattice: GeneralizationLattice = None
 
 
 class DiscreteStateEnvironment(object):
@@ -66,7 +74,10 @@ class DiscreteStateEnvironment(object):
                      distorted_set_path: Path = None, column_types: dir={},
                      use_identifying_column_dist_in_total_dist: bool = True,
                      use_identifying_column_dist_factor: float = 1.0,
-                     state_as_distances: bool = False):
+                     state_as_distances: bool = False,
+                     distortion_cache_size: int = 0,
+                     backend: DiscreteEnvBackendType = DiscreteEnvBackendType.DATASET,
+                     generalization_lattice: GeneralizationLattice = None):
 
         config = DiscreteEnvConfig(data_set=data_set, action_space=action_space,
                                    reward_manager=reward_manager,
@@ -82,7 +93,10 @@ class DiscreteStateEnvironment(object):
                                    env_type=env_type, column_types=column_types,
                                    use_identifying_column_dist_in_total_dist=use_identifying_column_dist_in_total_dist,
                                    use_identifying_column_dist_factor=use_identifying_column_dist_factor,
-                                   state_as_distances=state_as_distances)
+                                   state_as_distances=state_as_distances,
+                                   distortion_cache_size=distortion_cache_size,
+                                   backend=backend,
+                                   generalization_lattice=generalization_lattice)
 
         return cls(env_config=config)
 
@@ -98,8 +112,12 @@ class DiscreteStateEnvironment(object):
         self.config = env_config
         self.n_rounds_below_min_distortion = 0
         self.state_bins: List[float] = []
-        self.state_space: List[tuple] = []
-        self.distorted_data_set = copy.deepcopy(self.config.data_set)
+        self.state_space: Any = []
+
+        # the distorted data set shares the column buffers
+        # of the original data set. A column is only copied
+        # when an action writes to it
+        self.distorted_data_set = CopyOnWriteDSWrapper(data_set=self.config.data_set)
         self.current_time_step: TimeStep = None
 
         # dictionary that holds the distortion for every column
@@ -115,8 +133,59 @@ class DiscreteStateEnvironment(object):
         # column. An episode ends when all columns
         # have been visited
         self.column_visits = {}
+
+        # the actions applied on every column since the
+        # last reset. Actions are deterministic so this
+        # identifies the state of the column
+        self.column_history = {}
+
+        # the distortion function of every
+        # column. Filled on demand
+        self.column_distortion_funcs = {}
+
+        # cache of column distortions keyed by
+        # (column name, column history)
+        self.distortion_cache: DistortionCache = None
+        if self.config.distortion_cache_size > 0:
+            self.distortion_cache = DistortionCache(max_size=self.config.distortion_cache_size)
+
+        # the generalization level of every column
+        # and the chain of distortions per column.
+        # Only used if config.backend = LAZY or TABLE
+        self.column_levels = {}
+        self.generalization_levels = {}
+
+        # the lattice and the current node in it.
+        # Only used if config.backend = TABLE
+        self.generalization_lattice: GeneralizationLattice = None
+        self.lattice_node = 0
+
+        if self.config.backend == DiscreteEnvBackendType.LAZY:
+            self._build_generalization_levels()
+        elif self.config.backend == DiscreteEnvBackendType.TABLE:
+            self._build_generalization_levels()
+            self._build_generalization_lattice()
+        elif self.config.backend != DiscreteEnvBackendType.DATASET:
+            raise ValueError("Invalid backend {0}".format(self.config.backend))
+
         self.create_bins()
 
+    def __getstate__(self) -> dict:
+        """Returns the state to pickle. The columns the current episode
+        distorted are as large as the data set and reset drops them so
+        they are not pickled. An unpickled environment should be reset
+        before it is stepped
+
+        Returns
+        -------
+
+        A dictionary
+        """
+        state = dict(self.__dict__)
+        state["distorted_data_set"] = CopyOnWriteDSWrapper(data_set=self.config.data_set)
+        state["current_time_step"] = None
+        return state
+
     @property
     def columns_attribute_types(self) -> dict:
         return self.config.data_set.columns_attribute_types
@@ -145,6 +214,10 @@ class DiscreteStateEnvironment(object):
     def env_type(self) -> DiscreteEnvType:
         return self.config.env_type
 
+    @property
+    def backend(self) -> DiscreteEnvBackendType:
+        return self.config.backend
+
     def close(self, **kwargs) -> None:
         pass
 
@@ -213,10 +286,34 @@ class DiscreteStateEnvironment(object):
         None
         """
 
+        self.materialize_distorted_data_set()
         self.distorted_data_set.save_to_csv(
             filename=Path(str(self.config.distorted_set_path) + "_" + str(episode_index)),
             save_index=save_index)
 
+    def materialize_distorted_data_set(self) -> CopyOnWriteDSWrapper:
+        """Bring the distorted data set up to date with the
+        state of the environment. This is only needed when the
+        LAZY or TABLE backends are used as the DATASET backend keeps
+        the distorted data set up to date at every step
+
+        Returns
+        -------
+
+        The distorted data set
+        """
+
+        if self.config.backend != DiscreteEnvBackendType.DATASET:
+
+            self.distorted_data_set.reset()
+            for name in self.column_levels:
+                level = self.column_levels[name]
+                if level > 0:
+                    self.distorted_data_set.set_column_values(column_name=name,
+                                                              values=self.generalization_levels[name].values(level=level))
+
+        return self.distorted_data_set
+
     def create_bins(self) -> None:
         """Create the bins for the state space
 
@@ -357,17 +454,7 @@ class DiscreteStateEnvironment(object):
         if self.config.use_identifying_column_dist_in_total_dist:
             for name in col_names:
                 if self.config.column_types[name] == ColumnType.IDENTIFYING_ATTRIBUTE:
-
-                    current_column = self.distorted_data_set.get_column(col_name=name)
-                    start_column = self.config.data_set.get_column(col_name=name)
-                    datatype = 'float'
-                    if self.distorted_data_set.columns[name] == str:
-
-                        current_column = "".join(current_column.values)
-                        start_column = "".join(start_column.values)
-                        datatype = 'str'
-                    distance = self.config.distortion_calculator.calculate(current_column,
-                                                                               start_column, datatype)
+                    distance = self._column_distortion(column_name=name)
                     self.column_distances[name] = self.config.use_identifying_column_dist_factor * distance
                 else:
                     self.column_distances[name] = 0.0
@@ -397,25 +484,24 @@ class DiscreteStateEnvironment(object):
             # the distortion for the column has not changed
             return
 
-        # apply the transform of the data set
-        self.distorted_data_set.apply_column_transform(column_name=action.column_name,
-                                                       transform=action)
+        if self.config.backend == DiscreteEnvBackendType.DATASET:
+            # apply the transform of the data set
+            self.distorted_data_set.apply_column_transform(column_name=action.column_name,
+                                                           transform=action)
+        else:
+            # move the column one level up. The data set
+            # is not touched
+            self.column_levels[action.column_name] += 1
 
-        # what is the previous and current values for the column
-        current_column = self.distorted_data_set.get_column(col_name=action.column_name)
-        start_column = self.config.data_set.get_column(col_name=action.column_name)
+            if self.config.backend == DiscreteEnvBackendType.TABLE:
 
-        datatype = 'float'
-        # calculate column distortion
-        if self.distorted_data_set.columns[action.column_name] == str:
-            current_column = "".join(current_column.values)
-            start_column = "".join(start_column.values)
-            datatype = 'str'
+                if action.idx is None:
+                    raise ValueError("The TABLE backend only accepts actions of the action space")
 
-        distance = self.config.distortion_calculator.calculate(current_column,
-                                                               start_column, datatype)
+                self.lattice_node = self.generalization_lattice.step(node=self.lattice_node, action=action.idx)
+        self._update_column_history(action=action)
 
-        self.column_distances[action.column_name] = distance
+        self.column_distances[action.column_name] = self._column_distortion(column_name=action.column_name)
 
     def total_current_distortion(self) -> float:
         """The total distortion in the dataset
@@ -440,8 +526,12 @@ class DiscreteStateEnvironment(object):
         An instance of `TimeStep`
         """
 
-        # reset the copy of the dataset we hold
-        self.distorted_data_set = copy.deepcopy(self.config.data_set)
+        # reset the copy of the dataset we hold. This
+        # only drops the columns the previous episode wrote to
+        self.distorted_data_set.reset()
+        self.column_history = {}
+        self.column_levels = {name: 0 for name in self.generalization_levels}
+        self.lattice_node = 0
         self._distort_identifying_attributes()
         self.n_rounds_below_min_distortion = 0
 
@@ -473,6 +563,9 @@ class DiscreteStateEnvironment(object):
         An instance of the TimeStep class
         """
 
+        if self.current_time_step is None:
+            raise ValueError("The environment has not been reset. Did you call reset()?")
+
         # apply the action and update distoration
         # and column count
 
@@ -595,80 +688,166 @@ class DiscreteStateEnvironment(object):
             #else:
             #    self.column_bins["all_the_rest"] = np.linspace(0.0, 1.0, self.config.n_states)
 
-        if len(self.column_bins) == 3:
-            self._build_three_columns()
-        elif len(self.column_bins) == 4:
-            self._build_4_columns()
-        elif len(self.column_bins) == 5:
-            self._build_5_columns()
-        else:
-            raise ValueError("Invalid number of columns. Cannot build the multi-column state bins")
+        if len(self.column_bins) == 0:
+            raise ValueError("No QUASI_IDENTIFYING_ATTRIBUTE has been specified")
+
+        # the bin index of a distortion is in [0, n_states]
+        self.state_space = MultiColumnStateSpace(n_columns=len(self.column_bins), n_bins=self.config.n_states + 1)
 
         # add the remaining columns
         for name in self.column_names:
             if self.config.column_types[name] != ColumnType.QUASI_IDENTIFYING_ATTRIBUTE:
                 self.column_bins[name] = np.linspace(0.0, 1.0, self.config.n_states)
 
-    def _build_three_columns(self):
+    def _distort_identifying_attributes(self):
 
-        name = ""
-        for n in self.config.column_types:
-            if self.config.column_types[n] == ColumnType.QUASI_IDENTIFYING_ATTRIBUTE:
-                name = n
-                break
+        for name in self.config.column_types:
 
-        if name == "":
-            raise ValueError("No QUASI_IDENTIFYING_ATTRIBUTE has been specified")
+            if self.config.column_types[name] == ColumnType.IDENTIFYING_ATTRIBUTE:
+                # we need to alter the column
+                if self.config.backend == DiscreteEnvBackendType.DATASET:
+                    action = ActionTransform(column_name=name, transform_value='*')
+                    self.distorted_data_set.apply_column_transform(column_name=name,
+                                                                   transform=action)
+                else:
+                    action = self.generalization_levels[name].action
+                    self.column_levels[name] += 1
+                self._update_column_history(action=action)
 
-        for i in range(len(self.column_bins[name])):
-            for j in range(len(self.column_bins[name])):
-                for k in range(len(self.column_bins[name])):
-                    self.state_space.append((i, j, k))
+    def _build_generalization_levels(self) -> None:
+        """Build the chain of distortions for every column
+        that is distorted either on reset or by an action
 
-    def _build_4_columns(self):
+        Returns
+        -------
 
-        name = ""
-        for n in self.config.column_types:
-            if self.config.column_types[n] == ColumnType.QUASI_IDENTIFYING_ATTRIBUTE:
-                name = n
-                break
+        None
+        """
 
-        if name == "":
-            raise ValueError("No QUASI_IDENTIFYING_ATTRIBUTE has been specified")
+        actions = [ActionTransform(column_name=name, transform_value='*')
+                   for name in self.config.column_types
+                   if self.config.column_types[name] == ColumnType.IDENTIFYING_ATTRIBUTE]
 
-        for i1 in range(len(self.column_bins[name])):
-            for i2 in range(len(self.column_bins[name])):
-                for i3 in range(len(self.column_bins[name])):
-                    for i4 in range(len(self.column_bins[name])):
-                        self.state_space.append((i1, i2, i3, i4))
+        actions.extend([action for action in self.config.action_space.actions
+                        if action.action_type != ActionType.IDENTITY])
 
-    def _build_5_columns(self):
+        for action in actions:
 
-        name = ""
-        for n in self.config.column_types:
-            if self.config.column_types[n] == ColumnType.QUASI_IDENTIFYING_ATTRIBUTE:
-                name = n
-                break
+            if action.column_name in self.generalization_levels:
+                raise ValueError("The {0} backend supports one distorting action per column "
+                                 "but column {1} has more than one".format(self.config.backend.name,
+                                                                           action.column_name))
 
-        if name == "":
-            raise ValueError("No QUASI_IDENTIFYING_ATTRIBUTE has been specified")
+            self.generalization_levels[action.column_name] = \
+                ColumnGeneralizationLevels(column=self.config.data_set.get_column(col_name=action.column_name),
+                                           action=action,
+                                           distortion_func=self._column_distortion_func(column_name=action.column_name))
 
-        name = self.column_names[0]
-        for i1 in range(len(self.column_bins[name])):
-            for i2 in range(len(self.column_bins[name])):
-                for i3 in range(len(self.column_bins[name])):
-                    for i4 in range(len(self.column_bins[name])):
-                        for i5 in range(len(self.column_bins[name])):
-                            self.state_space.append((i1, i2, i3, i4, i5))
+    def _build_generalization_lattice(self) -> None:
+        """Build the lattice of the columns the action space
+        distorts or use the lattice of the configuration
 
-    def _distort_identifying_attributes(self):
+        Returns
+        -------
 
-        for name in self.config.column_types:
+        None
+        """
 
-            if self.config.column_types[name] == ColumnType.IDENTIFYING_ATTRIBUTE:
-                # we need to alter the column
-                action = ActionTransform(column_name=name, transform_value='*')
-                self.distorted_data_set.apply_column_transform(column_name=name,
-                                                               transform=action)
+        column_levels = [levels for levels in self.generalization_levels.values()
+                         if levels.action.idx is not None]
+
+        if self.config.generalization_lattice is None:
+            self.generalization_lattice = GeneralizationLattice.from_column_levels(column_levels=column_levels,
+                                                                                   action_space=self.config.action_space)
+            return
+
+        column_names = [levels.column_name for levels in column_levels]
+        if sorted(self.config.generalization_lattice.column_names) != sorted(column_names) or \
+                self.config.generalization_lattice.n_actions != self.n_actions:
+            raise ValueError("The generalization lattice does not match the action space")
+
+        self.generalization_lattice = self.config.generalization_lattice
+
+    def _column_distortion_func(self, column_name: str) -> ColumnDistortion:
+        """Returns a callable that computes the distortion of
+        the given column with respect to the original data set
+
+        Parameters
+        ----------
+        column_name: The name of the column
+
+        Returns
+        -------
+
+        An instance of ColumnDistortion
+        """
+
+        if column_name not in self.column_distortion_funcs:
+            datatype = 'str' if self.config.data_set.columns[column_name] == str else 'float'
+            self.column_distortion_funcs[column_name] = \
+                ColumnDistortion(start_column=self.config.data_set.get_column(col_name=column_name),
+                                 distortion_calculator=self.config.distortion_calculator,
+                                 datatype=datatype)
+
+        return self.column_distortion_funcs[column_name]
+
+    def _update_column_history(self, action: ActionBase) -> None:
+        """Record that the given action has been applied
+        on its column
+
+        Parameters
+        ----------
+        action: The action applied
+
+        Returns
+        -------
+
+        None
+        """
+
+        # actions that are not part of the action
+        # space have no index
+        action_key = action.idx if action.idx is not None else action.key
+        history = self.column_history.get(action.column_name, ())
+        self.column_history[action.column_name] = history + (action_key,)
+
+    def _column_distortion(self, column_name: str) -> float:
+        """Returns the distortion of the given column of the distorted
+        data set with respect to the original data set. If a distortion
+        cache is used, the distortion is only computed the first time
+        the column is at a given state
+
+        Parameters
+        ----------
+        column_name: The name of the column
+
+        Returns
+        -------
+
+        The column distortion
+        """
+
+        if self.config.backend == DiscreteEnvBackendType.TABLE and \
+                column_name in self.generalization_lattice.column_indices:
+            return self.generalization_lattice.column_distortion(node=self.lattice_node, column_name=column_name)
+
+        if self.config.backend != DiscreteEnvBackendType.DATASET:
+            if column_name not in self.generalization_levels:
+                # the column is never distorted
+                return 0.0
+            return self.generalization_levels[column_name].distortion(level=self.column_levels[column_name])
+
+        if self.distortion_cache is not None:
+            key = (column_name, self.column_history.get(column_name, ()))
+            distance = self.distortion_cache.get(key)
+
+            if distance is not None:
+                return distance
+
+        distortion_func = self._column_distortion_func(column_name=column_name)
+        distance = distortion_func(self.distorted_data_set.get_column(col_name=column_name))
 
+        if self.distortion_cache is not None:
+            self.distortion_cache.put(key, distance)
 
+        return distance
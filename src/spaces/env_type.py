@@ -14,3 +14,20 @@ class DiscreteEnvType(enum.IntEnum):
     INVALID_STATE = -1
     TOTAL_DISTORTION_STATE = 0
     MULTI_COLUMN_STATE = 1
+
+
+class DiscreteEnvBackendType(enum.IntEnum):
+    """Enumeration to distinguish between the ways
+    a discrete environment computes the distortion of
+    the data set. DATASET applies every action on a copy
+    of the data set. LAZY only tracks how many times every
+    column has been generalized and materializes the distorted
+    data set on demand. TABLE is as LAZY but looks up the
+    distortions in a precomputed GeneralizationLattice
+
+    """
+
+    INVALID_BACKEND = -1
+    DATASET = 0
+    LAZY = 1
+    TABLE = 2
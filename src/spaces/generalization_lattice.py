@@ -0,0 +1,286 @@
+"""Module generalization_lattice. Specifies the table of
+all the generalization states a data set can reach under
+a given action space
+
+"""
+
+import numpy as np
+from multiprocessing import Pool
+from pathlib import Path
+from typing import List, TypeVar
+
+from src.spaces.actions import ActionType
+from src.spaces.generalization_levels import ColumnGeneralizationLevels
+from src.maths.distortion_calculator import ColumnDistortion
+
+DataSet = TypeVar("DataSet")
+ActionSpace = TypeVar("ActionSpace")
+DistortionCalculator = TypeVar('DistortionCalculator')
+
+
+def _build_column_chain(column_levels: ColumnGeneralizationLevels, max_level: int) -> List[float]:
+    """Compute all the levels of the given column
+
+    Parameters
+    ----------
+    column_levels: The levels of the column
+    max_level: The maximum number of levels a column can have
+
+    Returns
+    -------
+
+    The distortion of every level of the column
+    """
+
+    column_levels.effective_level(level=max_level + 1)
+
+    if column_levels.fixed_level is None:
+        raise ValueError("Column {0} still changes after {1} generalizations".format(column_levels.column_name,
+                                                                                    max_level))
+
+    return column_levels.distortions
+
+
+class GeneralizationLattice(object):
+    """The GeneralizationLattice class. Every column
+    that an action distorts moves along a finite chain of levels.
+    A node of the lattice is a combination of levels, one per column,
+    and the lattice holds the distortion of every column and the
+    successor under every action for all nodes. Node 0 is the
+    undistorted data set
+
+    """
+
+    @classmethod
+    def build(cls, *, data_set: DataSet, action_space: ActionSpace,
+              distortion_calculator: DistortionCalculator, max_level: int = 100,
+              n_processes: int = 1):
+        """Build the lattice of the given data set and action space
+
+        Parameters
+        ----------
+        data_set: The original data set
+        action_space: The action space. Every column should have at most one distorting action
+        distortion_calculator: The calculator of the column distortions
+        max_level: The maximum number of levels a column can have
+        n_processes: The number of processes to use. Columns are computed in parallel
+
+        Returns
+        -------
+
+        An instance of GeneralizationLattice
+        """
+
+        column_levels = []
+        column_names = []
+        for action in action_space.actions:
+
+            if action.action_type == ActionType.IDENTITY:
+                continue
+
+            if action.column_name in column_names:
+                raise ValueError("A lattice supports one distorting action per column "
+                                 "but column {0} has more than one".format(action.column_name))
+
+            datatype = 'str' if data_set.columns[action.column_name] == str else 'float'
+            column = data_set.get_column(col_name=action.column_name)
+            distortion_func = ColumnDistortion(start_column=column, distortion_calculator=distortion_calculator,
+                                               datatype=datatype)
+
+            column_names.append(action.column_name)
+            column_levels.append(ColumnGeneralizationLevels(column=column, action=action,
+                                                            distortion_func=distortion_func))
+
+        return cls.from_column_levels(column_levels=column_levels, action_space=action_space,
+                                      max_level=max_level, n_processes=n_processes)
+
+    @classmethod
+    def from_column_levels(cls, *, column_levels: List[ColumnGeneralizationLevels],
+                           action_space: ActionSpace, max_level: int = 100, n_processes: int = 1):
+        """Build the lattice from the given column levels
+
+        Parameters
+        ----------
+        column_levels: The levels of every column an action distorts
+        action_space: The action space
+        max_level: The maximum number of levels a column can have
+        n_processes: The number of processes to use. Columns are computed in parallel
+
+        Returns
+        -------
+
+        An instance of GeneralizationLattice
+        """
+
+        if n_processes > 1:
+            with Pool(processes=n_processes) as pool:
+                chains = pool.starmap(_build_column_chain, [(levels, max_level) for levels in column_levels])
+        else:
+            chains = [_build_column_chain(column_levels=levels, max_level=max_level) for levels in column_levels]
+
+        column_names = [levels.column_name for levels in column_levels]
+
+        action_columns = []
+        for action in action_space.actions:
+            if action.action_type == ActionType.IDENTITY or action.column_name not in column_names:
+                action_columns.append(-1)
+            else:
+                action_columns.append(column_names.index(action.column_name))
+
+        return cls(column_names=column_names, chains=chains, action_columns=action_columns)
+
+    @classmethod
+    def load(cls, filename: Path):
+        """Load a lattice saved with save
+
+        Parameters
+        ----------
+        filename: The file to load from
+
+        Returns
+        -------
+
+        An instance of GeneralizationLattice
+        """
+
+        with np.load(filename, allow_pickle=False) as data:
+            offsets = np.cumsum(data["chain_lengths"])[:-1]
+            chains = np.split(data["chain_distortions"], offsets) if len(data["chain_lengths"]) != 0 else []
+            return cls(column_names=list(data["column_names"]), chains=chains,
+                       action_columns=data["action_columns"])
+
+    def __init__(self, column_names: List[str], chains: List, action_columns: List[int]) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        column_names: The names of the columns the actions distort
+        chains: The distortion of every level of every column
+        action_columns: The index of the column every action distorts or -1
+        if the action does not distort any column
+
+        """
+
+        if len(column_names) != len(chains):
+            raise ValueError("Invalid number of chains {0}. Expected {1}".format(len(chains), len(column_names)))
+
+        self.column_names = list(column_names)
+        self.chains = [np.asarray(chain, dtype=np.float64) for chain in chains]
+        self.action_columns = np.asarray(action_columns, dtype=np.int64)
+        self.column_indices = {name: i for i, name in enumerate(self.column_names)}
+
+        self.shape = tuple(len(chain) for chain in self.chains)
+        n_nodes = int(np.prod(self.shape, dtype=np.int64))
+        nodes = np.arange(n_nodes)
+
+        # the level of every column at every node
+        self.levels = np.zeros((n_nodes, len(self.shape)), dtype=np.int64)
+        if len(self.shape) != 0:
+            self.levels = np.stack(np.unravel_index(nodes, self.shape), axis=1)
+
+        # the distortion of every column at every node
+        self.column_distortions = np.zeros((n_nodes, len(self.shape)), dtype=np.float64)
+        for c, chain in enumerate(self.chains):
+            self.column_distortions[:, c] = chain[self.levels[:, c]]
+
+        # moving a column one level up moves the
+        # node index by the stride of the column
+        strides = [int(np.prod(self.shape[c + 1:], dtype=np.int64)) for c in range(len(self.shape))]
+
+        self.successors = np.repeat(nodes.reshape(n_nodes, 1), len(self.action_columns), axis=1)
+        for a, c in enumerate(self.action_columns):
+
+            if c < 0:
+                continue
+
+            can_move = self.levels[:, c] < self.shape[c] - 1
+            self.successors[can_move, a] += strides[c]
+
+    @property
+    def n_nodes(self) -> int:
+        return self.successors.shape[0]
+
+    @property
+    def n_columns(self) -> int:
+        return len(self.column_names)
+
+    @property
+    def n_actions(self) -> int:
+        return len(self.action_columns)
+
+    def node(self, levels: tuple) -> int:
+        """Returns the node with the given levels. Levels beyond
+        the last level of a column are mapped to the last level
+
+        Parameters
+        ----------
+        levels: The level of every column in the order of column_names
+
+        Returns
+        -------
+
+        The node index
+        """
+
+        if len(levels) != self.n_columns:
+            raise ValueError("Invalid number of levels {0}. Expected {1}".format(len(levels), self.n_columns))
+
+        if self.n_columns == 0:
+            return 0
+
+        levels = np.minimum(np.asarray(levels, dtype=np.int64), np.asarray(self.shape) - 1)
+        return int(np.ravel_multi_index(tuple(levels), self.shape))
+
+    def step(self, node: int, action: int) -> int:
+        """Returns the node reached from the given
+        node with the given action
+
+        Parameters
+        ----------
+        node: The node index
+        action: The action index
+
+        Returns
+        -------
+
+        The node index
+        """
+        return self.successors[node, action]
+
+    def column_distortion(self, node: int, column_name: str) -> float:
+        """Returns the distortion of the given column at the given node
+
+        Parameters
+        ----------
+        node: The node index
+        column_name: The name of the column
+
+        Returns
+        -------
+
+        The column distortion
+        """
+        return self.column_distortions[node, self.column_indices[column_name]]
+
+    def save(self, filename: Path) -> None:
+        """Save the lattice to the given file. Only the
+        level distortions are saved. The tables are rebuilt
+        when the lattice is loaded
+
+        Parameters
+        ----------
+        filename: The file to save to. numpy appends the .npz
+        extension if it is missing
+
+        Returns
+        -------
+
+        None
+        """
+
+        chain_distortions = np.concatenate(self.chains) if self.n_columns != 0 else np.zeros(0)
+
+        np.savez(filename, column_names=np.array(self.column_names, dtype=str),
+                 chain_lengths=np.array(self.shape, dtype=np.int64),
+                 chain_distortions=chain_distortions,
+                 action_columns=self.action_columns)
@@ -0,0 +1,148 @@
+"""Module generalization_levels. Specifies the chain
+of distortions a column goes through when the same action
+is applied on it repeatedly
+
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Callable, List, Any
+
+from src.spaces.actions import ActionBase
+
+
+class ColumnGeneralizationLevels(object):
+    """The ColumnGeneralizationLevels class. Level k of the chain
+    is the column after the action has been applied k times on the
+    original column. Levels and their distortions are computed the
+    first time they are requested. The chain stops growing once
+    applying the action leaves the column unchanged
+
+    """
+
+    def __init__(self, column: pd.Series, action: ActionBase,
+                 distortion_func: Callable[[pd.Series], float]) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        column: The original column
+        action: The action that moves the column one level up
+        distortion_func: Callable that returns the distortion of a column
+        with respect to the original column
+
+        """
+        self.column = column
+        self.action = action
+        self.distortion_func = distortion_func
+
+        # the distortion of every level computed so far.
+        # The original column is not distorted
+        self.distortions: List[float] = [0.0]
+
+        # the values of the highest level computed so far
+        self.working_values: Any = None
+
+        # the level after which the column
+        # no longer changes
+        self.fixed_level: int = None
+
+    @property
+    def column_name(self) -> str:
+        return self.action.column_name
+
+    @property
+    def n_levels(self) -> int:
+        """Returns the number of levels computed so far
+
+        Returns
+        -------
+
+        An integer
+        """
+        return len(self.distortions)
+
+    def effective_level(self, level: int) -> int:
+        """Returns the smallest level at which the column is
+        identical to the column at the given level. This may
+        extend the chain
+
+        Parameters
+        ----------
+        level: The level to query
+
+        Returns
+        -------
+
+        An integer
+        """
+
+        if level < 0:
+            raise ValueError("Invalid level {0}. Level should be non-negative".format(level))
+
+        while level >= self.n_levels and self.fixed_level is None:
+            self._extend()
+
+        if self.fixed_level is not None and level > self.fixed_level:
+            return self.fixed_level
+
+        return level
+
+    def distortion(self, level: int) -> float:
+        """Returns the distortion of the column at the given level
+
+        Parameters
+        ----------
+        level: The level to query
+
+        Returns
+        -------
+
+        A float representing the column distortion
+        """
+        return self.distortions[self.effective_level(level=level)]
+
+    def values(self, level: int) -> Any:
+        """Returns the values of the column at the given level.
+        The values are recomputed from the original column
+
+        Parameters
+        ----------
+        level: The level to query
+
+        Returns
+        -------
+
+        The column values
+        """
+
+        level = self.effective_level(level=level)
+
+        values = self.column.values.copy()
+        for _ in range(level):
+            values = self.action.act(**{"data": values})
+
+        return values
+
+    def _extend(self) -> None:
+        """Compute the next level of the chain
+
+        Returns
+        -------
+
+        None
+        """
+
+        previous = self.working_values if self.working_values is not None else self.column.values
+
+        # actions work in place so never hand
+        # them the values of the previous level
+        values = self.action.act(**{"data": previous.copy()})
+
+        if np.array_equal(np.asarray(previous), np.asarray(values)):
+            self.fixed_level = self.n_levels - 1
+            return
+
+        self.working_values = values
+        self.distortions.append(self.distortion_func(pd.Series(values, index=self.column.index,
+                                                               name=self.column.name, copy=False)))
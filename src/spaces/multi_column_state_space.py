@@ -0,0 +1,131 @@
+"""Module multi_column_state_space. Specifies the
+state space of an environment where the state is the
+tuple of the bin indices of every column distortion
+
+"""
+
+import itertools
+from typing import Iterator
+
+
+class MultiColumnStateSpace(object):
+    """The MultiColumnStateSpace class. The states are all the
+    tuples of n_columns bin indices in [0, n_bins). States are never
+    stored. Instead every state is encoded as the integer whose
+    digits in base n_bins are the bin indices, with the first column
+    as the most significant digit
+
+    """
+
+    def __init__(self, n_columns: int, n_bins: int) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        n_columns: The number of columns in a state
+        n_bins: The number of bins every column can be in
+
+        """
+
+        if n_columns < 1:
+            raise ValueError("Invalid number of columns {0}. Should be at least 1".format(n_columns))
+
+        if n_bins < 1:
+            raise ValueError("Invalid number of bins {0}. Should be at least 1".format(n_bins))
+
+        self.n_columns = n_columns
+        self.n_bins = n_bins
+
+    def __len__(self) -> int:
+        """Returns the number of states
+
+        Returns
+        -------
+
+        An integer
+        """
+        return self.n_bins ** self.n_columns
+
+    def __iter__(self) -> Iterator[tuple]:
+        """Iterate over the states in index order. The
+        states are generated as the iteration proceeds
+
+        Returns
+        -------
+
+        An iterator over tuples
+        """
+        return itertools.product(range(self.n_bins), repeat=self.n_columns)
+
+    def __contains__(self, state: tuple) -> bool:
+        """Returns true if the given state is in the state space
+
+        Parameters
+        ----------
+        state: The state to query
+
+        Returns
+        -------
+
+        A boolean
+        """
+        return len(state) == self.n_columns and all(0 <= item < self.n_bins for item in state)
+
+    def __getitem__(self, idx: int) -> tuple:
+        """Returns the state with the given index
+
+        Parameters
+        ----------
+        idx: The index of the state
+
+        Returns
+        -------
+
+        A tuple of bin indices
+        """
+        return self.state(idx=idx)
+
+    def index(self, state: tuple) -> int:
+        """Returns the index of the given state
+
+        Parameters
+        ----------
+        state: The state
+
+        Returns
+        -------
+
+        An integer
+        """
+
+        if state not in self:
+            raise ValueError("State {0} is not in the state space".format(state))
+
+        idx = 0
+        for item in state:
+            idx = idx * self.n_bins + item
+
+        return idx
+
+    def state(self, idx: int) -> tuple:
+        """Returns the state with the given index
+
+        Parameters
+        ----------
+        idx: The index of the state
+
+        Returns
+        -------
+
+        A tuple of bin indices
+        """
+
+        if idx < 0 or idx >= len(self):
+            raise IndexError("Index {0} not in [0, {1})".format(idx, len(self)))
+
+        state = []
+        for _ in range(self.n_columns):
+            idx, item = divmod(idx, self.n_bins)
+            state.append(item)
+
+        return tuple(reversed(state))
@@ -8,22 +8,180 @@ by Manning publications
 """
 
 import numpy as np
+import torch
 from typing import TypeVar, Callable, Any
 import torch.multiprocessing as mp
 
 from src.spaces import TimeStep, VectorTimeStep
+from src.spaces.time_step import BatchedTimeStep
 from src.parallel import TorchProcsHandler
 
 Agent = TypeVar('Agent')
 ActionVector = TypeVar('ActionVector')
 
 
+class SharedStepBuffers(object):
+    """The SharedStepBuffers class. Preallocated tensors in shared
+    memory that the workers of a MultiprocessEnv write their time steps
+    in and the manager writes the actions in. Every time step array has
+    two buffers that are used in turns so that a time step stays valid
+    until the second step or reset after it
+
+    """
+
+    N_BUFFERS = 2
+
+    def __init__(self, n_workers: int, observation_size: int) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        n_workers: The number of workers
+        observation_size: The number of values of the observation of a worker
+
+        """
+
+        if observation_size < 1:
+            raise ValueError("Invalid observation size {0}. Should be at least 1".format(observation_size))
+
+        self.n_workers = n_workers
+        self.observation_size = observation_size
+
+        self.actions = torch.zeros(n_workers, dtype=torch.int64).share_memory_()
+        self.observations = torch.zeros((SharedStepBuffers.N_BUFFERS, n_workers, observation_size),
+                                        dtype=torch.float64).share_memory_()
+        self.final_observations = torch.zeros((SharedStepBuffers.N_BUFFERS, n_workers, observation_size),
+                                              dtype=torch.float64).share_memory_()
+        self.rewards = torch.zeros((SharedStepBuffers.N_BUFFERS, n_workers), dtype=torch.float64).share_memory_()
+        self.step_types = torch.zeros((SharedStepBuffers.N_BUFFERS, n_workers), dtype=torch.int64).share_memory_()
+        self.total_distortions = torch.zeros((SharedStepBuffers.N_BUFFERS, n_workers),
+                                             dtype=torch.float64).share_memory_()
+        self.discounts = torch.zeros((SharedStepBuffers.N_BUFFERS, n_workers), dtype=torch.float64).share_memory_()
+
+        # numpy views of the tensors. Writing through
+        # them is cheaper than indexing the tensors
+        self._arrays: dict = None
+
+    def __getstate__(self) -> dict:
+        # the views are recreated in the process
+        # that unpickles the tensors
+        state = dict(self.__dict__)
+        state["_arrays"] = None
+        return state
+
+    @property
+    def arrays(self) -> dict:
+        """Returns the numpy views of the shared tensors
+
+        Returns
+        -------
+
+        A dictionary from the name of a tensor to its view
+        """
+
+        if self._arrays is None:
+            self._arrays = {"actions": self.actions.numpy(),
+                            "observations": self.observations.numpy(),
+                            "final_observations": self.final_observations.numpy(),
+                            "rewards": self.rewards.numpy(),
+                            "step_types": self.step_types.numpy(),
+                            "total_distortions": self.total_distortions.numpy(),
+                            "discounts": self.discounts.numpy()}
+        return self._arrays
+
+    def write(self, buffer_idx: int, rank: int, time_step: TimeStep, reset_time_step: TimeStep = None) -> None:
+        """Write the time step of the worker with the given rank
+
+        Parameters
+        ----------
+        buffer_idx: The buffer to write in
+        rank: The rank of the worker
+        time_step: The time step of the worker
+        reset_time_step: The time step the worker was reset to after finishing its
+        episode. If given its observation is written in place of the observation
+        of the time step and the latter is kept in the final observations
+
+        Returns
+        -------
+
+        None
+        """
+
+        arrays = self.arrays
+        arrays["final_observations"][buffer_idx, rank] = SharedStepBuffers._to_list(time_step.observation)
+        if reset_time_step is None:
+            arrays["observations"][buffer_idx, rank] = arrays["final_observations"][buffer_idx, rank]
+        else:
+            arrays["observations"][buffer_idx, rank] = SharedStepBuffers._to_list(reset_time_step.observation)
+
+        arrays["rewards"][buffer_idx, rank] = 0.0 if time_step.reward is None else time_step.reward
+        arrays["step_types"][buffer_idx, rank] = time_step.step_type
+        arrays["total_distortions"][buffer_idx, rank] = time_step.info.get("total_distortion", 0.0)
+        arrays["discounts"][buffer_idx, rank] = 0.0 if time_step.discount is None else time_step.discount
+
+    def copy_buffer(self, source_idx: int, target_idx: int) -> None:
+        """Copy the time steps of all the workers from
+        one buffer to the other
+
+        Parameters
+        ----------
+        source_idx: The buffer to copy
+        target_idx: The buffer to copy in
+
+        Returns
+        -------
+
+        None
+        """
+
+        for name, array in self.arrays.items():
+            if name != "actions":
+                array[target_idx] = array[source_idx]
+
+    def time_step(self, buffer_idx: int) -> BatchedTimeStep:
+        """Returns the time step of all the workers in the given buffer.
+        The arrays of the time step are views of the shared memory
+
+        Parameters
+        ----------
+        buffer_idx: The buffer to read
+
+        Returns
+        -------
+
+        An instance of BatchedTimeStep
+        """
+
+        # the workers share the discount
+        arrays = self.arrays
+        return BatchedTimeStep(step_types=arrays["step_types"][buffer_idx],
+                               rewards=arrays["rewards"][buffer_idx],
+                               observations=arrays["observations"][buffer_idx],
+                               final_observations=arrays["final_observations"][buffer_idx],
+                               total_distortions=arrays["total_distortions"][buffer_idx],
+                               discount=float(arrays["discounts"][buffer_idx, 0]),
+                               observation_type=list)
+
+    @staticmethod
+    def _to_list(observation: Any) -> Any:
+        if hasattr(observation, "to_list"):
+            return observation.to_list()
+        return observation
+
+
 class MultiprocessEnv(object):
-    """MultiprocessEnv class
+    """MultiprocessEnv class. When the size of the observation
+    of a worker is given the workers write their time steps in
+    SharedStepBuffers and the manager reads the actions from them.
+    Only a short command goes through the pipe of a worker and reset
+    and step return a BatchedTimeStep that views the shared memory.
+    A worker that finishes its episode is reset on the same step. Its
+    observation in the BatchedTimeStep is the reset observation and the
+    observation it finished with is in the final observations
 
     """
 
-    def __init__(self, env_builder: Callable, env_args: dict, n_workers: int):
+    def __init__(self, env_builder: Callable, env_args: dict, n_workers: int, observation_size: int = None):
         self.env_builder = env_builder
         self.env_args = env_args
         self.n_workers = n_workers
@@ -31,6 +189,12 @@ class MultiprocessEnv(object):
         self.pipes = [mp.Pipe() for _ in range(self.n_workers)]
         self.is_made: bool = False
 
+        # the buffer the last time step was written in
+        self.shared_buffers: SharedStepBuffers = None
+        self.buffer_idx: int = 0
+        if observation_size is not None:
+            self.shared_buffers = SharedStepBuffers(n_workers=n_workers, observation_size=observation_size)
+
     def __len__(self) -> int:
         """The number of workers handled by this
         instance
@@ -54,11 +218,13 @@ class MultiprocessEnv(object):
             env_args["rank"] = w
             self.workers.create_process_and_start(target=self.work, args=(w, self.env_builder,
                                                                           env_args, agent,
-                                                                          self.pipes[w][1]))
+                                                                          self.pipes[w][1],
+                                                                          self.shared_buffers))
 
         self.is_made = True
 
-    def work(self, rank, env_builder: Callable, env_args: dict, agent: Agent, pipe_end) -> None:
+    def work(self, rank, env_builder: Callable, env_args: dict, agent: Agent, pipe_end,
+             shared_buffers: SharedStepBuffers = None) -> None:
         """The worker function
 
         Parameters
@@ -67,6 +233,7 @@ class MultiprocessEnv(object):
         env_builder: The callable that builds the worker environment
         env_args: The callable arguments
         worker_end
+        shared_buffers: The buffers to write the time steps in. If None the time steps are sent through the pipe
 
         Returns
         -------
@@ -86,6 +253,18 @@ class MultiprocessEnv(object):
             elif cmd == 'step':
                 time_step: TimeStep = env.step(**kwargs)
                 pipe_end.send(time_step)
+            elif cmd == 'shared_reset':
+                shared_buffers.write(buffer_idx=kwargs["buffer_idx"], rank=rank, time_step=env.reset())
+                pipe_end.send(True)
+            elif cmd == 'shared_step':
+                time_step: TimeStep = env.step(action=int(shared_buffers.arrays["actions"][rank]))
+
+                # if on this step the local environment
+                # finished then reset
+                reset_time_step = env.reset() if time_step.done else None
+                shared_buffers.write(buffer_idx=kwargs["buffer_idx"], rank=rank,
+                                     time_step=time_step, reset_time_step=reset_time_step)
+                pipe_end.send(True)
             elif cmd == '_past_limit':
                 pipe_end.send(env._elapsed_steps >= env._max_episode_steps)
             else:
@@ -100,6 +279,9 @@ class MultiprocessEnv(object):
         if not self.is_made:
             raise ValueError("Environment is not created. Did you call make()?")
 
+        if self.shared_buffers is not None:
+            return self._shared_reset(rank=rank)
+
         time_step = VectorTimeStep()
         if rank is not None:
             parent_end, _ = self.pipes[rank]
@@ -129,6 +311,9 @@ class MultiprocessEnv(object):
         if len(actions) != self.n_workers:
             raise ValueError("Number of actions is not equal to the number of workers")
 
+        if self.shared_buffers is not None:
+            return self._shared_step(actions=actions)
+
         # send the messages to the workers
         [self._send_msg(('step', {'action': actions[rank]}), rank) for rank in range(self.n_workers)]
 
@@ -156,6 +341,66 @@ class MultiprocessEnv(object):
         """
         return time_step
 
+    def _shared_reset(self, rank: int = None) -> BatchedTimeStep:
+        """Reset the workers when the time steps are in shared memory. A
+        single worker is reset in a copy of the last time step so that
+        the time step the caller holds is not overwritten
+
+        Parameters
+        ----------
+        rank: The rank of the worker to reset. If None all the workers are reset
+
+        Returns
+        -------
+
+        An instance of BatchedTimeStep
+        """
+
+        last_buffer_idx = self.buffer_idx
+        self.buffer_idx = (self.buffer_idx + 1) % SharedStepBuffers.N_BUFFERS
+
+        if rank is not None:
+            self.shared_buffers.copy_buffer(source_idx=last_buffer_idx, target_idx=self.buffer_idx)
+            self._send_msg(('shared_reset', {'buffer_idx': self.buffer_idx}), rank)
+            self.pipes[rank][0].recv()
+            return self.shared_buffers.time_step(buffer_idx=self.buffer_idx)
+
+        self._broadcast_msg(('shared_reset', {'buffer_idx': self.buffer_idx}))
+        self._wait_workers()
+        return self.shared_buffers.time_step(buffer_idx=self.buffer_idx)
+
+    def _shared_step(self, actions: ActionVector) -> BatchedTimeStep:
+        """Step the workers when the time steps are in shared memory
+
+        Parameters
+        ----------
+        actions: The action of every worker
+
+        Returns
+        -------
+
+        An instance of BatchedTimeStep
+        """
+
+        self.shared_buffers.arrays["actions"][:] = np.asarray(actions).reshape(-1)
+
+        self.buffer_idx = (self.buffer_idx + 1) % SharedStepBuffers.N_BUFFERS
+        self._broadcast_msg(('shared_step', {'buffer_idx': self.buffer_idx}))
+        self._wait_workers()
+        return self.shared_buffers.time_step(buffer_idx=self.buffer_idx)
+
+    def _wait_workers(self) -> None:
+        """Wait until every worker signals that
+        it has written its time step
+
+        Returns
+        -------
+
+        None
+        """
+        for parent_end, _ in self.pipes:
+            parent_end.recv()
+
     def close(self, **kwargs):
         self._close(**kwargs)
 
@@ -11,7 +11,7 @@ from dataclasses import dataclass
 import numpy
 import numpy as np
 
-from src.extern.tile_coding import IHT, tiles
+from src.extern.tile_coding import IHT, tiles, tile_coordinates
 from src.spaces.actions import ActionBase, ActionType
 from src.spaces.time_step import TimeStep
 from src.exceptions.exceptions import InvalidParamValue
@@ -38,77 +38,17 @@ class TiledEnvConfig(object):
     column_ranges: dict = None
     column_types: list = None
 
-
-class Tile(object):
-    """Helper class that models a tile
-
-    """
-    def __init__(self, global_id: int):
-        self.global_idx: int = global_id
-        self.columns_bins = {}
-
-    def build(self, bin_indices: dir, n_bins: int):
-
-        touched = False
-        # how many bins
-        for column in bin_indices:
-
-            if bin_indices[column] < n_bins:
-                self.columns_bins[column] = bin_indices[column]
-
-                # increase the index
-                bin_indices[column] += 1
-
-                # the rest of the columns remain the same
-                for column2 in bin_indices:
-
-                    if column2 != column:
-                        self.columns_bins[column2] = bin_indices[column2]
-
-                break
-            else:
-
-                if bin_indices[column] != n_bins:
-                    raise ValueError("Invalid number of bins={0} "
-                                     "should be equal to {1}".format(bin_indices[column], n_bins))
-
-                self.columns_bins[column] = bin_indices[column]
-
-    def search(self, bin_indices):
-        """
-        Returns true if the given bin indices are represented
-        by the tile
-
-        Parameters
-        ----------
-        bin_indices: The list of bin indices
-
-        Returns
-        -------
-        boolean
-
-
-        """
-
-        if len(self.columns_bins) == 0:
-            raise InvalidParamValue(param_name="column_bins", param_value="0. Column bins is empty")
-
-        if len(bin_indices) != len(self.columns_bins):
-            raise ValueError("len(bin_indices) = {0} != len( self.columns_bins) = {1}".format(len(bin_indices),
-                                                                                              len(self.columns_bins)))
-
-        col_indices = [(col, self.columns_bins[col]) for col in self.columns_bins]
-        #for col in self.columns_bins:
-        #    col_indices.append((col, self.columns_bins[col]))
-
-        if col_indices == bin_indices:
-            return True
-
-        return False
+    # if not None the tiles are hashed into
+    # a table with max_size indices
+    max_size: int = None
 
 
 class Layer(object):
-    """Helper class to represent a layer of tiling
+    """Helper class to represent a layer of tiling. The tiles
+    of the layer are not stored. Every action owns a block of
+    n_bins ** n_columns consecutive tile indices and within the
+    block the bin indices of the columns, in the order of column_bins,
+    are the digits of the local tile index in base n_bins
 
     """
 
@@ -124,14 +64,19 @@ class Layer(object):
         self.start_index = start_index
         self.end_index = end_index
         self.env = env
-        self.tiles = {}
+
+        # the stride of every column in the
+        # local tile index of an action
+        n_columns = len(self.column_bins)
+        self.column_strides = {name: n_bins ** (n_columns - c - 1) for c, name in enumerate(self.column_bins)}
 
     def __len__(self):
-        return len(self.tiles)
+        return self.n_actions * Layer.n_tiles_per_action(self.n_bins, len(self.column_bins))
 
     def build_tiles(self, next_tile_global_idx: int) -> int:
-        """Build the tiles for the layer. For each action creates
-        self.n_bins ** len(self.column_bins) tiles.
+        """Build the tiles for the layer. For each action the layer
+        has self.n_bins ** len(self.column_bins) tiles. The tiles are
+        computed on demand so this only assigns the global tile ids
 
         Parameters
         ----------
@@ -145,48 +90,58 @@ class Layer(object):
 
         """
 
-        # number of total tiles we have in th
-        # the layer
-        n_total_tiles = self.n_bins ** len(self.column_bins)
-        for action in range(self.n_actions):
-            bin_indices = {key: 0 for key in self.column_bins}
-            next_local_tile_idx = 0
-            next_local_tile_idx, next_tile_global_idx = self._do_build_tile(action=action,
-                                                                            next_local_tile_idx=next_local_tile_idx,
-                                                                            next_tile_global_idx=next_tile_global_idx)
+        self.start_index = next_tile_global_idx
+        self.end_index = next_tile_global_idx + len(self)
+        return self.end_index
 
-        return next_tile_global_idx
+    def get_bin_indices(self, raw_state: RawState) -> dict:
+        """Returns the bin index of every column of the layer
+        for the given raw state. Bin indices in np.digitize start
+        at one. A zero bin index means that the column distortion is
+        below the first bin of the layer
 
-    def _do_build_tile(self, action: int, next_local_tile_idx: int,
-                       next_tile_global_idx: int) -> tuple:
+        Parameters
+        ----------
+        raw_state: The raw state to digitize
 
-        if len(self.column_bins) != 3:
-            raise NotImplementedError("This function is not implemented for more than three columns")
+        Returns
+        -------
+
+        A dictionary with the bin index of every column
+        """
+        return {name: int(np.digitize(raw_state.column_distortions[name], self.column_bins[name]))
+                for name in self.column_bins}
+
+    def get_local_tile_index(self, bin_indices: dict) -> int:
+        """Returns the index of the tile with the given bin indices
+        within the tiles of an action
+
+        Parameters
+        ----------
+        bin_indices: The bin index of every column
 
-        if len(self.column_bins) == 3:
-            return self._do_build_three_columns(action=action, next_local_tile_idx=next_local_tile_idx,
-                                                next_tile_global_idx=next_tile_global_idx)
+        Returns
+        -------
 
-    def _do_build_three_columns(self, action: int, next_local_tile_idx: int,
-                                next_tile_global_idx: int) -> tuple:
+        The local tile index or INVALID_ID if a bin
+        index is not covered by the layer
+        """
 
-        key_list = list(self.column_bins.keys())
+        local_tile_idx = 0
+        for name in self.column_bins:
+            bin_idx = bin_indices[name]
 
-        # bin indices in np.digitize start at one
-        for bi in range(1, self.n_bins + 1):
-            for bj in range(1, self.n_bins + 1):
-                for bk in range(1, self.n_bins + 1):
-                    self.tiles[(action, next_local_tile_idx)] = Tile(global_id=next_tile_global_idx)
-                    self.tiles[(action, next_local_tile_idx)].columns_bins = {key_list[0]: bi, key_list[1]: bj, key_list[2]: bk}
-                    next_local_tile_idx += 1
-                    next_tile_global_idx += 1
+            if bin_idx < 1 or bin_idx > self.n_bins:
+                return INVALID_ID
 
-        return next_local_tile_idx, next_tile_global_idx
+            local_tile_idx += (bin_idx - 1) * self.column_strides[name]
+
+        return local_tile_idx
 
     def get_global_tile_index(self, raw_state: RawState, action: Action) -> int:
         """Returns the global tile index for the raw state and the given action
         If the bin indices corresponding to the raw state after digitization
-        cannot be found in any tile then it returns -1
+        are not covered by the layer then it returns -1
 
         Parameters
         ----------
@@ -199,26 +154,12 @@ class Layer(object):
         The global tile index
         """
 
-        # get the bin indices in the layer for the
-        # raw_state
-        bin_indices = [(name, np.digitize(raw_state.column_distortions[name],
-                                          self.column_bins[name]))
-                       for name in raw_state.column_distortions if self.env.is_quasi_identifying_column(name)]
-
-        global_tile_idx = INVALID_ID
-
-        for _, t in self.tiles:
-            tile = self.tiles[(action, t)]
+        local_tile_idx = self.get_local_tile_index(bin_indices=self.get_bin_indices(raw_state=raw_state))
 
-            # check if the bin indices
-            # that correspond to the raw state tiling
-            # are in the given tile. If yes return the
-            # tile global index
-            if tile.search(bin_indices):
-                global_tile_idx = tile.global_idx
-                break
+        if local_tile_idx == INVALID_ID:
+            return INVALID_ID
 
-        return global_tile_idx
+        return self.start_index + action * Layer.n_tiles_per_action(self.n_bins, len(self.column_bins)) + local_tile_idx
 
 
 class Tiles(object):
@@ -302,10 +243,11 @@ class TiledEnv(object):
 
     @classmethod
     def from_options(cls, *, env: Env,  n_layers: int,
-                    n_bins: int, column_ranges: dict):
+                    n_bins: int, column_ranges: dict, max_size: int = None):
         return cls(TiledEnvConfig(env=env,
                                   n_layers=n_layers,
-                                  n_bins=n_bins, column_ranges=column_ranges))
+                                  n_bins=n_bins, column_ranges=column_ranges,
+                                  max_size=max_size))
 
     def __init__(self, config: TiledEnvConfig) -> None:
 
@@ -320,8 +262,11 @@ class TiledEnv(object):
         self.column_scales = {}
         self.tiles: Tiles = None
 
-        # Initialize index hash table (IHT) for tile coding.
+        # Index hash table (IHT) for hashed tile coding.
         # This assigns a unique index to each tile up to max_size tiles.
+        # It is created by create_tiles when max_size is given
+        self.max_size = config.max_size
+        self.iht: IHT = None
         self._validate()
         self._create_column_scales()
 
@@ -345,6 +290,22 @@ class TiledEnv(object):
         """
         return self.n_layers * Layer.n_tiles_per_action(self.n_bins, len(self.column_ranges))
 
+    @property
+    def n_features(self) -> int:
+        """Returns the length of the state-action feature vector. This
+        is max_size when the tiles are hashed
+
+        Returns
+        -------
+
+        The number of features
+        """
+
+        if self.max_size is not None:
+            return self.max_size
+
+        return self.n_states * self.n_actions
+
     @property
     def config(self) -> Config:
         return self.env.config
@@ -382,7 +343,7 @@ class TiledEnv(object):
         # of the bin that the total distortion falls into
         state.bin_idx = raw_time_step.observation
         state.total_distortion = raw_time_step.info["total_distortion"]
-        state.column_distortions = self.env.column_distortions
+        state.column_distortions = dict(self.env.column_distortions)
 
         time_step = copy_time_step(time_step=raw_time_step, **{"observation": state})
 
@@ -408,7 +369,7 @@ class TiledEnv(object):
         An instance of TimeStep type
         """
 
-        if self.tiles is None or len(self.tiles) == 0:
+        if self.iht is None and (self.tiles is None or len(self.tiles) == 0):
             raise InvalidParamValue(param_name="tiles", param_value="{}. Have you called create_tiles?")
 
         # reset the raw environment
@@ -421,7 +382,7 @@ class TiledEnv(object):
         # of the bin that the total distortion falls into
         state.bin_idx = raw_time_step.observation
         state.total_distortion = raw_time_step.info["total_distortion"]
-        state.column_distortions = self.env.column_distortions
+        state.column_distortions = dict(self.env.column_distortions)
 
         time_step = copy_time_step(time_step=raw_time_step, **{"observation": state})
 
@@ -447,6 +408,9 @@ class TiledEnv(object):
         A 2d numpy array
         """
 
+        if self.max_size is not None:
+            raise ValueError("Hashed tiles cannot be arranged in a layer-action matrix")
+
         return state.reshape(self.n_layers, self.n_actions, Layer.n_tiles_per_action(n_bins=self.n_bins,
                                                                                      n_columns=len(self.column_ranges)))
 
@@ -484,7 +448,8 @@ class TiledEnv(object):
         self.env.save_current_dataset(episode_index, save_index)
 
     def create_tiles(self) -> None:
-        """Create the bins
+        """Create the bins. When max_size is given this
+        creates the index hash table of the hashed tiles instead
 
         Returns
         -------
@@ -493,6 +458,10 @@ class TiledEnv(object):
 
         """
 
+        if self.max_size is not None:
+            self.iht = IHT(size=self.max_size)
+            return
+
         # calculate the tile width for each column in the
         # data set
         self.tiles = Tiles(n_bins=self.n_bins, n_layers=self.n_layers,
@@ -580,28 +549,69 @@ class TiledEnv(object):
         return self.env.total_current_distortion()
 
     def featurize_state_action(self, state: RawState, action: ActionBase) -> TiledState:
-        """Get a list of Tiles for the given state and action
+        """Returns the indices of the active tiles for the given
+        state and action. Every layer activates at most one tile so
+        the feature vector of the state-action pair is the sparse vector
+        with ones at the returned indices
 
         Parameters
         ----------
         state: The environment state observed
-        action: The action
+        action: The action index
 
         Returns
         -------
 
-        A list of tiles
+        An integer array with at most n_layers tile indices
 
         """
 
-        tiled_state = np.zeros(self.n_layers * self.n_actions * self.n_bins ** (len(self.column_ranges)))
+        if self.iht is not None:
 
+            # every layer is a tiling of the hashed tile coder
+            return np.array(tiles(self.iht, self.n_layers, self._scaled_distortions(state), [action]), dtype=np.int64)
+
+        active_tiles = []
         for layer in range(self.n_layers):
             global_idx = self.tiles[layer].get_global_tile_index(raw_state=state, action=action)
             if global_idx != INVALID_ID:
-                tiled_state[global_idx] = 1.0
+                active_tiles.append(global_idx)
 
-        return tiled_state
+        return np.array(active_tiles, dtype=np.int64)
+
+    def featurize_state_actions(self, state: RawState) -> np.ndarray:
+        """Returns the indices of the active tiles of the given
+        state for every action. The state is digitized once and
+        row a of the returned matrix holds the indices that
+        featurize_state_action returns for action a
+
+        Parameters
+        ----------
+        state: The environment state observed
+
+        Returns
+        -------
+
+        An integer array of shape (n_actions, n_active_layers)
+        """
+
+        if self.iht is not None:
+            coordinates = tile_coordinates(num_tilings=self.n_layers, floats=self._scaled_distortions(state))
+            return np.array([[self.iht.get_index(tiling_coordinates + (action,)) for tiling_coordinates in coordinates]
+                             for action in range(self.n_actions)], dtype=np.int64)
+
+        # the global index of the tile of the first action in
+        # every layer that covers the state. A layer that does
+        # not cover the state does not cover it for any action
+        first_action_tiles = []
+        for layer in range(self.n_layers):
+            local_idx = self.tiles[layer].get_local_tile_index(bin_indices=self.tiles[layer].get_bin_indices(state))
+            if local_idx != INVALID_ID:
+                first_action_tiles.append(self.tiles[layer].start_index + local_idx)
+
+        n_tiles_per_action = Layer.n_tiles_per_action(n_bins=self.n_bins, n_columns=len(self.column_ranges))
+        action_offsets = np.arange(self.n_actions, dtype=np.int64) * n_tiles_per_action
+        return action_offsets[:, np.newaxis] + np.array(first_action_tiles, dtype=np.int64)[np.newaxis, :]
 
     def featurize_raw_state(self, state: RawState) -> TiledState:
         """Returns the tiled state vector given  the vector
@@ -616,17 +626,25 @@ class TiledEnv(object):
 
         """
 
-        tiled_state = np.zeros(self.n_layers * self.n_actions * self.n_bins ** (len(self.column_ranges)))
+        tiled_state = np.zeros(self.n_features)
+        tiled_state[self.featurize_state_actions(state=state)] = 1.0
+        return tiled_state
 
-        for layer in range(self.n_layers):
-            for action in range(self.n_actions):
-                global_idx = self.tiles[layer].get_global_tile_index(raw_state=state, action=action)
-                if global_idx != INVALID_ID:
-                    tiled_state[global_idx] = 1.0
-                    #found = True
-                    #break
+    def _scaled_distortions(self, state: RawState) -> List[float]:
+        """Returns the column distortions of the given state scaled
+        so that a unit is the width of a tile
 
-        return tiled_state
+        Parameters
+        ----------
+        state: The environment state observed
+
+        Returns
+        -------
+
+        A list with the scaled distortion of every tiled column
+        """
+        return [(state.column_distortions[name] - self.column_ranges[name][0]) * self.column_scales[name]
+                for name in self.column_ranges]
 
     def _create_column_scales(self) -> None:
         """
@@ -680,3 +698,7 @@ class TiledEnv(object):
             raise InvalidParamValue(param_name="n_layers",
                                     param_value=str(len(self.column_scales)) + " n_layers cannot be zero")
 
+        if self.max_size is not None and self.max_size <= 0:
+            raise InvalidParamValue(param_name="max_size",
+                                    param_value=str(self.max_size) + " max_size should be greater than zero")
+
@@ -146,5 +146,93 @@ class VectorTimeStep(object):
         return [time_step.info["total_distortion"] for time_step in self.time_steps]
 
 
+class BatchedTimeStep(object):
+    """The time steps of a batch of environments stored
+    as arrays. Exposes the same interface as VectorTimeStep
 
+    """
+
+    def __init__(self, step_types: np.ndarray, rewards: np.ndarray,
+                 observations: np.ndarray, total_distortions: np.ndarray,
+                 discount: float, observation_type: type = int, final_observations: np.ndarray = None):
+        """Constructor
+
+        Parameters
+        ----------
+        step_types: The StepType of every environment
+        rewards: The reward of every environment
+        observations: The observation of every environment. Row i
+        is the observation of the i-th environment
+        total_distortions: The total distortion of every environment
+        discount: The discount of the environments
+        observation_type: The type of a single observation. One of int, tuple or list
+        final_observations: The observation every environment finished its step with. It
+        differs from the observation only for an environment that was reset after finishing
+        its episode. If None the observations are used
+
+        """
+        self.step_types = step_types
+        self.rewards = rewards
+        self.observations = observations
+        self.total_distortions = total_distortions
+        self.discount = discount
+        self.observation_type = observation_type
+        self.final_observations = observations if final_observations is None else final_observations
+
+    def __len__(self) -> int:
+        """Returns the number of time-steps
+
+        Returns
+        -------
+
+        """
+        return len(self.step_types)
+
+    def __getitem__(self, idx) -> TimeStep:
+        """Returns the idx-th time step in this
+        BatchedTimeStep
+
+        Parameters
+        ----------
+        idx: The index of the time step to return
 
+        Returns
+        -------
+
+        An instance of TimeStep
+        """
+
+        if self.observation_type == int:
+            observation = int(self.observations[idx])
+        elif self.observation_type == tuple:
+            observation = tuple(int(item) for item in self.observations[idx])
+        else:
+            observation = [float(item) for item in self.observations[idx]]
+
+        return TimeStep(step_type=StepType(int(self.step_types[idx])),
+                        info={"total_distortion": float(self.total_distortions[idx])},
+                        reward=float(self.rewards[idx]), discount=self.discount,
+                        observation=observation)
+
+    @property
+    def done(self) -> bool:
+        return bool(np.all(self.step_types == StepType.LAST))
+
+    @property
+    def dones(self) -> np.ndarray:
+        return self.step_types == StepType.LAST
+
+    def stack_observations(self) -> np.ndarray:
+        return self.observations.reshape(len(self), -1)
+
+    def stack_rewards(self) -> np.ndarray:
+        return self.rewards.reshape(len(self), 1)
+
+    def stack_step_type(self) -> list:
+        return [StepType(int(step_type)) for step_type in self.step_types]
+
+    def stack_dones(self):
+        return [bool(done) for done in self.dones]
+
+    def stack_total_distortion(self):
+        return [float(distortion) for distortion in self.total_distortions]
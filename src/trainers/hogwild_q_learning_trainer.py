@@ -0,0 +1,248 @@
+"""Module hogwild_q_learning_trainer. Specifies a trainer
+that runs tabular Q-learning in several processes that
+update a Q-table in shared memory without locks
+
+"""
+
+import queue
+import random
+import traceback
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from typing import TypeVar, List
+from dataclasses import dataclass
+
+from src.utils import INFO
+from src.utils.function_wraps import time_func_wrapper
+from src.utils.episode_info import EpisodeInfo
+from src.utils.q_table import QTable
+from src.parallel import TorchProcsHandler
+from src.spaces.env_type import DiscreteEnvType
+
+Env = TypeVar("Env")
+Agent = TypeVar("Agent")
+Queue = TypeVar("Queue")
+
+
+@dataclass(init=True, repr=True)
+class HogwildTrainerConfig(object):
+    """Configuration for HogwildQLearningTrainer
+
+    """
+    n_procs: int = 1
+    n_episodes: int = 100
+    seed: int = 42
+    max_table_states: int = 1000000
+
+
+def hogwild_worker(worker_idx: int, env: Env, agent: Agent, shared_values: torch.Tensor,
+                   n_episodes: int, seed: int, result_queue: Queue) -> None:
+    """Train the agent on the environment for the given number
+    of episodes. The Q-table of the agent is backed by the shared values
+
+    Parameters
+    ----------
+    worker_idx: The index of the worker
+    env: The environment of the worker
+    agent: The QLearning agent of the worker
+    shared_values: The values of the Q-table in shared memory
+    n_episodes: The number of episodes to train for
+    seed: The seed of the worker. The policy of every worker draws from its own stream
+    result_queue: The queue the EpisodeInfo of every episode is put in. If the
+    worker fails the traceback of the failure is put in instead
+
+    Returns
+    -------
+
+    None
+    """
+
+    try:
+        random.seed(seed + worker_idx)
+        np.random.seed(seed + worker_idx)
+
+        # the table writes directly in the shared memory
+        agent.q_table.values = shared_values.numpy()
+
+        episode_infos = []
+        for episode in range(n_episodes):
+            agent.actions_before_episode_begins(env, episode)
+            episode_infos.append(agent.on_episode(env, episode))
+            agent.actions_after_episode_ends(env, episode)
+
+        result_queue.put((worker_idx, episode_infos, None))
+    except Exception:
+        # the trainer waits on the queue so
+        # report the failure rather than exit
+        result_queue.put((worker_idx, None, traceback.format_exc()))
+
+
+class HogwildQLearningTrainer(object):
+    """The HogwildQLearningTrainer class. Every worker process
+    trains its own copy of the agent on its own copy of the environment
+    and all the copies read and write the same Q-table in shared memory
+    without locks. An update may be lost when two workers write the same
+    (state, action) pair at the same time. This is the Hogwild! scheme
+    of Niu et al. and it rarely matters when updates are sparse
+
+    """
+
+    # seconds to wait on the queue before
+    # checking whether the workers are alive
+    POLL_TIMEOUT = 1.0
+
+    def __init__(self, env: Env, agent: Agent, config: HogwildTrainerConfig) -> None:
+        """Constructor. Initialize a trainer by passing the training environment
+        instance, the QLearning agent to train and the configuration
+
+        Parameters
+        ----------
+
+        env: The environment to train the agent. Every worker gets a copy
+        agent: The QLearning agent to train. Every worker gets a copy
+        config: Configuration parameters for the trainer
+
+        """
+
+        self.env = env
+        self.agent = agent
+        self.configuration = config
+        self.shared_values: torch.Tensor = None
+
+        # monitor performance. Row w holds
+        # the episodes of the w-th worker
+        self.total_rewards: np.array = np.zeros((config.n_procs, config.n_episodes))
+        self.iterations_per_episode: np.array = np.zeros((config.n_procs, config.n_episodes), dtype=np.int64)
+        self.total_distortions: np.array = np.zeros((config.n_procs, config.n_episodes))
+        self.episode_infos: List[List[EpisodeInfo]] = []
+
+    def avg_rewards(self) -> np.array:
+        """Returns the average reward per episode of every worker
+
+        Returns
+        -------
+
+        An array of shape (n_procs, n_episodes)
+        """
+        return self.total_rewards / self.iterations_per_episode
+
+    def actions_before_training(self) -> None:
+        """Create the Q-table of the agent in shared memory
+
+        Returns
+        -------
+
+        None
+        """
+
+        if self.configuration.n_procs < 1:
+            raise ValueError("Invalid number of processes {0}. Should be at least 1".format(self.configuration.n_procs))
+
+        self.agent.actions_before_training(self.env)
+
+        # a table with a fixed number of rows. The
+        # rows of a table that grows cannot be shared
+        if self.env.env_type == DiscreteEnvType.MULTI_COLUMN_STATE:
+            n_table_states = len(self.env.state_space)
+        else:
+            n_table_states = self.env.n_states + 1
+
+        if n_table_states > self.configuration.max_table_states:
+            raise ValueError("The shared Q-table needs a row for each of the {0} states but at most {1} "
+                             "are allowed. Increase max_table_states or train with a QLearning "
+                             "agent whose table grows".format(n_table_states,
+                                                               self.configuration.max_table_states))
+
+        if self.env.env_type == DiscreteEnvType.MULTI_COLUMN_STATE:
+            q_table = QTable(n_actions=self.env.n_actions, state_space=self.env.state_space,
+                             dtype=self.agent.config.q_table_dtype)
+        else:
+            q_table = QTable(n_actions=self.env.n_actions, n_states=self.env.n_states,
+                             dtype=self.agent.config.q_table_dtype)
+
+        self.shared_values = torch.from_numpy(q_table.values).share_memory_()
+        q_table.values = self.shared_values.numpy()
+        self.agent.q_table = q_table
+
+        self.total_rewards = np.zeros((self.configuration.n_procs, self.configuration.n_episodes))
+        self.iterations_per_episode = np.zeros((self.configuration.n_procs, self.configuration.n_episodes),
+                                               dtype=np.int64)
+        self.total_distortions = np.zeros((self.configuration.n_procs, self.configuration.n_episodes))
+        self.episode_infos = [[] for _ in range(self.configuration.n_procs)]
+
+    @time_func_wrapper(show_time=True)
+    def train(self) -> None:
+        """Train the agent. When this returns the Q-table of the
+        agent holds the values all the workers have learnt
+
+        Returns
+        -------
+
+        None
+        """
+
+        print("{0} Training agent {1}".format(INFO, self.agent.name))
+        print("{0} Number of training episodes per process {1}".format(INFO, self.configuration.n_episodes))
+        print("{0} Number of processes {1}".format(INFO, self.configuration.n_procs))
+
+        self.actions_before_training()
+
+        result_queue = mp.Queue()
+        workers = TorchProcsHandler(n_procs=self.configuration.n_procs)
+        for worker_idx in range(self.configuration.n_procs):
+            workers.create_process_and_start(target=hogwild_worker,
+                                             args=(worker_idx, self.env, self.agent, self.shared_values,
+                                                   self.configuration.n_episodes, self.configuration.seed,
+                                                   result_queue))
+
+        # collect the results before joining
+        # so that no worker blocks on the queue
+        try:
+            for _ in range(self.configuration.n_procs):
+                worker_idx, episode_infos = self._get_result(result_queue=result_queue, workers=workers)
+                self.episode_infos[worker_idx] = episode_infos
+
+                for episode, episode_info in enumerate(episode_infos):
+                    self.total_rewards[worker_idx, episode] = episode_info.episode_score
+                    self.iterations_per_episode[worker_idx, episode] = episode_info.episode_itrs
+                    self.total_distortions[worker_idx, episode] = episode_info.total_distortion / episode_info.episode_itrs
+        except BaseException:
+            workers.terminate()
+            workers.join()
+            raise
+
+        workers.join()
+
+        print("{0} Training finished for agent {1}".format(INFO, self.agent.name))
+
+    def _get_result(self, result_queue: Queue, workers: TorchProcsHandler) -> tuple:
+        """Wait for the result of a worker. Raises a RuntimeError if
+        a worker failed or exited without reporting its result
+
+        Parameters
+        ----------
+        result_queue: The queue the workers put their results in
+        workers: The worker processes
+
+        Returns
+        -------
+
+        A tuple with the index of the worker and its list of EpisodeInfo
+        """
+
+        while True:
+            try:
+                worker_idx, episode_infos, error = result_queue.get(timeout=HogwildQLearningTrainer.POLL_TIMEOUT)
+            except queue.Empty:
+                # a worker that was killed cannot put a result
+                for process in workers.processes:
+                    if process.exitcode is not None and process.exitcode != 0:
+                        raise RuntimeError("A worker exited with code {0} "
+                                           "without a result".format(process.exitcode))
+                continue
+
+            if error is not None:
+                raise RuntimeError("Worker {0} failed with\n{1}".format(worker_idx, error))
+
+            return worker_idx, episode_infos
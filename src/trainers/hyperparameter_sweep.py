@@ -0,0 +1,510 @@
+"""Module hyperparameter_sweep. Specifies a utility class
+that trains an agent for every parameter set of a grid or
+random search in a pool of processes
+
+"""
+
+import os
+import enum
+import numbers
+import random
+import itertools
+import contextlib
+import dataclasses
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import TypeVar, Callable, List, Tuple
+from dataclasses import dataclass
+
+from src.utils import INFO
+from src.utils.function_wraps import time_func_wrapper
+from src.trainers.trainer import Trainer, TrainerConfig
+
+Env = TypeVar("Env")
+Agent = TypeVar("Agent")
+DataSet = TypeVar("DataSet")
+Config = TypeVar("Config")
+
+# creates the environment and the agent of a run
+# from the run parameters and the shared data set
+Builder = Callable[[dict, DataSet], Tuple[Env, Agent]]
+
+# the data set and the builder of the worker process.
+# They are set once by the pool initializer
+_worker_data_set = None
+_worker_builder = None
+
+# the columns of the results table
+# that are not run parameters
+SWEEP_RESULT_COLUMNS = ["run_idx", "episode", "total_reward", "total_distortion", "episode_itrs"]
+
+
+class SweepMethod(enum.IntEnum):
+    """Enumeration of the methods to generate
+    the parameter sets of a sweep
+
+    """
+
+    INVALID = -1
+    GRID = 0
+    RANDOM = 1
+
+
+@dataclass(init=True, repr=True)
+class SweepConfig(object):
+    """Configuration for HyperparameterSweep
+
+    """
+    method: SweepMethod = SweepMethod.GRID
+    n_samples: int = 10
+    n_procs: int = 1
+    n_episodes: int = 100
+    seed: int = 42
+    results_file: Path = None
+    verbose: bool = False
+
+
+def replace_config_fields(config: Config, params: dict, prefix: str) -> Config:
+    """Returns a copy of the given dataclass configuration, e.g. a QLearnConfig,
+    with the fields of the parameters named prefix.field replaced. For example
+    replace_config_fields(config, {"agent.alpha": 0.2, "env.n_states": 5}, "agent")
+    returns a copy of the config with alpha equal to 0.2
+
+    Parameters
+    ----------
+    config: The configuration to copy
+    params: The parameters of the run
+    prefix: The prefix of the parameters that belong to the configuration
+
+    Returns
+    -------
+
+    A new configuration
+    """
+
+    field_names = [field.name for field in dataclasses.fields(config)]
+
+    changes = {}
+    for name, value in params.items():
+        name_prefix, _, field_name = name.partition(".")
+        if name_prefix != prefix:
+            continue
+
+        if field_name not in field_names:
+            raise ValueError("Invalid parameter {0}. {1} has no field {2}".format(name,
+                                                                                 type(config).__name__,
+                                                                                 field_name))
+        changes[field_name] = value
+
+    return dataclasses.replace(config, **changes)
+
+
+def grid_parameters(param_space: dict) -> List[dict]:
+    """Returns every combination of the values of the given
+    parameter space. The last parameter changes fastest
+
+    Parameters
+    ----------
+    param_space: The values of every parameter
+
+    Returns
+    -------
+
+    A list of parameter sets
+    """
+
+    for name, values in param_space.items():
+        if callable(values):
+            raise ValueError("Invalid values for parameter {0}. "
+                             "A grid search needs a sequence of values".format(name))
+
+    names = list(param_space.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*param_space.values())]
+
+
+def random_parameters(param_space: dict, n_samples: int, seed: int) -> List[dict]:
+    """Returns n_samples parameter sets drawn from the given parameter space.
+    A parameter given as a sequence is drawn uniformly from the sequence. A
+    parameter given as a callable is drawn by calling it with a random.Random
+    instance, e.g. lambda rng: rng.uniform(0.01, 0.5)
+
+    Parameters
+    ----------
+    param_space: The values or the distribution of every parameter
+    n_samples: The number of parameter sets
+    seed: The seed of the random engine. The same seed gives the same sets
+
+    Returns
+    -------
+
+    A list of parameter sets
+    """
+
+    if n_samples < 1:
+        raise ValueError("Invalid number of samples {0}. Should be at least 1".format(n_samples))
+
+    rng = random.Random(seed)
+
+    samples = []
+    for _ in range(n_samples):
+        params = {}
+        for name, values in param_space.items():
+            params[name] = values(rng) if callable(values) else rng.choice(list(values))
+        samples.append(params)
+
+    return samples
+
+
+def init_search_worker(data_set: DataSet, builder: Builder) -> None:
+    """Pool initializer of the searches. Keep the data set and
+    the builder in the worker process so that they are passed
+    once per worker and not once per run
+
+    Parameters
+    ----------
+    data_set: The data set the environments of the worker read
+    builder: The builder of the runs
+
+    Returns
+    -------
+
+    None
+    """
+
+    global _worker_data_set, _worker_builder
+    _worker_data_set = data_set
+    _worker_builder = builder
+
+
+def worker_data_set() -> DataSet:
+    """Returns the data set of the worker process
+
+    Returns
+    -------
+
+    The data set set by init_search_worker
+    """
+    return _worker_data_set
+
+
+def build_worker_run(params: dict) -> Tuple[Env, Agent]:
+    """Returns the environment and the agent of a run
+    built on the data set of the worker process
+
+    Parameters
+    ----------
+    params: The parameters of the run
+
+    Returns
+    -------
+
+    The environment and the agent of the run
+    """
+    return _worker_builder(params, _worker_data_set)
+
+
+def sweep_worker(run_idx: int, params: dict, n_episodes: int, seed: int, verbose: bool) -> Tuple[int, dict]:
+    """Train an agent with the given parameters on the data set of
+    the worker process
+
+    Parameters
+    ----------
+    run_idx: The index of the run
+    params: The parameters of the run
+    n_episodes: The number of episodes to train for
+    seed: The seed of the sweep. The run is seeded with seed + run_idx
+    verbose: If false the output of the trainer is discarded
+
+    Returns
+    -------
+
+    The run index and a dictionary with the total_rewards, total_distortions
+    and iterations_per_episode of the run
+    """
+
+    random.seed(seed + run_idx)
+    np.random.seed(seed + run_idx)
+
+    env, agent = build_worker_run(params)
+    trainer = Trainer(env=env, agent=agent,
+                      configuration=TrainerConfig(n_episodes=n_episodes, output_msg_frequency=n_episodes))
+
+    if verbose:
+        trainer.train()
+    else:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            trainer.train()
+
+    return run_idx, {"total_rewards": np.array(trainer.total_rewards),
+                     "total_distortions": np.array(trainer.total_distortions),
+                     "iterations_per_episode": np.array(trainer.iterations_per_episode)}
+
+
+class ParameterSearch(object):
+    """The ParameterSearch class. Base class of the searches that
+    train an agent for every parameter set of a grid or random search.
+    The configuration of a search has the method, n_samples and seed
+    fields of SweepConfig
+
+    """
+
+    def __init__(self, data_set: DataSet, builder: Builder, param_space: dict, config: Config) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        data_set: The data set to anonymize. It is shared by all the runs
+        builder: Creates the environment and the agent of a run
+        param_space: The values of every parameter. See grid_parameters and random_parameters
+        config: Configuration parameters for the search
+
+        """
+
+        self.data_set = data_set
+        self.builder = builder
+        self.param_space = param_space
+        self.configuration = config
+        self.results: pd.DataFrame = None
+
+    @property
+    def param_names(self) -> List[str]:
+        return list(self.param_space.keys())
+
+    def parameter_sets(self) -> List[dict]:
+        """Returns the parameter set of every run. The run
+        index is the position of the set in the list
+
+        Returns
+        -------
+
+        A list of parameter sets
+        """
+
+        if self.configuration.method == SweepMethod.GRID:
+            return grid_parameters(param_space=self.param_space)
+        elif self.configuration.method == SweepMethod.RANDOM:
+            return random_parameters(param_space=self.param_space, n_samples=self.configuration.n_samples,
+                                     seed=self.configuration.seed)
+
+        raise ValueError("Invalid sweep method {0}".format(self.configuration.method))
+
+    def run_table(self, run_idx: int, params: dict, run_result: dict) -> pd.DataFrame:
+        """Returns the rows of the results table of the given run
+
+        Parameters
+        ----------
+        run_idx: The index of the run
+        params: The parameters of the run
+        run_result: The result of the run with the total_rewards, total_distortions
+        and iterations_per_episode of every episode
+
+        Returns
+        -------
+
+        A pandas DataFrame with a row per episode
+        """
+
+        n_episodes = len(run_result["total_rewards"])
+        table = pd.DataFrame({"run_idx": np.full(n_episodes, run_idx, dtype=np.int64),
+                              "episode": np.arange(n_episodes)})
+
+        for name in self.param_names:
+            table[name] = [params[name]] * n_episodes
+
+        table["total_reward"] = run_result["total_rewards"]
+        table["total_distortion"] = run_result["total_distortions"]
+        table["episode_itrs"] = run_result["iterations_per_episode"]
+        return table
+
+
+class HyperparameterSweep(ParameterSearch):
+    """The HyperparameterSweep class. Trains an agent for every parameter
+    set of a grid or random search. The runs are distributed over a pool
+    of processes. The data set is passed to every worker once, when the pool
+    starts, and the forked workers read it without copying it. The builder
+    creates the environment and the agent of a run from the run parameters and
+    the data set. Use replace_config_fields to apply the parameters to a
+    QLearnConfig, SemiGradSARSAConfig, EpsilonGreedyConfig or DiscreteEnvConfig.
+    The builder should be a module level function so that it can be pickled and
+    should not set a distorted_set_path so that the runs do not write data sets.
+
+    The results table has a row for every episode of every run with the run index,
+    the parameters of the run, the total reward, the total distortion and the number
+    of iterations of the episode. When a results file is given the rows of every run
+    are appended to it as soon as the run finishes and the runs already in the file
+    are not repeated. Thus, a sweep that is interrupted resumes when it is started
+    again with the same configuration and parameter space
+
+    """
+
+    def __init__(self, data_set: DataSet, builder: Builder, param_space: dict, config: SweepConfig) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        data_set: The data set to anonymize. It is shared by all the runs
+        builder: Creates the environment and the agent of a run
+        param_space: The values of every parameter. See grid_parameters and random_parameters
+        config: Configuration parameters for the sweep
+
+        """
+        super(HyperparameterSweep, self).__init__(data_set=data_set, builder=builder,
+                                                  param_space=param_space, config=config)
+
+    def completed_runs(self) -> set:
+        """Returns the indices of the runs in the results file
+
+        Returns
+        -------
+
+        A set of run indices
+        """
+
+        results_file = self.configuration.results_file
+        if results_file is None or not Path(results_file).exists() or os.path.getsize(results_file) == 0:
+            return set()
+
+        return set(pd.read_csv(results_file, usecols=["run_idx"])["run_idx"].unique().tolist())
+
+    def validate_results(self, results: pd.DataFrame, parameter_sets: List[dict]) -> None:
+        """Check that the given results were produced by this sweep.
+        Raises a ValueError if the parameter columns differ or if the
+        parameters of a run differ from its parameter set
+
+        Parameters
+        ----------
+        results: The results table of the completed runs
+        parameter_sets: The parameter set of every run
+
+        Returns
+        -------
+
+        None
+        """
+
+        param_columns = [name for name in results.columns if name not in SWEEP_RESULT_COLUMNS]
+        if sorted(param_columns) != sorted(self.param_names):
+            raise ValueError("The results file has the parameters {0} but the sweep "
+                             "has the parameters {1}".format(param_columns, self.param_names))
+
+        for run_idx, run_results in results.groupby("run_idx"):
+
+            if run_idx >= len(parameter_sets):
+                raise ValueError("The results file has run {0} but the sweep has {1} runs".format(run_idx,
+                                                                                                  len(parameter_sets)))
+
+            for name in self.param_names:
+                value, expected = run_results[name].iloc[0], parameter_sets[run_idx][name]
+
+                if isinstance(expected, numbers.Number) and not isinstance(expected, bool):
+                    same = np.isclose(float(value), float(expected), rtol=1.0e-12, atol=0.0)
+                else:
+                    same = str(value) == str(expected)
+
+                if not same:
+                    raise ValueError("Run {0} of the results file has {1}={2} but the sweep "
+                                     "has {1}={3}".format(run_idx, name, value, expected))
+
+    def summary(self, n_last_episodes: int = None) -> pd.DataFrame:
+        """Returns the mean total reward and total distortion of every run over
+        the last episodes. The runs are sorted from the highest reward
+
+        Parameters
+        ----------
+        n_last_episodes: The number of episodes at the end of every run to average.
+        If None all the episodes are averaged
+
+        Returns
+        -------
+
+        A pandas DataFrame with a row per run
+        """
+
+        if self.results is None:
+            raise ValueError("No results. Call run first")
+
+        results = self.results
+        if n_last_episodes is not None:
+            last_episode = results.groupby("run_idx")["episode"].transform("max")
+            results = results[results["episode"] > last_episode - n_last_episodes]
+
+        summary = results.groupby(["run_idx"] + self.param_names, sort=False)[["total_reward", "total_distortion"]].mean()
+        return summary.reset_index().sort_values(by="total_reward", ascending=False)
+
+    @time_func_wrapper(show_time=True)
+    def run(self) -> None:
+        """Train an agent for every parameter set that has no results.
+        When this returns the results table holds all the runs
+
+        Returns
+        -------
+
+        None
+        """
+
+        if self.configuration.n_procs < 1:
+            raise ValueError("Invalid number of processes {0}. Should be at least 1".format(self.configuration.n_procs))
+
+        parameter_sets = self.parameter_sets()
+        completed = self.completed_runs()
+        pending = [(run_idx, params) for run_idx, params in enumerate(parameter_sets) if run_idx not in completed]
+
+        print("{0} Number of runs {1}".format(INFO, len(parameter_sets)))
+        print("{0} Number of completed runs {1}".format(INFO, len(completed)))
+        print("{0} Number of processes {1}".format(INFO, self.configuration.n_procs))
+
+        tables = []
+        results_file = self.configuration.results_file
+        if results_file is not None and len(completed) != 0:
+            completed_results = pd.read_csv(results_file)
+            self.validate_results(results=completed_results, parameter_sets=parameter_sets)
+            tables.append(completed_results)
+
+        tasks = [(run_idx, params, self.configuration.n_episodes,
+                  self.configuration.seed, self.configuration.verbose) for run_idx, params in pending]
+
+        # fork so that the workers read the data
+        # set of this process without copying it
+        context = mp.get_context("fork")
+        with context.Pool(processes=self.configuration.n_procs, initializer=init_search_worker,
+                          initargs=(self.data_set, self.builder)) as pool:
+
+            # write every run as soon as it finishes so
+            # that an interrupted sweep loses at most the
+            # runs in progress
+            for run_idx, run_result in pool.imap_unordered(_sweep_worker_star, tasks):
+
+                table = self.run_table(run_idx=run_idx, params=parameter_sets[run_idx], run_result=run_result)
+                tables.append(table)
+
+                if results_file is not None:
+                    write_header = not Path(results_file).exists() or os.path.getsize(results_file) == 0
+                    table.to_csv(results_file, mode="a", header=write_header, index=False)
+
+                print("{0} Run {1} finished with mean total reward {2}".format(INFO, run_idx,
+                                                                               np.mean(run_result["total_rewards"])))
+
+        if len(tables) != 0:
+            self.results = pd.concat(tables, ignore_index=True).sort_values(by=["run_idx", "episode"],
+                                                                            ignore_index=True)
+        else:
+            self.results = pd.DataFrame(columns=["run_idx", "episode"] + self.param_names +
+                                                ["total_reward", "total_distortion", "episode_itrs"])
+
+
+def _sweep_worker_star(args: tuple) -> Tuple[int, dict]:
+    """Unpack the arguments of sweep_worker. Used
+    with Pool.imap_unordered
+
+    Parameters
+    ----------
+    args: The arguments of sweep_worker
+
+    Returns
+    -------
+
+    The return value of sweep_worker
+    """
+    return sweep_worker(*args)
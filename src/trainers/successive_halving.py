@@ -0,0 +1,404 @@
+"""Module successive_halving. Specifies a hyperparameter search
+that stops the worst runs early. All the runs are trained for a
+small number of episodes and only the best runs continue
+
+"""
+
+import io
+import os
+import math
+import pickle
+import random
+import contextlib
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from typing import TypeVar, List, Tuple
+from dataclasses import dataclass
+
+from src.utils import INFO
+from src.utils.function_wraps import time_func_wrapper
+from src.trainers.trainer import Trainer, TrainerConfig
+from src.trainers.hyperparameter_sweep import Builder, SweepMethod, ParameterSearch, init_search_worker, \
+    worker_data_set, build_worker_run
+
+DataSet = TypeVar("DataSet")
+
+# the persistent ids of the data set and
+# of a column of the data set in a checkpoint
+_DATA_SET_ID = "data_set"
+_COLUMN_ID = "column"
+
+
+@dataclass(init=True, repr=True)
+class SuccessiveHalvingConfig(object):
+    """Configuration for SuccessiveHalving
+
+    """
+    method: SweepMethod = SweepMethod.GRID
+    n_samples: int = 10
+    n_procs: int = 1
+    min_episodes: int = 10
+    max_episodes: int = 100
+    reduction_factor: int = 3
+    window: int = None
+    seed: int = 42
+    verbose: bool = False
+
+
+class _CheckpointPickler(pickle.Pickler):
+    """Pickler that stores a reference to the data set of the
+    worker instead of the data set. A Series that views a column
+    of the data set, e.g. the original column of a ColumnDistortion,
+    is stored as a reference to the column
+
+    """
+
+    def __init__(self, file: io.BytesIO, data_set: DataSet) -> None:
+        super(_CheckpointPickler, self).__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.data_set = data_set
+        self.columns = {}
+        if data_set is not None:
+            self.columns = {name: data_set.get_column(col_name=name).values
+                            for name in data_set.get_columns_names()}
+
+    def persistent_id(self, obj):
+        if obj is self.data_set:
+            return _DATA_SET_ID
+
+        if isinstance(obj, pd.Series) and obj.name in self.columns:
+            column = self.columns[obj.name]
+            if len(obj) == len(column) and np.may_share_memory(obj.values, column):
+                return _COLUMN_ID, obj.name
+
+        return None
+
+
+class _CheckpointUnpickler(pickle.Unpickler):
+    """Unpickler that resolves the data set
+    reference of _CheckpointPickler
+
+    """
+
+    def __init__(self, file: io.BytesIO, data_set: DataSet) -> None:
+        super(_CheckpointUnpickler, self).__init__(file)
+        self.data_set = data_set
+
+    def persistent_load(self, pid):
+        if pid == _DATA_SET_ID:
+            return self.data_set
+
+        if isinstance(pid, tuple) and pid[0] == _COLUMN_ID:
+            return self.data_set.get_column(col_name=pid[1])
+
+        raise pickle.UnpicklingError("Invalid persistent id {0}".format(pid))
+
+
+def save_checkpoint(trainer: Trainer, data_set: DataSet) -> bytes:
+    """Returns a checkpoint of the given trainer. The checkpoint
+    holds the environment, the agent, the performance of the episodes
+    trained so far and the state of the random engines. Neither the data
+    set nor its columns are copied in the checkpoint. The environment is
+    saved without the columns its current episode distorted so it should
+    be reset before it is stepped again
+
+    Parameters
+    ----------
+    trainer: The trainer to save
+    data_set: The data set the environment of the trainer reads
+
+    Returns
+    -------
+
+    The checkpoint
+    """
+
+    buffer = io.BytesIO()
+    _CheckpointPickler(buffer, data_set=data_set).dump((trainer, random.getstate(), np.random.get_state()))
+    return buffer.getvalue()
+
+
+def load_checkpoint(checkpoint: bytes, data_set: DataSet) -> Trainer:
+    """Restore the trainer of the given checkpoint. The state
+    of the random engines is restored as well
+
+    Parameters
+    ----------
+    checkpoint: The checkpoint returned by save_checkpoint
+    data_set: The data set the environment of the trainer reads
+
+    Returns
+    -------
+
+    The trainer
+    """
+
+    trainer, random_state, np_random_state = _CheckpointUnpickler(io.BytesIO(checkpoint), data_set=data_set).load()
+    random.setstate(random_state)
+    np.random.set_state(np_random_state)
+    return trainer
+
+
+def halving_worker(run_idx: int, params: dict, checkpoint: bytes, n_episodes: int,
+                   max_episodes: int, seed: int, verbose: bool) -> Tuple[int, bytes, dict]:
+    """Continue the training of the given run up to the given number of episodes
+
+    Parameters
+    ----------
+    run_idx: The index of the run
+    params: The parameters of the run
+    checkpoint: The checkpoint of the run. If None the run starts
+    n_episodes: The number of episodes the run should have trained when this returns
+    max_episodes: The maximum number of episodes of a run
+    seed: The seed of the search. The run is seeded with seed + run_idx
+    verbose: If false the output of the trainer is discarded
+
+    Returns
+    -------
+
+    The run index, the new checkpoint of the run and a dictionary with the
+    total_rewards, total_distortions and iterations_per_episode of the run
+    """
+
+    with contextlib.ExitStack() as stack:
+        if not verbose:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+
+        if checkpoint is None:
+            random.seed(seed + run_idx)
+            np.random.seed(seed + run_idx)
+
+            env, agent = build_worker_run(params)
+            trainer = Trainer(env=env, agent=agent,
+                              configuration=TrainerConfig(n_episodes=max_episodes, output_msg_frequency=max_episodes))
+            trainer.actions_before_training()
+        else:
+            trainer = load_checkpoint(checkpoint=checkpoint, data_set=worker_data_set())
+
+        trainer.train_episodes(n_episodes=n_episodes - trainer.current_episode)
+
+    n_trained = trainer.current_episode
+    return run_idx, save_checkpoint(trainer=trainer, data_set=worker_data_set()), \
+        {"total_rewards": np.array(trainer.total_rewards[:n_trained]),
+         "total_distortions": np.array(trainer.total_distortions),
+         "iterations_per_episode": np.array(trainer.iterations_per_episode)}
+
+
+def _halving_worker_star(args: tuple) -> Tuple[int, bytes, dict]:
+    """Unpack the arguments of halving_worker. Used
+    with Pool.imap_unordered
+
+    Parameters
+    ----------
+    args: The arguments of halving_worker
+
+    Returns
+    -------
+
+    The return value of halving_worker
+    """
+    return halving_worker(*args)
+
+
+class SuccessiveHalving(ParameterSearch):
+    """The SuccessiveHalving class. Implements the successive halving
+    scheme of Jamieson and Talwalkar that Hyperband of Li et al. repeats with
+    different budgets. Every parameter set of a grid or random search is
+    trained for min_episodes. At every rung the runs are ranked by the running
+    average of the total reward over the last window episodes, the lower running
+    average of the distortion breaking ties, and only the best 1/reduction_factor
+    of the runs continue. The survivors are trained until they have reduction_factor
+    times more episodes and so on until max_episodes. The pool trains only the
+    survivors so the processes of the runs stopped go to the runs that continue.
+
+    A run continues from a checkpoint of its trainer. The checkpoint holds the
+    environment and the agent without the data set that every worker already has.
+    The builder is the same as the builder of HyperparameterSweep
+
+    """
+
+    def __init__(self, data_set: DataSet, builder: Builder, param_space: dict,
+                 config: SuccessiveHalvingConfig) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        data_set: The data set to anonymize. It is shared by all the runs
+        builder: Creates the environment and the agent of a run
+        param_space: The values of every parameter. See grid_parameters and random_parameters
+        config: Configuration parameters for the search
+
+        """
+        super(SuccessiveHalving, self).__init__(data_set=data_set, builder=builder,
+                                                param_space=param_space, config=config)
+
+        # the evaluation of the runs at every rung
+        self.rung_results: pd.DataFrame = None
+        self.checkpoints: dict = {}
+
+    def rung_episodes(self) -> List[int]:
+        """Returns the number of episodes the runs
+        of every rung have trained when they are evaluated
+
+        Returns
+        -------
+
+        A list of integers
+        """
+
+        episodes = [self.configuration.min_episodes]
+        while episodes[-1] < self.configuration.max_episodes:
+            episodes.append(min(episodes[-1] * self.configuration.reduction_factor, self.configuration.max_episodes))
+        return episodes
+
+    def n_promoted(self, n_runs: int) -> int:
+        """Returns the number of runs out of the
+        given runs that continue to the next rung
+
+        Parameters
+        ----------
+        n_runs: The number of runs evaluated at a rung
+
+        Returns
+        -------
+
+        An integer
+        """
+        return max(1, int(math.floor(n_runs / self.configuration.reduction_factor)))
+
+    def evaluate(self, run_results: dict) -> pd.DataFrame:
+        """Returns the running averages of the given runs sorted from the best run
+
+        Parameters
+        ----------
+        run_results: The result of halving_worker for every run index
+
+        Returns
+        -------
+
+        A pandas DataFrame with the run_idx, n_episodes, avg_reward and avg_distortion of every run
+        """
+
+        window = self.configuration.window if self.configuration.window is not None \
+            else self.configuration.min_episodes
+
+        rows = []
+        for run_idx, run_result in run_results.items():
+            rows.append({"run_idx": run_idx,
+                         "n_episodes": len(run_result["total_rewards"]),
+                         "avg_reward": np.mean(run_result["total_rewards"][-window:]),
+                         "avg_distortion": np.mean(run_result["total_distortions"][-window:])})
+
+        evaluation = pd.DataFrame(rows, columns=["run_idx", "n_episodes", "avg_reward", "avg_distortion"])
+        return evaluation.sort_values(by=["avg_reward", "avg_distortion", "run_idx"],
+                                      ascending=[False, True, True], ignore_index=True)
+
+    def best_trainer(self) -> Trainer:
+        """Returns the trainer of the best run of the last rung. The
+        environment of the trainer reads the data set of the search
+
+        Returns
+        -------
+
+        The trainer
+        """
+
+        if self.rung_results is None:
+            raise ValueError("No results. Call run first")
+
+        last_rung = self.rung_results[self.rung_results["rung"] == self.rung_results["rung"].max()]
+        best_run = int(last_rung["run_idx"].iloc[0])
+        return load_checkpoint(checkpoint=self.checkpoints[best_run], data_set=self.data_set)
+
+    @time_func_wrapper(show_time=True)
+    def run(self) -> None:
+        """Run the search. When this returns the results table
+        holds the episodes every run trained and the rung results
+        the evaluation of the runs at every rung
+
+        Returns
+        -------
+
+        None
+        """
+
+        self._validate()
+
+        parameter_sets = self.parameter_sets()
+        rung_episodes = self.rung_episodes()
+
+        print("{0} Number of runs {1}".format(INFO, len(parameter_sets)))
+        print("{0} Episodes at every rung {1}".format(INFO, rung_episodes))
+        print("{0} Number of processes {1}".format(INFO, self.configuration.n_procs))
+
+        survivors = list(range(len(parameter_sets)))
+        self.checkpoints = {run_idx: None for run_idx in survivors}
+        run_results = {}
+        rung_tables = []
+
+        # fork so that the workers read the data
+        # set of this process without copying it
+        context = mp.get_context("fork")
+        with context.Pool(processes=self.configuration.n_procs, initializer=init_search_worker,
+                          initargs=(self.data_set, self.builder)) as pool:
+
+            for rung, n_episodes in enumerate(rung_episodes):
+
+                tasks = [(run_idx, parameter_sets[run_idx], self.checkpoints[run_idx], n_episodes,
+                          self.configuration.max_episodes, self.configuration.seed,
+                          self.configuration.verbose) for run_idx in survivors]
+
+                for run_idx, checkpoint, run_result in pool.imap_unordered(_halving_worker_star, tasks):
+                    self.checkpoints[run_idx] = checkpoint
+                    run_results[run_idx] = run_result
+
+                evaluation = self.evaluate(run_results={run_idx: run_results[run_idx] for run_idx in survivors})
+
+                n_promoted = self.n_promoted(n_runs=len(survivors))
+                evaluation.insert(0, "rung", rung)
+                evaluation["promoted"] = np.arange(len(evaluation)) < n_promoted
+                rung_tables.append(evaluation)
+
+                print("{0} Rung {1} evaluated {2} runs at {3} episodes. Best run {4} "
+                      "with average reward {5}".format(INFO, rung, len(survivors), n_episodes,
+                                                       evaluation["run_idx"].iloc[0],
+                                                       evaluation["avg_reward"].iloc[0]))
+
+                if rung == len(rung_episodes) - 1:
+                    break
+
+                # drop the checkpoints of the stopped runs
+                stopped = evaluation["run_idx"].iloc[n_promoted:].tolist()
+                for run_idx in stopped:
+                    self.checkpoints.pop(run_idx)
+
+                survivors = evaluation["run_idx"].iloc[:n_promoted].tolist()
+
+        self.rung_results = pd.concat(rung_tables, ignore_index=True)
+        self.results = pd.concat([self.run_table(run_idx=run_idx, params=parameter_sets[run_idx],
+                                                 run_result=run_results[run_idx])
+                                  for run_idx in sorted(run_results)], ignore_index=True)
+
+    def _validate(self) -> None:
+        """Validate the configuration of the search
+
+        Returns
+        -------
+
+        None
+        """
+
+        if self.configuration.n_procs < 1:
+            raise ValueError("Invalid number of processes {0}. Should be at least 1".format(self.configuration.n_procs))
+
+        if self.configuration.min_episodes < 1:
+            raise ValueError("Invalid minimum number of episodes {0}. "
+                             "Should be at least 1".format(self.configuration.min_episodes))
+
+        if self.configuration.max_episodes < self.configuration.min_episodes:
+            raise ValueError("Invalid maximum number of episodes {0}. Should be at least "
+                             "{1}".format(self.configuration.max_episodes, self.configuration.min_episodes))
+
+        if self.configuration.reduction_factor < 2:
+            raise ValueError("Invalid reduction factor {0}. "
+                             "Should be at least 2".format(self.configuration.reduction_factor))
@@ -43,6 +43,9 @@ class Trainer(object):
         self.iterations_per_episode = []
         self.total_distortions = []
 
+        # the index of the next episode to train
+        self.current_episode: int = 0
+
     def avg_rewards(self) -> np.array:
         """
         Returns the average reward per episode
@@ -76,6 +79,8 @@ class Trainer(object):
 
         self.total_rewards: np.array = np.zeros(self.configuration.n_episodes)
         self.iterations_per_episode = []
+        self.total_distortions = []
+        self.current_episode = 0
         self.agent.actions_before_training(self.env)
 
     def actions_before_episode_begins(self, env: Env, episode_idx: int,  **options) -> None:
@@ -116,9 +121,15 @@ class Trainer(object):
             if self.env.config.distorted_set_path is not None:
                 self.env.save_current_dataset(episode_idx)
 
-    @time_func_wrapper(show_time=True)
-    def train(self) -> None:
-        """Train the agent on the given environment
+    def train_episodes(self, n_episodes: int) -> None:
+        """Train the agent for the given number of episodes starting
+        at the current episode. The training stops early when the number
+        of episodes in the configuration is reached. Calling this repeatedly
+        after actions_before_training continues the same training
+
+        Parameters
+        ----------
+        n_episodes: The number of episodes to train for
 
         Returns
         -------
@@ -126,10 +137,8 @@ class Trainer(object):
         None
         """
 
-        print("{0} Training agent {1}".format(INFO, self.agent.name))
-        self.actions_before_training()
-
-        for episode in range(0, self.configuration.n_episodes):
+        last_episode = min(self.current_episode + n_episodes, self.configuration.n_episodes)
+        for episode in range(self.current_episode, last_episode):
             print("{0} On episode {1}/{2}".format(INFO, episode, self.configuration.n_episodes))
 
             self.actions_before_episode_begins(self.env, episode)
@@ -147,5 +156,19 @@ class Trainer(object):
             self.total_rewards[episode] = episode_info.episode_score
             self.total_distortions.append(episode_info.total_distortion / episode_info.episode_itrs) #episode_info.total_distortion)
             self.actions_after_episode_ends(self.env, episode, **{})
+            self.current_episode = episode + 1
 
+    @time_func_wrapper(show_time=True)
+    def train(self) -> None:
+        """Train the agent on the given environment
+
+        Returns
+        -------
+
+        None
+        """
+
+        print("{0} Training agent {1}".format(INFO, self.agent.name))
+        self.actions_before_training()
+        self.train_episodes(n_episodes=self.configuration.n_episodes)
         print("{0} Training finished for agent {1}".format(INFO, self.agent.name))
@@ -8,8 +8,8 @@ import abc
 from typing import TypeVar, Any
 
 from src.exceptions.exceptions import InvalidParamValue
+from src.utils.q_table import QTable
 
-QTable = TypeVar('QTable')
 Hierarchy = TypeVar('Hierarchy')
 
 
@@ -82,6 +82,9 @@ class WithQTableMixin(WithQTableMixinBase):
         if self.q_table is None:
             raise InvalidParamValue(param_name="q_table", param_value="None")
 
+        if isinstance(self.q_table, QTable):
+            return self.q_table.state_values(state=state)[:n_actions]
+
         values = [self.q_table[state, a] for a in range(n_actions)]
         return values
 
@@ -101,6 +104,9 @@ class WithMaxActionMixin(WithQTableMixin):
         :param n_actions: Total number of actions allowed
         :return: The action that corresponds to the maximum value
         """
+        if isinstance(self.q_table, QTable):
+            return self.q_table.max_action(state=state)
+
         values = self.state_action_values(state, n_actions) #[self.q_table[state, a] for a in range(n_actions)]
         values = np.array(values)
         action = np.argmax(values)
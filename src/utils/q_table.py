@@ -0,0 +1,294 @@
+"""Module q_table. Specifies a tabular state-action
+value function stored in a dense numpy array
+
+"""
+
+import numpy as np
+from typing import Any, Iterator, List, TypeVar
+
+from src.exceptions.exceptions import InvalidParamValue
+
+StateSpace = TypeVar('StateSpace')
+
+
+class QTable(object):
+    """The QTable class. The values of the actions of a state
+    are a row of a 2D array. When the number of states is given
+    the states are the integers in [0, n_states] and a state is its
+    own row. When a state space is given, e.g. a MultiColumnStateSpace,
+    the row of a state is its index in the state space. Otherwise the states
+    are any hashable objects, e.g. the tuples of MULTI_COLUMN_STATE
+    environments, and a row is allocated when a value of the state is first
+    set. The values of a state without a row are zero. The table can be
+    indexed with (state, action) keys like the dictionary it replaces
+
+    """
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, n_actions: int, n_states: int = None, dtype: Any = np.float64,
+                 state_space: StateSpace = None) -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        n_actions: The number of actions
+        n_states: The number of states. If None and no state space
+        is given the rows are allocated on demand
+        dtype: The type of the values. Either np.float32 or np.float64
+        state_space: The state space. It should provide __len__, __contains__
+        and index(state)
+
+        """
+
+        if n_actions < 1:
+            raise InvalidParamValue(param_name="n_actions", param_value=str(n_actions))
+
+        if n_states is not None and n_states < 0:
+            raise InvalidParamValue(param_name="n_states", param_value=str(n_states))
+
+        if n_states is not None and state_space is not None:
+            raise ValueError("Only one of n_states and state_space can be given")
+
+        self.n_actions = n_actions
+        self.n_states = n_states
+        self.state_space = state_space
+
+        if n_states is not None:
+            self.state_rows = None
+            self.values = np.zeros((n_states + 1, n_actions), dtype=dtype)
+        elif state_space is not None:
+            self.state_rows = None
+            self.values = np.zeros((len(state_space), n_actions), dtype=dtype)
+        else:
+            self.state_rows = {}
+            self.values = np.zeros((QTable.INITIAL_CAPACITY, n_actions), dtype=dtype)
+
+        # the values of a state without a row
+        self._zeros = np.zeros(n_actions, dtype=dtype)
+        self._zeros.flags.writeable = False
+
+    def __len__(self) -> int:
+        """Returns the number of (state, action) pairs in the table
+
+        Returns
+        -------
+
+        An integer
+        """
+        return self.n_rows * self.n_actions
+
+    def __getitem__(self, key: tuple) -> float:
+        """Returns the value of the given (state, action) pair
+
+        Parameters
+        ----------
+        key: The (state, action) pair
+
+        Returns
+        -------
+
+        The value of the pair
+        """
+        state, action = key
+        return self.state_values(state=state)[action]
+
+    def __setitem__(self, key: tuple, value: float) -> None:
+        """Set the value of the given (state, action) pair
+
+        Parameters
+        ----------
+        key: The (state, action) pair
+        value: The value
+
+        Returns
+        -------
+
+        None
+        """
+        state, action = key
+
+        # allocating a row may replace the array
+        row = self.row(state=state)
+        self.values[row, action] = value
+
+    def __contains__(self, key: tuple) -> bool:
+        """Returns true if the table has a value for the given (state, action) pair
+
+        Parameters
+        ----------
+        key: The (state, action) pair
+
+        Returns
+        -------
+
+        A boolean
+        """
+        state, action = key
+
+        if not 0 <= action < self.n_actions:
+            return False
+
+        if self.state_space is not None:
+            return state in self.state_space
+
+        if self.state_rows is None:
+            return 0 <= state <= self.n_states
+
+        return state in self.state_rows
+
+    def __iter__(self) -> Iterator[tuple]:
+        """Iterate over the (state, action) pairs of the table
+
+        Returns
+        -------
+
+        An iterator over tuples
+        """
+        for state in self.states():
+            for action in range(self.n_actions):
+                yield state, action
+
+    @property
+    def n_rows(self) -> int:
+        """Returns the number of states that have a row
+
+        Returns
+        -------
+
+        An integer
+        """
+        if self.state_rows is None:
+            return self.values.shape[0]
+
+        return len(self.state_rows)
+
+    def states(self) -> List:
+        """Returns the states that have a row in the order of the rows
+
+        Returns
+        -------
+
+        A list of states
+        """
+        if self.state_space is not None:
+            return list(self.state_space)
+
+        if self.state_rows is None:
+            return list(range(self.n_states + 1))
+
+        return list(self.state_rows)
+
+    def keys(self) -> List[tuple]:
+        """Returns the (state, action) pairs of the table
+
+        Returns
+        -------
+
+        A list of tuples
+        """
+        return list(iter(self))
+
+    def row(self, state: Any) -> int:
+        """Returns the row of the given state. A row
+        is allocated if the state does not have one
+
+        Parameters
+        ----------
+        state: The state
+
+        Returns
+        -------
+
+        The row index
+        """
+
+        if self.state_space is not None:
+            return self.state_space.index(state)
+
+        if self.state_rows is None:
+            return int(state)
+
+        row = self.state_rows.get(state)
+        if row is None:
+            row = len(self.state_rows)
+
+            if row == self.values.shape[0]:
+                self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+
+            self.state_rows[state] = row
+
+        return row
+
+    def rows(self, states: List) -> np.ndarray:
+        """Returns the row of every given state. Rows are
+        allocated for the states that do not have one
+
+        Parameters
+        ----------
+        states: The states
+
+        Returns
+        -------
+
+        An integer array with the row index of every state
+        """
+
+        if self.state_space is None and self.state_rows is None:
+            return np.asarray(states, dtype=np.int64)
+
+        return np.array([self.row(state=state) for state in states], dtype=np.int64)
+
+    def state_values(self, state: Any) -> np.ndarray:
+        """Returns the values of all the actions at the given state.
+        The array returned should not be modified
+
+        Parameters
+        ----------
+        state: The state
+
+        Returns
+        -------
+
+        An array of n_actions values
+        """
+
+        if self.state_space is not None:
+            return self.values[self.state_space.index(state)]
+
+        if self.state_rows is None:
+            return self.values[int(state)]
+
+        row = self.state_rows.get(state)
+        if row is None:
+            return self._zeros
+
+        return self.values[row]
+
+    def max_action(self, state: Any) -> int:
+        """Returns the action with the maximum value at the given state
+
+        Parameters
+        ----------
+        state: The state
+
+        Returns
+        -------
+
+        The action index
+        """
+        return int(np.argmax(self.state_values(state=state)))
+
+    def max_value(self, state: Any) -> float:
+        """Returns the maximum value of the actions at the given state
+
+        Parameters
+        ----------
+        state: The state
+
+        Returns
+        -------
+
+        The maximum value
+        """
+        return self.state_values(state=state).max()
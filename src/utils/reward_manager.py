@@ -3,6 +3,7 @@ the rewards awarded by the environment.
 
 """
 
+import numpy as np
 from typing import TypeVar, Any
 
 
@@ -82,3 +83,42 @@ class RewardManager(object):
 
         return self.in_bounds_reward
 
+    def get_rewards_for_states(self, total_distortions: np.ndarray,
+                               current_states: Any, next_states: Any,
+                               min_dist_bins: Any, **options) -> np.ndarray:
+        """Returns the rewards for a batch of environments. Derived
+        classes that override get_reward_for_state without overriding
+        this function get their rewards from get_reward_for_state
+
+        Parameters
+        ----------
+        total_distortions: The total distortion of every environment
+        current_states: The current state of every environment
+        next_states: The next state of every environment
+        min_dist_bins: The state of the minimum distortion
+        options: Any options passed by the client code. These should contain
+        the action indices as "actions", the action space as "action_space"
+        and the distortion of the column every action acted on as "column_distortions"
+
+        Returns
+        -------
+
+        The reward of every environment
+        """
+
+        if type(self).get_reward_for_state is not RewardManager.get_reward_for_state:
+            actions = options["actions"]
+            action_space = options["action_space"]
+            column_distortions = options["column_distortions"]
+            return np.array([self.get_reward_for_state(total_distortion=total_distortions[i],
+                                                       current_state=current_states[i],
+                                                       next_state=next_states[i],
+                                                       min_dist_bins=min_dist_bins,
+                                                       **{"action": action_space[actions[i]],
+                                                          "column_distortion": column_distortions[i]})
+                             for i in range(len(total_distortions))], dtype=np.float64)
+
+        rewards = np.full(len(total_distortions), self.in_bounds_reward, dtype=np.float64)
+        rewards[total_distortions > self.bounds[1]] = self.punish_factor * self.out_of_max_bound_reward
+        rewards[total_distortions < self.bounds[0]] = self.punish_factor * self.out_of_min_bound_reward
+        return rewards
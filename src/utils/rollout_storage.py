@@ -0,0 +1,164 @@
+"""Module rollout_storage. Specifies a storage for the
+rollouts of on-policy algorithms such as A2C with
+preallocated tensors
+
+"""
+
+import torch
+from typing import Any, Tuple
+
+from src.exceptions.exceptions import InvalidParamValue
+
+
+class RolloutStorage(object):
+    """The RolloutStorage class. Stores the rollout of n_workers
+    environments for up to n_steps steps in tensors of shape
+    (n_steps, n_workers, ...) that are allocated once. Every step is
+    written in place at its step index and the properties return views
+    of the steps written so far without copying them.
+
+    The values, log probabilities and entropies are written with autograd
+    so the loss computed on the views backpropagates to the network. The
+    storage of these is detached from the graph when the storage is reset
+
+    """
+
+    def __init__(self, n_steps: int, n_workers: int, state_shape: Tuple[int, ...],
+                 device: str = 'cpu') -> None:
+        """Constructor
+
+        Parameters
+        ----------
+        n_steps: The maximum number of steps of a rollout
+        n_workers: The number of workers
+        state_shape: The shape of the state of a worker
+        device: The device the tensors are allocated on
+
+        """
+
+        if n_steps < 1:
+            raise InvalidParamValue(param_name="n_steps", param_value=str(n_steps))
+
+        if n_workers < 1:
+            raise InvalidParamValue(param_name="n_workers", param_value=str(n_workers))
+
+        self.n_steps = n_steps
+        self.n_workers = n_workers
+        self.state_shape = tuple(state_shape)
+        self.device = device
+        self.step = 0
+
+        self._states = torch.zeros((n_steps, n_workers) + self.state_shape, device=device)
+        self._actions = torch.zeros((n_steps, n_workers), dtype=torch.int64, device=device)
+        self._rewards = torch.zeros((n_steps, n_workers), device=device)
+        self._dones = torch.zeros((n_steps, n_workers), device=device)
+        self._values = torch.zeros((n_steps, n_workers), device=device)
+        self._logprobs = torch.zeros((n_steps, n_workers), device=device)
+        self._entropies = torch.zeros((n_steps, n_workers), device=device)
+
+    def __len__(self) -> int:
+        """Returns the number of steps written
+
+        Returns
+        -------
+
+        An integer
+        """
+        return self.step
+
+    @property
+    def states(self) -> torch.Tensor:
+        return self._states[:self.step]
+
+    @property
+    def actions(self) -> torch.Tensor:
+        return self._actions[:self.step]
+
+    @property
+    def rewards(self) -> torch.Tensor:
+        return self._rewards[:self.step]
+
+    @property
+    def dones(self) -> torch.Tensor:
+        return self._dones[:self.step]
+
+    @property
+    def values(self) -> torch.Tensor:
+        return self._values[:self.step]
+
+    @property
+    def logprobs(self) -> torch.Tensor:
+        return self._logprobs[:self.step]
+
+    @property
+    def entropies(self) -> torch.Tensor:
+        return self._entropies[:self.step]
+
+    def full(self) -> bool:
+        """Returns true if all the steps have been written
+
+        Returns
+        -------
+
+        A boolean
+        """
+        return self.step == self.n_steps
+
+    def insert(self, states: Any, actions: Any, rewards: Any, dones: Any,
+               values: torch.Tensor = None, logprobs: torch.Tensor = None,
+               entropies: torch.Tensor = None) -> None:
+        """Write the given step of all the workers at the current step index
+
+        Parameters
+        ----------
+        states: The states the workers acted on
+        actions: The actions of the workers
+        rewards: The rewards of the workers
+        dones: Whether the step ended the episode of every worker
+        values: The value estimates of the states
+        logprobs: The log probabilities of the actions
+        entropies: The entropies of the policy at the states
+
+        Returns
+        -------
+
+        None
+        """
+
+        if self.full():
+            raise ValueError("RolloutStorage is full. Call reset before inserting more than {0} steps".format(self.n_steps))
+
+        step = self.step
+        self._states[step] = torch.as_tensor(states, dtype=self._states.dtype).reshape(self._states[step].shape)
+        self._actions[step] = torch.as_tensor(actions).reshape(self.n_workers)
+        self._rewards[step] = torch.as_tensor(rewards, dtype=self._rewards.dtype).reshape(self.n_workers)
+        self._dones[step] = torch.as_tensor(dones, dtype=self._dones.dtype).reshape(self.n_workers)
+
+        if values is not None:
+            self._values[step] = values.reshape(self.n_workers)
+
+        if logprobs is not None:
+            self._logprobs[step] = logprobs.reshape(self.n_workers)
+
+        if entropies is not None:
+            self._entropies[step] = entropies.reshape(self.n_workers)
+
+        self.step += 1
+
+    def reset(self) -> None:
+        """Reset the storage so that the next rollout is written from
+        the first step. The tensors are not reallocated
+
+        Returns
+        -------
+
+        None
+        """
+
+        self.step = 0
+
+        # the storage was part of the graph of the
+        # previous rollout. Keep the memory but not the graph
+        self._values = self._values.detach()
+        self._logprobs = self._logprobs.detach()
+        self._entropies = self._entropies.detach()
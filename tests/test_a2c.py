@@ -0,0 +1,248 @@
+"""
+Unit tests for A2C
+"""
+import copy
+import unittest
+import pytest
+import numpy as np
+import torch
+
+from src.algorithms.a2c import A2C, A2CConfig, calculate_discounted_returns, calculate_gae
+from src.exceptions.exceptions import InvalidParamValue
+from src.maths.pytorch_optimizer_config import PyTorchOptimizerConfig
+from src.networks.a2c_networks import A2CNetSimpleLinear
+from src.spaces.multiprocess_env import MultiprocessEnv
+from src.spaces.time_step import TimeStep, StepType, VectorTimeStep
+from .test_multiprocess_env import CountingEnv
+
+
+class DummyVectorEnv(object):
+
+    def __init__(self, n_workers: int, n_columns: int, n_steps: int):
+        self.n_workers = n_workers
+        self.n_columns = n_columns
+        self.n_steps = n_steps
+        self.step_idx = 0
+
+    def _time_step(self, step_type: StepType, reward: float) -> VectorTimeStep:
+        time_step = VectorTimeStep()
+        for worker in range(self.n_workers):
+            time_step.append(TimeStep(step_type=step_type, info={"total_distortion": 0.1}, reward=reward,
+                                      discount=1.0, observation=[float(self.step_idx + worker)] * self.n_columns))
+        return time_step
+
+    def reset(self) -> VectorTimeStep:
+        self.step_idx = 0
+        return self._time_step(step_type=StepType.FIRST, reward=0.0)
+
+    def step(self, actions) -> VectorTimeStep:
+        self.step_idx += 1
+        step_type = StepType.LAST if self.step_idx == self.n_steps else StepType.MID
+        return self._time_step(step_type=step_type, reward=1.0)
+
+
+class CountingSGD(torch.optim.SGD):
+
+    def __init__(self, params, lr: float):
+        super(CountingSGD, self).__init__(params, lr=lr)
+        self.n_steps = 0
+
+    def step(self, closure=None):
+        self.n_steps += 1
+        return super(CountingSGD, self).step(closure)
+
+
+def make_counting_env(options):
+    # the worker with rank r finishes after r + 2 steps
+    return CountingEnv(n_steps=options["rank"] + 2, **options)
+
+
+class TestA2C(unittest.TestCase):
+
+    @staticmethod
+    def _naive_returns(rewards: np.ndarray, gamma: float) -> np.ndarray:
+        total_time = rewards.shape[0]
+        return np.array([[np.sum(gamma ** np.arange(total_time - t) * rewards[t:, w])
+                          for w in range(rewards.shape[1])] for t in range(total_time)])
+
+    def test_calculate_discounted_returns(self):
+        rewards = np.random.default_rng(42).normal(size=(20, 3))
+
+        returns = calculate_discounted_returns(rewards=torch.from_numpy(rewards), gamma=0.9)
+
+        self.assertEqual((20, 3), tuple(returns.shape))
+        np.testing.assert_allclose(self._naive_returns(rewards, gamma=0.9), returns.numpy())
+
+    def test_calculate_discounted_returns_bootstrap(self):
+        rewards = torch.Tensor([[1.0, 0.0], [1.0, 2.0]])
+        dones = torch.Tensor([[0.0, 0.0], [0.0, 1.0]])
+
+        returns = calculate_discounted_returns(rewards=rewards, gamma=0.5,
+                                               bootstrap_values=torch.Tensor([4.0, 4.0]), dones=dones)
+
+        # the second worker is done at the last
+        # step and does not bootstrap
+        np.testing.assert_allclose([[1.0 + 0.5 * 3.0, 1.0], [1.0 + 0.5 * 4.0, 2.0]], returns.numpy())
+
+    def test_calculate_gae(self):
+        generator = np.random.default_rng(42)
+        rewards = generator.normal(size=(15, 2))
+        values = generator.normal(size=(15, 2))
+        bootstrap_values = generator.normal(size=2)
+        gamma, tau = 0.9, 0.7
+
+        gaes = calculate_gae(rewards=torch.from_numpy(rewards), values=torch.from_numpy(values),
+                             gamma=gamma, tau=tau, bootstrap_values=torch.from_numpy(bootstrap_values))
+
+        next_values = np.vstack([values[1:], bootstrap_values])
+        td_errors = rewards + gamma * next_values - values
+        np.testing.assert_allclose(self._naive_returns(td_errors, gamma=gamma * tau), gaes.numpy())
+
+    def test_calculate_gae_with_tau_one(self):
+        generator = np.random.default_rng(42)
+        rewards = torch.from_numpy(generator.normal(size=(10, 2)))
+        values = torch.from_numpy(generator.normal(size=(10, 2)))
+        bootstrap_values = torch.from_numpy(generator.normal(size=2))
+
+        # with tau equal to one the advantages
+        # are the returns minus the values
+        gaes = calculate_gae(rewards=rewards, values=values, gamma=0.9, tau=1.0,
+                             bootstrap_values=bootstrap_values)
+        returns = calculate_discounted_returns(rewards=rewards, gamma=0.9, bootstrap_values=bootstrap_values)
+        np.testing.assert_allclose((returns - values).numpy(), gaes.numpy())
+
+    def test_optimize_model(self):
+        torch.manual_seed(42)
+        n_workers, n_columns, n_actions, total_time = 2, 4, 3, 5
+
+        a2c = A2C(A2CConfig(a2cnet=A2CNetSimpleLinear(n_columns=n_columns, n_actions=n_actions),
+                            n_workers=n_workers, action_sampler=A2C.default_action_sampler))
+        a2c.optimizer = torch.optim.SGD(a2c.parameters(), lr=0.1)
+
+        logprobs, values, entropies = [], [], []
+        for t in range(total_time):
+            act_result = a2c._act(torch.rand(n_workers, n_columns))
+            logprobs.append(act_result.logprobs)
+            values.append(act_result.values)
+            entropies.append(act_result.entropies)
+
+        before = [param.detach().clone() for param in a2c.parameters()]
+        a2c._optimize_model(logprobs=torch.stack(logprobs), values=torch.stack(values),
+                            entropies=torch.stack(entropies), rewards=torch.rand(total_time, n_workers, 1),
+                            dones=torch.zeros(total_time, n_workers),
+                            last_states=np.random.rand(n_workers, n_columns))
+
+        after = list(a2c.parameters())
+        self.assertTrue(any(not torch.equal(b, a) for b, a in zip(before, after)))
+
+    def test_do_train_reuses_rollouts(self):
+        torch.manual_seed(42)
+        env = DummyVectorEnv(n_workers=2, n_columns=4, n_steps=3)
+        a2c = A2C(A2CConfig(a2cnet=A2CNetSimpleLinear(n_columns=4, n_actions=3), n_workers=2,
+                            n_iterations_per_episode=10, action_sampler=A2C.default_action_sampler))
+        a2c.optimizer = torch.optim.SGD(a2c.parameters(), lr=0.1)
+
+        for episode in range(2):
+            episode_info, _ = a2c._do_train(env, episode)
+            rollouts = episode_info.info["buffer"]
+
+            self.assertIs(a2c.rollouts, rollouts)
+            self.assertEqual(3, len(rollouts))
+            self.assertEqual([0.0, 0.0, 1.0], rollouts.dones[:, 0].tolist())
+            self.assertEqual([[0.0] * 4, [1.0] * 4], rollouts.states[0].tolist())
+
+            a2c.actions_after_episode_ends(env, episode, episode_info=episode_info)
+
+    def test_do_train_workers_finish_at_different_steps(self):
+        torch.manual_seed(42)
+        env = MultiprocessEnv(make_counting_env, {}, n_workers=2, observation_size=2)
+        a2c = A2C(A2CConfig(a2cnet=A2CNetSimpleLinear(n_columns=2, n_actions=3), n_workers=2,
+                            n_iterations_per_episode=5, action_sampler=A2C.default_action_sampler))
+        env.make(agent=None)
+
+        try:
+            episode_info, _ = a2c._do_train(env, 0)
+        finally:
+            env.close()
+
+        rollouts = episode_info.info["buffer"]
+
+        # a worker that finishes continues from the reset
+        # state and its returns stop at the episode end
+        self.assertEqual(5, len(rollouts))
+        self.assertEqual([0.0, 1.0, 0.0, 1.0, 0.0], rollouts.states[:, 0, 0].tolist())
+        self.assertEqual([0.0, 1.0, 0.0, 1.0, 0.0], rollouts.dones[:, 0].tolist())
+        self.assertEqual([0.0, 1.0, 2.0, 0.0, 1.0], rollouts.states[:, 1, 0].tolist())
+        self.assertEqual([0.0, 0.0, 1.0, 0.0, 0.0], rollouts.dones[:, 1].tolist())
+        np.testing.assert_array_equal([[1.0, 0.0], [2.0, 1.0]], episode_info.info["last_states"])
+
+    def test_no_grad_rollouts(self):
+        net = A2CNetSimpleLinear(n_columns=4, n_actions=3)
+
+        agents = []
+        for no_grad_rollouts in [False, True]:
+            torch.manual_seed(42)
+            env = DummyVectorEnv(n_workers=2, n_columns=4, n_steps=5)
+            a2c = A2C(A2CConfig(a2cnet=copy.deepcopy(net), n_workers=2, n_iterations_per_episode=10,
+                                action_sampler=A2C.default_action_sampler, no_grad_rollouts=no_grad_rollouts))
+            a2c.optimizer = torch.optim.SGD(a2c.parameters(), lr=0.1)
+
+            episode_info, _ = a2c._do_train(env, 0)
+            a2c.actions_after_episode_ends(env, 0, episode_info=episode_info)
+            agents.append((a2c, episode_info.info["buffer"]))
+
+        (a2c, rollouts), (no_grad_a2c, no_grad_rollouts) = agents
+
+        # only the states and the actions are stored
+        self.assertFalse(no_grad_rollouts.values.requires_grad)
+        self.assertEqual(rollouts.actions.tolist(), no_grad_rollouts.actions.tolist())
+
+        # the recomputed pass gives the same update
+        for param, no_grad_param in zip(a2c.parameters(), no_grad_a2c.parameters()):
+            np.testing.assert_allclose(param.detach().numpy(), no_grad_param.detach().numpy(), rtol=1.0e-5)
+
+    def test_invalid_clip_epsilon(self):
+        env = DummyVectorEnv(n_workers=2, n_columns=4, n_steps=5)
+        a2c = A2C(A2CConfig(a2cnet=A2CNetSimpleLinear(n_columns=4, n_actions=3), n_workers=2, clip_epsilon=0.0,
+                            optimizer_config=PyTorchOptimizerConfig()))
+
+        with pytest.raises(InvalidParamValue) as e:
+            a2c.actions_before_training_begins(env)
+
+        self.assertEqual("InvalidParamValue", e.typename)
+
+    def test_clipped_optimization(self):
+        for no_grad_rollouts in [False, True]:
+            torch.manual_seed(42)
+            env = DummyVectorEnv(n_workers=2, n_columns=4, n_steps=5)
+            a2c = A2C(A2CConfig(a2cnet=A2CNetSimpleLinear(n_columns=4, n_actions=3), n_workers=2,
+                                n_iterations_per_episode=10, action_sampler=A2C.default_action_sampler,
+                                clip_epsilon=0.2, n_epochs=3, batch_size=4, no_grad_rollouts=no_grad_rollouts))
+            a2c.optimizer = CountingSGD(a2c.parameters(), lr=0.1)
+
+            before = [param.detach().clone() for param in a2c.parameters()]
+            episode_info, _ = a2c._do_train(env, 0)
+            a2c.actions_after_episode_ends(env, 0, episode_info=episode_info)
+
+            # 10 samples in minibatches of 4 for 3 epochs
+            self.assertEqual(3 * 3, a2c.optimizer.n_steps)
+            self.assertTrue(any(not torch.equal(b, a) for b, a in zip(before, a2c.parameters())))
+
+    def test_clipped_loss_function(self):
+        a2c = A2C(A2CConfig(clip_epsilon=0.2, policy_loss_weight=1.0, value_loss_weight=0.0))
+
+        # the ratio of the first sample is clipped to 1.2
+        # and the ratio of the second is not clipped
+        advantages = torch.tensor([1.0, -1.0])
+        logprobs = torch.log(torch.tensor([0.6, 0.45]))
+        old_logprobs = torch.log(torch.tensor([0.4, 0.5]))
+
+        loss = a2c._compute_clipped_loss_function(advantages=advantages, logprobs=logprobs,
+                                                  old_logprobs=old_logprobs, returns=torch.zeros(2),
+                                                  values=torch.zeros(2), entropies=torch.zeros(2))
+
+        self.assertAlmostEqual(-(1.2 * 1.0 + 0.9 * -1.0) / 2.0, loss.item(), places=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
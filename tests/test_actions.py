@@ -1,8 +1,9 @@
 import unittest
 import pytest
 import numpy as np
+import pandas as pd
 
-from src.spaces.actions import ActionSuppress, ActionStringGeneralize, ActionIdentity, ActionType
+from src.spaces.actions import ActionSuppress, ActionStringGeneralize, ActionIdentity, ActionType, ActionTransform
 from src.spaces.actions import ActionNumericBinGeneralize, ActionNumericStepGeneralize
 
 
@@ -55,6 +56,38 @@ class TestActions(unittest.TestCase):
         update_data = action.act(**{"data": update_data})
         self.assertEqual(["1", "1", "1"], update_data)
 
+    def test_string_generalization_action_act_categorical(self):
+
+        table = {"col1": "Alex", "col2": "Alex2", "col3": "Alex3",
+                 "Alex": "1", "Alex2": "1", "Alex3": "1", "1": "1"}
+        data = pd.Categorical(["col1", "col2", "col3", "col1"])
+        action = ActionStringGeneralize(column_name="col1", generalization_table=table)
+
+        update_data = action.act(**{"data": data})
+        self.assertEqual(["Alex", "Alex2", "Alex3", "Alex"], list(update_data))
+
+        # act again on the data
+        update_data = action.act(**{"data": update_data})
+        self.assertEqual(["1", "1", "1", "1"], list(update_data))
+
+    def test_string_generalization_action_act_categorical_missing_key(self):
+
+        table = {"col1": "Alex"}
+        data = pd.Categorical(["col1", "col2"])
+        action = ActionStringGeneralize(column_name="col1", generalization_table=table)
+
+        with pytest.raises(KeyError) as e:
+            action.act(**{"data": data})
+
+    def test_suppress_action_act_categorical(self):
+
+        table = {"F": "*", "M": "*", "*": "*"}
+        data = pd.Categorical(["F", "M", "F"])
+        action = ActionSuppress(column_name="gender", suppress_table=table)
+
+        update_data = action.act(**{"data": data})
+        self.assertEqual(["*", "*", "*"], list(update_data))
+
     def test_bin_generalization_action_type(self):
         action = ActionNumericBinGeneralize(column_name="col", generalization_table= [10])
         self.assertEqual("col", action.column_name)
@@ -111,6 +144,40 @@ class TestActions(unittest.TestCase):
         with pytest.raises(ValueError) as execinfo:
             action.act(**{"data": [values[-1]]})
 
+    def test_bin_generalization_action_act_fail_reports_values(self):
+
+        values = [i + 100*i for i in range(10)]
+        bins = np.linspace(values[0], values[-1], 10)
+        action = ActionNumericBinGeneralize(column_name="col", generalization_table=bins)
+
+        with pytest.raises(ValueError) as execinfo:
+            action.act(**{"data": np.array([5.0, -1.0, 10.0, 2000.0])})
+
+        self.assertIn("-1.0", str(execinfo.value))
+        self.assertIn("2000.0", str(execinfo.value))
+
+    def test_bin_generalization_action_act_in_place(self):
+
+        values = [i + 100*i for i in range(10)]
+        bins = np.linspace(values[0], values[-1], 10)
+        action = ActionNumericBinGeneralize(column_name="col", generalization_table=bins)
+
+        data = np.array([5.0, 150.0, 850.0])
+        new_data = action.act(**{"data": data})
+
+        self.assertIs(data, new_data)
+        self.assertEqual([50.5, 151.5, 858.5], list(new_data))
+
+    def test_transform_action_act(self):
+        action = ActionTransform(column_name="col1", transform_value="*")
+
+        data = np.array(["a", "b", "c"], dtype=object)
+        new_data = action.act(**{"data": data})
+        self.assertEqual(["*", "*", "*"], list(new_data))
+
+        new_data = action.act(**{"data": pd.Categorical(["a", "b", "a"])})
+        self.assertEqual(["*", "*", "*"], list(new_data))
+
     def test_bin_generalization_action_act(self):
 
         values = [i + 100*i for i in range(10)]
@@ -0,0 +1,92 @@
+"""
+Unit tests for BatchedDiscreteStateEnvironment
+"""
+import random
+import unittest
+import pytest
+import numpy as np
+
+from src.spaces.batched_discrete_state_environment import BatchedDiscreteStateEnvironment
+from src.spaces.time_step import StepType
+from src.utils.reward_manager import RewardManager
+from .toy_environment import make_env
+
+
+class _StateRewardManager(RewardManager):
+
+    def get_reward_for_state(self, total_distortion: float, current_state, next_state,
+                             min_dist_bins, **options) -> float:
+        return float(next_state - current_state)
+
+
+class TestBatchedDiscreteStateEnvironment(unittest.TestCase):
+
+    def _assert_same_as_serial(self, reward_manager: RewardManager = None):
+        n_envs = 4
+        envs = [make_env(reward_manager=reward_manager) for _ in range(n_envs)]
+        batched_env = BatchedDiscreteStateEnvironment(env_config=make_env(reward_manager=reward_manager).config,
+                                                      n_envs=n_envs)
+
+        time_step = batched_env.reset()
+        for i, env in enumerate(envs):
+            self.assertEqual(env.reset(), time_step[i])
+
+        rng = random.Random(42)
+        for itr in range(50):
+            actions = [rng.randrange(batched_env.n_actions) for _ in range(n_envs)]
+            time_step = batched_env.step(actions)
+
+            for i, env in enumerate(envs):
+                serial_time_step = env.step(actions[i])
+                self.assertEqual(serial_time_step, time_step[i])
+
+                if serial_time_step.last():
+                    env.reset()
+
+    def test_constructor_throws(self):
+        with pytest.raises(ValueError) as e:
+            BatchedDiscreteStateEnvironment(env_config=make_env().config, n_envs=0)
+
+    def test_step_throws(self):
+        batched_env = BatchedDiscreteStateEnvironment(env_config=make_env().config, n_envs=2)
+        batched_env.reset()
+
+        with pytest.raises(ValueError) as e:
+            batched_env.step([0, 1, 2])
+
+    def test_step(self):
+        self._assert_same_as_serial()
+
+    def test_step_with_derived_reward_manager(self):
+        self._assert_same_as_serial(reward_manager=_StateRewardManager(bounds=(0.5, 0.8), out_of_max_bound_reward=-1.0,
+                                                                       out_of_min_bound_reward=-1.0, in_bounds_reward=5.0,
+                                                                       min_distortions=0.5, max_distortions=0.8,
+                                                                       punish_factor=2.0))
+
+    def test_auto_reset(self):
+        batched_env = BatchedDiscreteStateEnvironment(env_config=make_env().config, n_envs=2)
+        batched_env.reset()
+
+        # generalizing the salary exceeds the maximum distortion
+        time_step = batched_env.step([2, 0])
+        self.assertEqual([True, False], time_step.stack_dones())
+        self.assertEqual([StepType.LAST, StepType.MID], time_step.stack_step_type())
+        self.assertEqual((2, 1), time_step.stack_observations().shape)
+        self.assertEqual((2, 1), time_step.stack_rewards().shape)
+        self.assertEqual([0, 0], list(batched_env.nodes))
+
+    def test_materialize_distorted_data_set(self):
+        batched_env = BatchedDiscreteStateEnvironment(env_config=make_env().config, n_envs=2)
+        batched_env.reset()
+        batched_env.step([1, 0])
+
+        data_set = batched_env.materialize_distorted_data_set(env_idx=0)
+        self.assertEqual(["Alex", "Alex2", "Alex3", "Alex"], list(data_set.get_column(col_name="name")))
+        self.assertEqual(["*", "*", "*", "*"], list(data_set.get_column(col_name="surname")))
+
+        data_set = batched_env.materialize_distorted_data_set(env_idx=1)
+        self.assertEqual(["col1", "col2", "col3", "col1"], list(data_set.get_column(col_name="name")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Unit tests for CopyOnWriteDSWrapper
+"""
+import unittest
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.datasets.dataset_wrapper import PandasDSWrapper, CopyOnWriteDSWrapper
+from src.spaces.actions import ActionTransform, ActionNumericStepGeneralize
+
+
+class TestCopyOnWriteDSWrapper(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.ds = PandasDSWrapper(columns={"name": str, "salary": float})
+        self.ds.ds = pd.DataFrame({"name": ["A", "B", "C"], "salary": [1.0, 2.0, 3.0]})
+
+    def test_shares_columns_before_write(self):
+        view = CopyOnWriteDSWrapper(data_set=self.ds)
+        self.assertFalse(view.is_column_modified(col_name="salary"))
+        self.assertIs(self.ds.ds, view.ds)
+
+    def test_write_does_not_modify_original(self):
+        view = CopyOnWriteDSWrapper(data_set=self.ds)
+
+        view.apply_column_transform(column_name="salary",
+                                    transform=ActionNumericStepGeneralize(column_name="salary", step=1.0))
+        view.apply_column_transform(column_name="name",
+                                    transform=ActionTransform(column_name="name", transform_value="*"))
+
+        self.assertEqual([2.0, 4.0, 6.0], list(view.get_column(col_name="salary").values))
+        self.assertEqual(["*", "*", "*"], list(view.get_column(col_name="name").values))
+        self.assertEqual([1.0, 2.0, 3.0], list(self.ds.get_column(col_name="salary").values))
+        self.assertEqual(["A", "B", "C"], list(self.ds.get_column(col_name="name").values))
+
+    def test_reset(self):
+        view = CopyOnWriteDSWrapper(data_set=self.ds)
+        view.apply_column_transform(column_name="salary",
+                                    transform=ActionNumericStepGeneralize(column_name="salary", step=1.0))
+        view.reset()
+
+        self.assertFalse(view.is_column_modified(col_name="salary"))
+        self.assertEqual([1.0, 2.0, 3.0], list(view.get_column(col_name="salary").values))
+
+    def test_set_column_values(self):
+        view = CopyOnWriteDSWrapper(data_set=self.ds)
+        view.set_column_values(column_name="salary", values=np.array([5.0, 5.0, 5.0]))
+
+        self.assertTrue(view.is_column_modified(col_name="salary"))
+        self.assertEqual([5.0, 5.0, 5.0], list(view.get_column(col_name="salary").values))
+        self.assertEqual([1.0, 2.0, 3.0], list(self.ds.get_column(col_name="salary").values))
+
+    def test_set_column_values_throws(self):
+        view = CopyOnWriteDSWrapper(data_set=self.ds)
+
+        with pytest.raises(ValueError) as e:
+            view.set_column_values(column_name="salary", values=np.array([5.0]))
+
+
+
+if __name__ == '__main__':
+    unittest.main()
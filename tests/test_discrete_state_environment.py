@@ -0,0 +1,79 @@
+"""
+Unit tests for DiscreteStateEnvironment
+"""
+import random
+import unittest
+import pytest
+import pandas as pd
+
+from src.spaces.action_space import ActionSpace
+from src.spaces.actions import ActionIdentity, ActionNumericBinGeneralize, ActionNumericStepGeneralize
+from src.spaces.env_type import DiscreteEnvBackendType
+from .toy_environment import make_env
+
+
+class TestDiscreteStateEnvironment(unittest.TestCase):
+
+    @staticmethod
+    def _play(env, n_steps: int, seed: int = 42) -> list:
+        rng = random.Random(seed)
+
+        time_steps = [env.reset()]
+        for _ in range(n_steps):
+            time_step = env.step(rng.randrange(env.n_actions))
+            time_steps.append(time_step)
+
+            if time_step.done:
+                time_steps.append(env.reset())
+
+        return time_steps
+
+    def test_distortion_cache(self):
+        env = make_env()
+        cached_env = make_env(distortion_cache_size=16)
+
+        # the cache does not change the
+        # rewards or the distortions
+        self.assertEqual(self._play(env, n_steps=50), self._play(cached_env, n_steps=50))
+
+        # column histories repeat across episodes
+        self.assertGreater(cached_env.distortion_cache.hits, 0)
+
+    def test_lazy_backend(self):
+        env = make_env()
+        lazy_env = make_env(backend=DiscreteEnvBackendType.LAZY)
+
+        rng = random.Random(42)
+        time_step, lazy_time_step = env.reset(), lazy_env.reset()
+        for _ in range(50):
+            self.assertEqual(time_step, lazy_time_step)
+            pd.testing.assert_frame_equal(env.distorted_data_set.ds,
+                                          lazy_env.materialize_distorted_data_set().ds)
+
+            if time_step.done:
+                time_step, lazy_time_step = env.reset(), lazy_env.reset()
+            else:
+                action = rng.randrange(env.n_actions)
+                time_step, lazy_time_step = env.step(action), lazy_env.step(action)
+
+    def test_lazy_backend_throws_for_two_distorting_actions(self):
+        action_space = ActionSpace(n=3)
+        action_space.add_many(ActionIdentity(column_name="name"),
+                              ActionNumericBinGeneralize(column_name="salary",
+                                                         generalization_table=[0.0, 5.0, 10.0]),
+                              ActionNumericStepGeneralize(column_name="salary", step=1.0))
+
+        for backend in [DiscreteEnvBackendType.LAZY, DiscreteEnvBackendType.TABLE]:
+            with pytest.raises(ValueError) as e:
+                make_env(action_space=action_space, backend=backend)
+
+            self.assertEqual("The {0} backend supports one distorting action per column but column "
+                             "salary has more than one".format(backend.name), str(e.value))
+
+        # the DATASET backend applies any
+        # number of actions on a column
+        make_env(action_space=action_space)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Unit tests for DistortionCache
+"""
+import unittest
+import pytest
+
+from src.maths.distortion_cache import DistortionCache
+
+
+class TestDistortionCache(unittest.TestCase):
+
+    def test_constructor_throws(self):
+        with pytest.raises(ValueError) as e:
+            DistortionCache(max_size=0)
+
+    def test_hits_and_misses(self):
+        cache = DistortionCache(max_size=2)
+
+        self.assertIsNone(cache.get(("salary", (1,))))
+        cache.put(("salary", (1,)), 0.5)
+        self.assertEqual(0.5, cache.get(("salary", (1,))))
+
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(0.5, cache.hit_rate)
+
+    def test_lru_eviction(self):
+        cache = DistortionCache(max_size=2)
+        cache.put(("salary", (1,)), 0.1)
+        cache.put(("salary", (1, 1)), 0.2)
+
+        # touch the oldest entry so that the
+        # second one is evicted next
+        cache.get(("salary", (1,)))
+        cache.put(("gender", (2,)), 0.3)
+
+        self.assertEqual(2, len(cache))
+        self.assertTrue(("salary", (1,)) in cache)
+        self.assertFalse(("salary", (1, 1)) in cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
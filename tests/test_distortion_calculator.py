@@ -0,0 +1,35 @@
+"""
+Unit tests for ColumnDistortion
+"""
+import unittest
+import pandas as pd
+
+from src.maths.distortion_calculator import DistortionCalculator, DistortionCalculationType, ColumnDistortion
+from src.maths.numeric_distance_type import NumericDistanceType
+from src.maths.string_distance_calculator import StringDistanceType
+
+
+class TestColumnDistortion(unittest.TestCase):
+
+    def test_string_column_distortion(self):
+        calculator = DistortionCalculator(numeric_column_distortion_metric_type=NumericDistanceType.L2_AVG,
+                                          string_column_distortion_metric_type=StringDistanceType.COSINE,
+                                          dataset_distortion_type=DistortionCalculationType.SUM)
+
+        # a column with few distinct values and
+        # a column where every value is distinct
+        for start_column in [pd.Series(["Male", "Female", "Male", "Male", "*"]),
+                             pd.Series(["id{0}".format(i) for i in range(50)])]:
+            current_column = pd.Series(["*"] * 2 + list(start_column.values[2:]))
+            distortion = ColumnDistortion(start_column=start_column, distortion_calculator=calculator,
+                                          datatype='str')
+
+            expected = calculator.calculate("".join(current_column.values), "".join(start_column.values), 'str')
+            self.assertAlmostEqual(expected, distortion(current_column))
+
+            # the counts of the original column are reused
+            self.assertAlmostEqual(expected, distortion(current_column))
+
+
+if __name__ == '__main__':
+    unittest.main()
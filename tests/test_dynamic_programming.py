@@ -0,0 +1,61 @@
+"""
+Unit tests for DPSolver
+"""
+import unittest
+import pytest
+import numpy as np
+
+from src.algorithms.dynamic_programming import DPSolver, DPSolverConfig, DPSolverMethod
+from src.exceptions.exceptions import InvalidParamValue
+from src.spaces.env_type import DiscreteEnvBackendType
+from .toy_environment import make_env, make_data_set
+
+
+class TestDPSolver(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.env = make_env(data_set=make_data_set(with_identifying_column=False), max_total_distortion=0.8,
+                            n_rounds_below_min_distortion=10, backend=DiscreteEnvBackendType.TABLE)
+
+    def test_solve_throws_for_invalid_method(self):
+        solver = DPSolver(algo_config=DPSolverConfig(method=DPSolverMethod.INVALID))
+
+        with pytest.raises(InvalidParamValue) as e:
+            solver.solve(env=self.env)
+
+    def test_value_and_policy_iteration_agree(self):
+        value_solver = DPSolver(algo_config=DPSolverConfig(gamma=0.9, method=DPSolverMethod.VALUE_ITERATION))
+        policy_solver = DPSolver(algo_config=DPSolverConfig(gamma=0.9, method=DPSolverMethod.POLICY_ITERATION))
+
+        value_q_table = value_solver.solve(env=self.env)
+        policy_q_table = policy_solver.solve(env=self.env)
+
+        self.assertEqual(value_q_table.keys(), policy_q_table.keys())
+        for key in value_q_table:
+            self.assertAlmostEqual(value_q_table[key], policy_q_table[key], places=5)
+
+    def test_bellman_equation(self):
+        solver = DPSolver(algo_config=DPSolverConfig(gamma=0.9))
+        solver.solve(env=self.env)
+
+        lattice = solver.lattice
+        for node in range(lattice.n_nodes):
+            for action in range(lattice.n_actions):
+                next_node = lattice.step(node=node, action=action)
+                expected = solver.rewards[node, action]
+                if not solver.dones[node, action]:
+                    expected += 0.9 * np.max(solver.node_q_values[next_node])
+
+                self.assertAlmostEqual(expected, solver.node_q_values[node, action], places=5)
+
+    def test_q_table_covers_state_space(self):
+        solver = DPSolver(algo_config=DPSolverConfig(gamma=0.9))
+        q_table = solver.solve(env=self.env)
+
+        for state in range(1, self.env.n_states + 1):
+            for action in range(self.env.n_actions):
+                self.assertIn((state, action), q_table)
+
+
+if __name__ == '__main__':
+    unittest.main()
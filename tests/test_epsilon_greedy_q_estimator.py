@@ -1,8 +1,22 @@
 import unittest
 import pytest
+import numpy as np
 
 from src.algorithms.epsilon_greedy_q_estimator import EpsilonGreedyQEstimator, EpsilonGreedyQEstimatorConfig
 from src.exceptions.exceptions import InvalidParamValue
+from src.spaces.tiled_environment import TiledEnv, TiledEnvConfig
+from src.spaces.state import State
+from .toy_environment import make_env
+
+
+class DummyEnv(object):
+
+    def __init__(self):
+        self.column_names = ["col1", "col2"]
+        self.action_space = [0, 1, 2]
+
+    def n_quasi_identifying_columns(self) -> int:
+        return len(self.column_names)
 
 
 class TestEpsilonGreedyQEstimator(unittest.TestCase):
@@ -24,6 +38,126 @@ class TestEpsilonGreedyQEstimator(unittest.TestCase):
         with pytest.raises(InvalidParamValue) as e:
             eps_q_estimator.q_hat_value(None)
 
+    def test_q_hat_values(self):
+
+        tiled_env = TiledEnv(TiledEnvConfig(n_layers=3, n_bins=4, env=DummyEnv(),
+                                            column_ranges={"col1": [0.0, 1.0], "col2": [0.0, 1.0]}))
+        tiled_env.create_tiles()
+
+        eps_q_estimator_config = EpsilonGreedyQEstimatorConfig(n_actions=tiled_env.n_actions, env=tiled_env)
+        eps_q_estimator = EpsilonGreedyQEstimator(eps_q_estimator_config)
+        eps_q_estimator.weights = np.arange(tiled_env.n_features, dtype=np.float64)
+
+        state = State()
+        state.column_distortions = {"col1": 0.3, "col2": 0.6}
+
+        q_values = eps_q_estimator.q_hat_values(state=state)
+        for action in range(tiled_env.n_actions):
+            active_tiles = tiled_env.featurize_state_action(state=state, action=action)
+            self.assertEqual(eps_q_estimator.q_hat_value(active_tiles), q_values[action])
+
+    def test_state_action_features_cache(self):
+
+        tiled_env = TiledEnv(TiledEnvConfig(n_layers=3, n_bins=4, env=DummyEnv(),
+                                            column_ranges={"col1": [0.0, 1.0], "col2": [0.0, 1.0]}))
+        tiled_env.create_tiles()
+
+        eps_q_estimator_config = EpsilonGreedyQEstimatorConfig(n_actions=tiled_env.n_actions, env=tiled_env)
+        eps_q_estimator = EpsilonGreedyQEstimator(eps_q_estimator_config)
+
+        states = [State() for _ in range(3)]
+        for i, state in enumerate(states):
+            state.column_distortions = {"col1": 0.1 * i, "col2": 0.2}
+
+        features0 = eps_q_estimator.state_action_features(state=states[0])
+        features1 = eps_q_estimator.state_action_features(state=states[1])
+
+        # the last two states are cached
+        self.assertIs(features0, eps_q_estimator.state_action_features(state=states[0]))
+        self.assertIs(features1, eps_q_estimator.state_action_features(state=states[1]))
+
+        # a third state evicts the oldest one
+        eps_q_estimator.state_action_features(state=states[2])
+        self.assertIsNot(features0, eps_q_estimator.state_action_features(state=states[0]))
+
+    def test_on_state_explore(self):
+
+        tiled_env = TiledEnv(TiledEnvConfig(n_layers=3, n_bins=4, env=DummyEnv(),
+                                            column_ranges={"col1": [0.0, 1.0], "col2": [0.0, 1.0]}))
+        tiled_env.create_tiles()
+
+        eps_q_estimator_config = EpsilonGreedyQEstimatorConfig(eps=1.0, n_actions=tiled_env.n_actions, env=tiled_env)
+        eps_q_estimator = EpsilonGreedyQEstimator(eps_q_estimator_config)
+
+        state = State()
+        state.column_distortions = {"col1": 0.3, "col2": 0.6}
+
+        action = eps_q_estimator.on_state(state)
+        self.assertTrue(0 <= action < tiled_env.n_actions)
+
+        # random actions do not need the q-values
+        self.assertEqual(0, len(eps_q_estimator._features_cache))
+
+    def test_on_state_greedy(self):
+
+        tiled_env = TiledEnv(TiledEnvConfig(n_layers=3, n_bins=4, env=DummyEnv(),
+                                            column_ranges={"col1": [0.0, 1.0], "col2": [0.0, 1.0]}))
+        tiled_env.create_tiles()
+
+        eps_q_estimator_config = EpsilonGreedyQEstimatorConfig(eps=0.0, n_actions=tiled_env.n_actions, env=tiled_env)
+        eps_q_estimator = EpsilonGreedyQEstimator(eps_q_estimator_config)
+
+        state = State()
+        state.column_distortions = {"col1": 0.3, "col2": 0.6}
+
+        # make the last action the best one
+        eps_q_estimator.weights[eps_q_estimator.state_action_features(state=state)[-1]] = 1.0
+        self.assertEqual(tiled_env.n_actions - 1, eps_q_estimator.on_state(state))
+
+    def test_state_action_features_after_step(self):
+
+        tiled_env = TiledEnv(TiledEnvConfig(n_layers=3, n_bins=4, env=make_env(),
+                                            column_ranges={"name": [0.0, 1.0], "salary": [0.0, 2.0]}))
+        tiled_env.create_tiles()
+
+        eps_q_estimator_config = EpsilonGreedyQEstimatorConfig(eps=0.0, n_actions=tiled_env.n_actions, env=tiled_env)
+        eps_q_estimator = EpsilonGreedyQEstimator(eps_q_estimator_config)
+
+        state = tiled_env.reset().observation
+        expected = tiled_env.featurize_state_actions(state=state)
+
+        # the action distorts salary. The state observed
+        # before the step keeps its distortions
+        next_state = tiled_env.step(2).observation
+        self.assertEqual(0.0, state.column_distortions["salary"])
+        self.assertNotEqual(0.0, next_state.column_distortions["salary"])
+
+        # the update for the state uses the features before the step
+        np.testing.assert_array_equal(expected, eps_q_estimator.state_action_features(state=state))
+        self.assertFalse(np.array_equal(expected, eps_q_estimator.state_action_features(state=next_state)))
+
+    def test_explore_and_greedy_update_features(self):
+
+        update_features = []
+        for eps in [0.0, 1.0]:
+            tiled_env = TiledEnv(TiledEnvConfig(n_layers=3, n_bins=4, env=make_env(),
+                                                column_ranges={"name": [0.0, 1.0], "salary": [0.0, 2.0]}))
+            tiled_env.create_tiles()
+
+            eps_q_estimator_config = EpsilonGreedyQEstimatorConfig(eps=eps, n_actions=tiled_env.n_actions,
+                                                                   env=tiled_env)
+            eps_q_estimator = EpsilonGreedyQEstimator(eps_q_estimator_config)
+
+            # only the greedy step featurizes the state before the step
+            state = tiled_env.reset().observation
+            eps_q_estimator.on_state(state)
+            self.assertEqual(eps == 0.0, len(eps_q_estimator._features_cache) == 1)
+
+            tiled_env.step(2)
+            update_features.append(eps_q_estimator.state_action_features(state=state))
+
+        np.testing.assert_array_equal(update_features[0], update_features[1])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit tests for GeneralizationLattice
+"""
+import unittest
+import tempfile
+import pytest
+import numpy as np
+from pathlib import Path
+
+from src.spaces.generalization_lattice import GeneralizationLattice
+from .toy_environment import make_data_set, make_action_space, make_distortion_calculator
+
+
+class TestGeneralizationLattice(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.ds = make_data_set(with_identifying_column=False)
+        self.action_space = make_action_space()
+        self.distortion_calculator = make_distortion_calculator()
+
+    def _build(self, n_processes: int = 1) -> GeneralizationLattice:
+        return GeneralizationLattice.build(data_set=self.ds, action_space=self.action_space,
+                                           distortion_calculator=self.distortion_calculator,
+                                           n_processes=n_processes)
+
+    def test_build_throws_for_unbounded_chain(self):
+
+        with pytest.raises(ValueError) as e:
+            GeneralizationLattice.build(data_set=self.ds, action_space=self.action_space,
+                                        distortion_calculator=self.distortion_calculator, max_level=1)
+
+    def test_build(self):
+        lattice = self._build()
+
+        # name has three levels and salary two
+        self.assertEqual(["name", "salary"], lattice.column_names)
+        self.assertEqual((3, 2), lattice.shape)
+        self.assertEqual(6, lattice.n_nodes)
+        self.assertEqual(3, lattice.n_actions)
+
+        node = 0
+        self.assertEqual(0.0, lattice.column_distortion(node=node, column_name="name"))
+
+        # the identity action does not move
+        self.assertEqual(node, lattice.step(node=node, action=0))
+
+        node = lattice.step(node=node, action=1)
+        node = lattice.step(node=node, action=1)
+        node = lattice.step(node=node, action=1)
+        node = lattice.step(node=node, action=2)
+        self.assertEqual(lattice.node(levels=(2, 1)), node)
+        self.assertEqual(lattice.node(levels=(5, 5)), node)
+        self.assertEqual(node, lattice.step(node=node, action=2))
+        self.assertNotEqual(0.0, lattice.column_distortion(node=node, column_name="salary"))
+
+    def test_build_with_processes(self):
+        lattice = self._build()
+        parallel_lattice = self._build(n_processes=2)
+
+        self.assertTrue(np.array_equal(lattice.successors, parallel_lattice.successors))
+        self.assertTrue(np.array_equal(lattice.column_distortions, parallel_lattice.column_distortions))
+
+    def test_save_and_load(self):
+        lattice = self._build()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = Path(tmp_dir) / "lattice.npz"
+            lattice.save(filename=filename)
+            loaded = GeneralizationLattice.load(filename=filename)
+
+        self.assertEqual(lattice.column_names, loaded.column_names)
+        self.assertTrue(np.array_equal(lattice.successors, loaded.successors))
+        self.assertTrue(np.array_equal(lattice.column_distortions, loaded.column_distortions))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Unit tests for ColumnGeneralizationLevels
+"""
+import unittest
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.spaces.actions import ActionStringGeneralize, ActionNumericBinGeneralize
+from src.spaces.generalization_levels import ColumnGeneralizationLevels
+
+
+class TestColumnGeneralizationLevels(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.table = {"col1": "Alex", "col2": "Alex2", "col3": "Alex3",
+                      "Alex": "1", "Alex2": "1", "Alex3": "1", "1": "1"}
+        self.column = pd.Series(np.array(["col1", "col2", "col3", "col1"], dtype=object), name="names")
+
+    def test_distortion_throws(self):
+        action = ActionStringGeneralize(column_name="names", generalization_table=self.table)
+        levels = ColumnGeneralizationLevels(column=self.column, action=action,
+                                            distortion_func=lambda column: 0.0)
+
+        with pytest.raises(ValueError) as e:
+            levels.distortion(level=-1)
+
+    def test_levels_are_lazy(self):
+        n_calls = []
+
+        def distortion_func(column):
+            n_calls.append(list(column))
+            return float(len(n_calls))
+
+        action = ActionStringGeneralize(column_name="names", generalization_table=self.table)
+        levels = ColumnGeneralizationLevels(column=self.column, action=action,
+                                            distortion_func=distortion_func)
+
+        self.assertEqual(0.0, levels.distortion(level=0))
+        self.assertEqual(0, len(n_calls))
+
+        self.assertEqual(1.0, levels.distortion(level=1))
+        self.assertEqual(1.0, levels.distortion(level=1))
+        self.assertEqual([["Alex", "Alex2", "Alex3", "Alex"]], n_calls)
+
+    def test_fixed_level(self):
+        action = ActionStringGeneralize(column_name="names", generalization_table=self.table)
+        levels = ColumnGeneralizationLevels(column=self.column, action=action,
+                                            distortion_func=lambda column: float(column.nunique()))
+
+        # applying the action on level 2 does not change
+        # the column
+        self.assertEqual(1.0, levels.distortion(level=5))
+        self.assertEqual(2, levels.fixed_level)
+        self.assertEqual(3, levels.n_levels)
+        self.assertEqual(["1", "1", "1", "1"], list(levels.values(level=5)))
+
+    def test_values(self):
+        column = pd.Series([1.0, 2.5, 7.0])
+        action = ActionNumericBinGeneralize(column_name="salary", generalization_table=[0.0, 5.0, 10.0])
+        levels = ColumnGeneralizationLevels(column=column, action=action,
+                                            distortion_func=lambda values: 0.5)
+
+        self.assertEqual([2.5, 2.5, 7.5], list(levels.values(level=1)))
+
+        # the original column is never modified
+        self.assertEqual([1.0, 2.5, 7.0], list(column))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+Unit tests for HogwildQLearningTrainer
+"""
+import os
+import unittest
+import pytest
+import numpy as np
+
+from src.algorithms.q_learning import QLearning, QLearnConfig
+from src.policies.epsilon_greedy_policy import EpsilonGreedyPolicy, EpsilonDecayOption
+from src.spaces.env_type import DiscreteEnvType
+from src.trainers.hogwild_q_learning_trainer import HogwildQLearningTrainer, HogwildTrainerConfig
+from .toy_environment import make_env, make_q_learning
+
+
+class FailingQLearning(QLearning):
+
+    def on_episode(self, env, episode_idx: int, **options):
+        raise RuntimeError("worker failure")
+
+
+class ExitingQLearning(QLearning):
+
+    def on_episode(self, env, episode_idx: int, **options):
+        os._exit(3)
+
+
+class TestHogwildQLearningTrainer(unittest.TestCase):
+
+    def test_invalid_n_procs(self):
+        env = make_env()
+        trainer = HogwildQLearningTrainer(env=env, agent=make_q_learning(env),
+                                          config=HogwildTrainerConfig(n_procs=0, n_episodes=2))
+
+        with pytest.raises(ValueError) as e:
+            trainer.train()
+
+    def test_state_space_too_large(self):
+        env = make_env(env_type=DiscreteEnvType.MULTI_COLUMN_STATE)
+        trainer = HogwildQLearningTrainer(env=env, agent=make_q_learning(env),
+                                          config=HogwildTrainerConfig(n_procs=1, n_episodes=2,
+                                                                      max_table_states=len(env.state_space) - 1))
+
+        with pytest.raises(ValueError) as e:
+            trainer.train()
+
+        self.assertEqual("ValueError", e.typename)
+
+    def test_worker_failure(self):
+        for agent_type in [FailingQLearning, ExitingQLearning]:
+            env = make_env()
+            policy = EpsilonGreedyPolicy(eps=0.5, n_actions=env.n_actions, decay_op=EpsilonDecayOption.NONE)
+            agent = agent_type(QLearnConfig(gamma=0.9, alpha=0.1, n_itrs_per_episode=10, policy=policy))
+            trainer = HogwildQLearningTrainer(env=env, agent=agent,
+                                              config=HogwildTrainerConfig(n_procs=2, n_episodes=2))
+
+            # the trainer raises instead of waiting for a result
+            with pytest.raises(RuntimeError) as e:
+                trainer.train()
+
+            self.assertEqual("RuntimeError", e.typename)
+            if agent_type is FailingQLearning:
+                self.assertIn("worker failure", str(e.value))
+
+    def test_train(self):
+
+        for env_type in [DiscreteEnvType.TOTAL_DISTORTION_STATE, DiscreteEnvType.MULTI_COLUMN_STATE]:
+            env = make_env(env_type=env_type)
+            agent = make_q_learning(env)
+            trainer = HogwildQLearningTrainer(env=env, agent=agent,
+                                              config=HogwildTrainerConfig(n_procs=2, n_episodes=5))
+            trainer.train()
+
+            # every worker reports every episode
+            self.assertEqual(2, len(trainer.episode_infos))
+            for episode_infos in trainer.episode_infos:
+                self.assertEqual(5, len(episode_infos))
+            self.assertTrue(np.all(trainer.iterations_per_episode > 0))
+
+            # the workers have written the table of the agent
+            self.assertTrue(np.any(agent.q_table.values != 0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
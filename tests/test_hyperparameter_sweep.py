@@ -0,0 +1,133 @@
+"""
+Unit tests for HyperparameterSweep
+"""
+import os
+import tempfile
+import unittest
+import pytest
+import pandas as pd
+
+from src.algorithms.q_learning import QLearnConfig
+from src.trainers.hyperparameter_sweep import HyperparameterSweep, SweepConfig, SweepMethod, \
+    replace_config_fields, grid_parameters, random_parameters
+from .toy_environment import make_data_set, build_q_learning
+
+
+class TestHyperparameterSweep(unittest.TestCase):
+
+    def test_replace_config_fields(self):
+        config = QLearnConfig(gamma=0.9, alpha=0.1)
+        new_config = replace_config_fields(config, {"agent.alpha": 0.5, "env.n_states": 3}, "agent")
+
+        self.assertEqual(0.5, new_config.alpha)
+        self.assertEqual(0.9, new_config.gamma)
+        self.assertEqual(0.1, config.alpha)
+
+    def test_replace_config_fields_invalid_field(self):
+        with pytest.raises(ValueError) as e:
+            replace_config_fields(QLearnConfig(), {"agent.n_states": 3}, "agent")
+
+        self.assertEqual("ValueError", e.typename)
+
+    def test_grid_parameters(self):
+        params = grid_parameters(param_space={"agent.alpha": [0.1, 0.2], "policy.eps": [0.5, 1.0, 2.0]})
+
+        self.assertEqual(6, len(params))
+        self.assertEqual({"agent.alpha": 0.1, "policy.eps": 0.5}, params[0])
+        self.assertEqual({"agent.alpha": 0.1, "policy.eps": 1.0}, params[1])
+        self.assertEqual({"agent.alpha": 0.2, "policy.eps": 2.0}, params[-1])
+
+    def test_grid_parameters_with_distribution(self):
+        with pytest.raises(ValueError) as e:
+            grid_parameters(param_space={"agent.alpha": lambda rng: rng.uniform(0.0, 1.0)})
+
+        self.assertEqual("ValueError", e.typename)
+
+    def test_random_parameters(self):
+        param_space = {"agent.alpha": lambda rng: rng.uniform(0.01, 0.5), "env.n_states": [5, 10]}
+        params = random_parameters(param_space=param_space, n_samples=4, seed=42)
+
+        self.assertEqual(4, len(params))
+        for run_params in params:
+            self.assertTrue(0.01 <= run_params["agent.alpha"] <= 0.5)
+            self.assertIn(run_params["env.n_states"], [5, 10])
+
+        # the same seed gives the same parameter sets
+        self.assertEqual(params, random_parameters(param_space=param_space, n_samples=4, seed=42))
+
+    def test_run(self):
+        sweep = HyperparameterSweep(data_set=make_data_set(), builder=build_q_learning,
+                                    param_space={"agent.alpha": [0.1, 0.5], "env.n_states": [5, 10]},
+                                    config=SweepConfig(method=SweepMethod.GRID, n_procs=2, n_episodes=3))
+        sweep.run()
+
+        self.assertEqual(4 * 3, len(sweep.results))
+        self.assertEqual([0, 1, 2, 3], sorted(sweep.results["run_idx"].unique().tolist()))
+        self.assertEqual([0.1, 0.1, 0.5, 0.5], sweep.results.groupby("run_idx")["agent.alpha"].first().tolist())
+
+        summary = sweep.summary(n_last_episodes=2)
+        self.assertEqual(4, len(summary))
+        self.assertTrue(summary["total_reward"].is_monotonic_decreasing)
+
+    def test_run_is_reproducible(self):
+        config = SweepConfig(method=SweepMethod.GRID, n_procs=1, n_episodes=3, seed=7)
+        param_space = {"policy.eps": [0.1, 0.9]}
+
+        first = HyperparameterSweep(data_set=make_data_set(), builder=build_q_learning,
+                                    param_space=param_space, config=config)
+        first.run()
+
+        second = HyperparameterSweep(data_set=make_data_set(), builder=build_q_learning,
+                                     param_space=param_space, config=config)
+        second.run()
+
+        pd.testing.assert_frame_equal(first.results, second.results)
+
+    def test_run_resumes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results_file = os.path.join(tmp_dir, "results.csv")
+            param_space = {"agent.alpha": [0.1, 0.5, 0.9]}
+
+            # a sweep that finished only the first run
+            interrupted = HyperparameterSweep(data_set=make_data_set(), builder=build_q_learning,
+                                              param_space={"agent.alpha": [0.1]},
+                                              config=SweepConfig(n_episodes=2, results_file=results_file))
+            interrupted.run()
+            self.assertEqual({0}, interrupted.completed_runs())
+
+            sweep = HyperparameterSweep(data_set=make_data_set(), builder=build_q_learning,
+                                        param_space=param_space,
+                                        config=SweepConfig(n_episodes=2, results_file=results_file))
+            sweep.run()
+
+            self.assertEqual({0, 1, 2}, sweep.completed_runs())
+            self.assertEqual(3 * 2, len(pd.read_csv(results_file)))
+            self.assertEqual([0.1, 0.5, 0.9], sweep.results.groupby("run_idx")["agent.alpha"].first().tolist())
+
+    def test_run_resumes_other_sweep(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results_file = os.path.join(tmp_dir, "results.csv")
+
+            previous = HyperparameterSweep(data_set=make_data_set(), builder=build_q_learning,
+                                           param_space={"agent.alpha": [0.1]},
+                                           config=SweepConfig(n_episodes=2, results_file=results_file))
+            previous.run()
+
+            # run 0 of the file has different parameter values or
+            # different parameters than run 0 of the sweep
+            for param_space in [{"agent.alpha": [0.5, 0.9]}, {"policy.eps": [0.1, 0.5]}]:
+                sweep = HyperparameterSweep(data_set=make_data_set(), builder=build_q_learning,
+                                            param_space=param_space,
+                                            config=SweepConfig(n_episodes=2, results_file=results_file))
+
+                with pytest.raises(ValueError) as e:
+                    sweep.run()
+
+                self.assertEqual("ValueError", e.typename)
+
+            # the file is left as it was
+            self.assertEqual(2, len(pd.read_csv(results_file)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Unit tests for MultiColumnStateSpace
+"""
+import unittest
+import pytest
+
+from src.spaces.multi_column_state_space import MultiColumnStateSpace
+
+
+class TestMultiColumnStateSpace(unittest.TestCase):
+
+    def test_constructor_throws(self):
+
+        with pytest.raises(ValueError) as e:
+            MultiColumnStateSpace(n_columns=0, n_bins=10)
+
+        with pytest.raises(ValueError) as e:
+            MultiColumnStateSpace(n_columns=3, n_bins=0)
+
+    def test_len(self):
+        state_space = MultiColumnStateSpace(n_columns=8, n_bins=11)
+        self.assertEqual(11 ** 8, len(state_space))
+
+    def test_index_and_state(self):
+        state_space = MultiColumnStateSpace(n_columns=3, n_bins=11)
+
+        self.assertEqual(0, state_space.index((0, 0, 0)))
+        self.assertEqual(1 * 121 + 2 * 11 + 10, state_space.index((1, 2, 10)))
+        self.assertEqual((1, 2, 10), state_space.state(idx=1 * 121 + 2 * 11 + 10))
+        self.assertEqual((10, 10, 10), state_space[len(state_space) - 1])
+
+        for idx, state in enumerate(state_space):
+            self.assertEqual(idx, state_space.index(state))
+
+    def test_index_throws(self):
+        state_space = MultiColumnStateSpace(n_columns=3, n_bins=11)
+
+        with pytest.raises(ValueError) as e:
+            state_space.index((1, 2))
+
+        with pytest.raises(ValueError) as e:
+            state_space.index((1, 2, 11))
+
+        with pytest.raises(IndexError) as e:
+            state_space.state(idx=len(state_space))
+
+    def test_contains(self):
+        state_space = MultiColumnStateSpace(n_columns=8, n_bins=11)
+
+        self.assertIn((10, 1, 2, 3, 4, 5, 6, 7), state_space)
+        self.assertNotIn((1, 2, 3), state_space)
+        self.assertNotIn((-1, 1, 2, 3, 4, 5, 6, 7), state_space)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import pytest
+import numpy as np
 
 from src.spaces import MultiprocessEnv, TimeStep, StepType
 
@@ -23,12 +24,45 @@ class DummyEnv(object):
         return time_step
 
 
+class CountingEnv(object):
+
+    def __init__(self, rank: int, n_steps: int = 2, **options):
+        self.rank = rank
+        self.n_steps = n_steps
+        self.step_idx = 0
+
+    def close(self, **kwargs):
+        pass
+
+    def _time_step(self, step_type: StepType, reward: float) -> TimeStep:
+        return TimeStep(step_type=step_type, reward=reward, observation=[float(self.step_idx), float(self.rank)],
+                        info={"total_distortion": 0.1 * self.step_idx}, discount=0.9)
+
+    def step(self, action: int) -> TimeStep:
+        self.step_idx += 1
+        step_type = StepType.LAST if self.step_idx == self.n_steps else StepType.MID
+        return self._time_step(step_type=step_type, reward=float(action))
+
+    def reset(self, **kwargs) -> TimeStep:
+        self.step_idx = 0
+        return self._time_step(step_type=StepType.FIRST, reward=0.0)
+
+
 class TestMultiprocessEnv(unittest.TestCase):
 
     @staticmethod
     def make_environment(options):
         return DummyEnv(**options)
 
+    @staticmethod
+    def make_counting_environment(options):
+        return CountingEnv(**options)
+
+    @staticmethod
+    def make_uneven_counting_environment(options):
+        # the worker with rank r finishes after r + 1 steps
+        return CountingEnv(n_steps=options["rank"] + 1, **options)
+
     def test_make(self):
         options = {}
         multiproc_env = MultiprocessEnv(TestMultiprocessEnv.make_environment, options, n_workers=2)
@@ -73,6 +107,107 @@ class TestMultiprocessEnv(unittest.TestCase):
         multiproc_env.close()
         self.assertEqual(len(multiproc_env), len(time_step))
 
+    def test_shared_reset(self):
+        multiproc_env = MultiprocessEnv(TestMultiprocessEnv.make_counting_environment, {},
+                                        n_workers=2, observation_size=2)
+        multiproc_env.make(agent=None)
+
+        try:
+            time_step = multiproc_env.reset()
+        finally:
+            multiproc_env.close()
+
+        self.assertEqual(2, len(time_step))
+        self.assertEqual(StepType.FIRST, time_step[0].step_type)
+        np.testing.assert_array_equal([[0.0, 0.0], [0.0, 1.0]], time_step.stack_observations())
+
+    def test_shared_step(self):
+        multiproc_env = MultiprocessEnv(TestMultiprocessEnv.make_counting_environment, {},
+                                        n_workers=2, observation_size=2)
+        multiproc_env.make(agent=None)
+
+        try:
+            multiproc_env.reset()
+            first = multiproc_env.step([3, 4])
+            second = multiproc_env.step(np.array([1, 2]))
+
+            # the first step is still valid after the second
+            np.testing.assert_array_equal([[1.0, 0.0], [1.0, 1.0]], first.stack_observations())
+            np.testing.assert_array_equal([3.0, 4.0], first.rewards)
+            self.assertEqual(0.9, first[0].discount)
+
+            # the workers finish their episode on the second step
+            # and continue from the reset observation
+            self.assertTrue(second.done)
+            self.assertEqual([StepType.LAST, StepType.LAST], second.stack_step_type())
+            np.testing.assert_array_equal([[0.0, 0.0], [0.0, 1.0]], second.stack_observations())
+            np.testing.assert_array_equal([[2.0, 0.0], [2.0, 1.0]], second.final_observations)
+            np.testing.assert_allclose([0.2, 0.2], second.stack_total_distortion())
+
+            third = multiproc_env.step([5, 6])
+        finally:
+            multiproc_env.close()
+
+        self.assertEqual([StepType.MID, StepType.MID], third.stack_step_type())
+        np.testing.assert_array_equal([[1.0, 0.0], [1.0, 1.0]], third.stack_observations())
+
+        # the time step views the shared memory
+        self.assertTrue(np.shares_memory(third.observations, multiproc_env.shared_buffers.observations.numpy()))
+
+    def test_shared_step_workers_finish_at_different_steps(self):
+        multiproc_env = MultiprocessEnv(TestMultiprocessEnv.make_uneven_counting_environment, {},
+                                        n_workers=2, observation_size=2)
+        multiproc_env.make(agent=None)
+
+        try:
+            multiproc_env.reset()
+            first = multiproc_env.step([1, 1])
+            second = multiproc_env.step([1, 1])
+        finally:
+            multiproc_env.close()
+
+        # only the first worker finishes on the first step
+        self.assertFalse(first.done)
+        self.assertEqual([True, False], first.stack_dones())
+        np.testing.assert_array_equal([[0.0, 0.0], [1.0, 1.0]], first.stack_observations())
+        np.testing.assert_array_equal([[1.0, 0.0], [1.0, 1.0]], first.final_observations)
+
+        # the first worker steps from the reset observation
+        self.assertEqual([True, True], second.stack_dones())
+        np.testing.assert_array_equal([[1.0, 0.0], [2.0, 1.0]], second.final_observations)
+
+    def test_shared_reset_rank(self):
+        multiproc_env = MultiprocessEnv(TestMultiprocessEnv.make_uneven_counting_environment, {},
+                                        n_workers=2, observation_size=2)
+        multiproc_env.make(agent=None)
+
+        try:
+            multiproc_env.reset()
+            multiproc_env.step([1, 1])
+            second = multiproc_env.step([1, 1])
+            reset = multiproc_env.reset(rank=1)
+        finally:
+            multiproc_env.close()
+
+        # resetting a worker does not overwrite
+        # the time step the caller holds
+        self.assertEqual([True, True], second.stack_dones())
+        np.testing.assert_array_equal([[1.0, 0.0], [2.0, 1.0]], second.final_observations)
+
+        self.assertEqual([StepType.LAST, StepType.FIRST], reset.stack_step_type())
+        np.testing.assert_array_equal([[0.0, 0.0], [0.0, 1.0]], reset.stack_observations())
+
+    def test_shared_step_fail(self):
+        multiproc_env = MultiprocessEnv(TestMultiprocessEnv.make_counting_environment, {},
+                                        n_workers=2, observation_size=2)
+        multiproc_env.make(agent=None)
+
+        with pytest.raises(ValueError) as e:
+            multiproc_env.step([1])
+
+        multiproc_env.close()
+        self.assertEqual("Number of actions is not equal to the number of workers", str(e.value))
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
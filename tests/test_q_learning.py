@@ -0,0 +1,95 @@
+"""
+Unit tests for QLearning
+"""
+import random
+import unittest
+import numpy as np
+
+from src.algorithms.q_learning import QLearning
+from src.spaces.batched_discrete_state_environment import BatchedDiscreteStateEnvironment
+from src.spaces.env_type import DiscreteEnvType
+from src.utils.replay_buffer import ReplayBuffer
+from .toy_environment import make_env, make_q_learning
+
+
+class TestQLearning(unittest.TestCase):
+
+    def _make_agent(self, env) -> QLearning:
+        agent = make_q_learning(env)
+        agent.actions_before_training(env)
+        return agent
+
+    def test_update_q_table_batch_single_transition(self):
+        env = make_env()
+        agent = self._make_agent(env)
+        expected = self._make_agent(env)
+
+        agent.q_table[4, 2] = 2.0
+        expected.q_table[4, 2] = 2.0
+
+        agent.update_q_table_batch(states=[3], actions=[1], rewards=[1.5], next_states=[4])
+        expected._update_q_table(state=3, action=1, n_actions=env.n_actions, reward=1.5, next_state=4)
+
+        self.assertAlmostEqual(expected.q_table[3, 1], agent.q_table[3, 1])
+
+    def test_update_q_table_batch_duplicates(self):
+        env = make_env()
+        agent = self._make_agent(env)
+        expected = self._make_agent(env)
+
+        agent.q_table[3, 1] = 1.0
+        expected.q_table[3, 1] = 1.0
+
+        # every target uses the Q-table before the batch so
+        # three equal transitions are three updates to the same target
+        agent.update_q_table_batch(states=[3, 3, 3, 5], actions=[1, 1, 1, 0],
+                                   rewards=[2.0, 2.0, 2.0, -1.0], next_states=[6, 6, 6, 6])
+
+        for _ in range(3):
+            expected.q_table[3, 1] += 0.1 * (2.0 - expected.q_table[3, 1])
+        expected.q_table[5, 0] += 0.1 * (-1.0 - expected.q_table[5, 0])
+
+        self.assertAlmostEqual(expected.q_table[3, 1], agent.q_table[3, 1])
+        self.assertAlmostEqual(expected.q_table[5, 0], agent.q_table[5, 0])
+
+    def test_update_q_table_batch_order(self):
+        env = make_env()
+        agent = self._make_agent(env)
+        reversed_agent = self._make_agent(env)
+
+        states, actions, rewards, next_states = [1, 2, 1, 2], [0, 1, 0, 1], [1.0, -1.0, 3.0, 0.5], [2, 3, 2, 1]
+        agent.update_q_table_batch(states=states, actions=actions, rewards=rewards, next_states=next_states)
+        reversed_agent.update_q_table_batch(states=states[::-1], actions=actions[::-1],
+                                            rewards=rewards[::-1], next_states=next_states[::-1])
+
+        np.testing.assert_allclose(agent.q_table.values, reversed_agent.q_table.values)
+
+    def test_update_q_table_from_experiences(self):
+        env = make_env(env_type=DiscreteEnvType.MULTI_COLUMN_STATE)
+        agent = self._make_agent(env)
+
+        buffer = ReplayBuffer(buffer_size=10)
+        buffer.add(state=(1, 1), action=2, reward=1.0, next_state=(1, 2), done=False)
+        buffer.add(state=(1, 2), action=0, reward=-1.0, next_state=(2, 2), done=True)
+
+        agent.update_q_table_from_experiences(buffer.sample(batch_size=2))
+        self.assertAlmostEqual(0.1, agent.q_table[(1, 1), 2])
+        self.assertAlmostEqual(-0.1, agent.q_table[(1, 2), 0])
+
+    def test_on_episode_batched_env(self):
+        random.seed(42)
+
+        for env_type in [DiscreteEnvType.TOTAL_DISTORTION_STATE, DiscreteEnvType.MULTI_COLUMN_STATE]:
+            batched_env = BatchedDiscreteStateEnvironment(env_config=make_env(env_type=env_type).config,
+                                                          n_envs=8)
+            agent = self._make_agent(batched_env)
+
+            for episode in range(3):
+                episode_info = agent.on_episode(env=batched_env, episode_idx=episode)
+                self.assertEqual(10, episode_info.episode_itrs)
+
+            self.assertTrue(np.any(agent.q_table.values != 0.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
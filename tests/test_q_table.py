@@ -0,0 +1,77 @@
+"""Unit-tests for QTable
+"""
+import unittest
+import pytest
+import numpy as np
+
+from src.utils.q_table import QTable
+from src.utils.mixins import WithMaxActionMixin
+from src.exceptions.exceptions import InvalidParamValue
+
+
+class TestQTable(unittest.TestCase):
+
+    def test_constructor_invalid_n_actions(self):
+
+        with pytest.raises(InvalidParamValue) as e:
+            QTable(n_actions=0)
+
+    def test_integer_states(self):
+
+        q_table = QTable(n_actions=3, n_states=4)
+        self.assertEqual(5 * 3, len(q_table))
+        self.assertIn((4, 2), q_table)
+        self.assertNotIn((5, 0), q_table)
+        self.assertNotIn((1, 3), q_table)
+
+        q_table[2, 1] = 1.5
+        self.assertEqual(1.5, q_table[2, 1])
+        self.assertEqual(1, q_table.max_action(state=2))
+        self.assertEqual(1.5, q_table.max_value(state=2))
+        self.assertEqual([0.0, 1.5, 0.0], q_table.state_values(state=2).tolist())
+
+    def test_tuple_states(self):
+
+        q_table = QTable(n_actions=2)
+        self.assertEqual(0, len(q_table))
+
+        # reading a state does not allocate a row
+        self.assertEqual(0.0, q_table[(1, 2, 3), 1])
+        self.assertNotIn(((1, 2, 3), 1), q_table)
+        self.assertEqual(0, q_table.n_rows)
+
+        q_table[(1, 2, 3), 1] = -2.0
+        self.assertIn(((1, 2, 3), 0), q_table)
+        self.assertEqual(-2.0, q_table[(1, 2, 3), 1])
+        self.assertEqual(0, q_table.max_action(state=(1, 2, 3)))
+        self.assertEqual([((1, 2, 3), 0), ((1, 2, 3), 1)], q_table.keys())
+
+    def test_tuple_states_grow(self):
+
+        q_table = QTable(n_actions=2)
+        n_states = 3 * QTable.INITIAL_CAPACITY
+        for i in range(n_states):
+            q_table[(i, i), i % 2] = float(i)
+
+        self.assertEqual(n_states, q_table.n_rows)
+        for i in range(n_states):
+            self.assertEqual(float(i), q_table[(i, i), i % 2])
+            self.assertEqual(0.0, q_table[(i, i), (i + 1) % 2])
+
+    def test_dtype(self):
+
+        q_table = QTable(n_actions=2, n_states=3, dtype=np.float32)
+        self.assertEqual(np.float32, q_table.values.dtype)
+
+    def test_max_action_mixin(self):
+
+        q_table = QTable(n_actions=3)
+        q_table[(0, 1), 2] = 1.0
+
+        mixin = WithMaxActionMixin(table=q_table)
+        self.assertEqual(2, mixin.max_action(state=(0, 1), n_actions=3))
+        self.assertEqual([0.0, 0.0, 1.0], list(mixin.state_action_values(state=(0, 1), n_actions=3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
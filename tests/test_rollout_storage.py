@@ -0,0 +1,77 @@
+"""
+Unit tests for RolloutStorage
+"""
+import unittest
+import pytest
+import numpy as np
+import torch
+
+from src.exceptions.exceptions import InvalidParamValue
+from src.utils.rollout_storage import RolloutStorage
+
+
+class TestRolloutStorage(unittest.TestCase):
+
+    def test_constructor(self):
+        storage = RolloutStorage(n_steps=5, n_workers=2, state_shape=(3,))
+
+        self.assertEqual(0, len(storage))
+        self.assertEqual((0, 2, 3), tuple(storage.states.shape))
+        self.assertEqual((0, 2), tuple(storage.rewards.shape))
+
+    def test_invalid_n_steps(self):
+        with pytest.raises(InvalidParamValue) as e:
+            RolloutStorage(n_steps=0, n_workers=2, state_shape=(3,))
+
+        self.assertEqual("InvalidParamValue", e.typename)
+
+    def test_insert(self):
+        storage = RolloutStorage(n_steps=5, n_workers=2, state_shape=(3,))
+
+        storage.insert(states=np.ones((2, 3)), actions=torch.tensor([1, 2]), rewards=np.array([[1.0], [2.0]]),
+                       dones=[False, True], values=torch.tensor([[0.5], [0.6]]),
+                       logprobs=torch.tensor([-1.0, -2.0]), entropies=torch.tensor([[0.1], [0.2]]))
+
+        self.assertEqual(1, len(storage))
+        self.assertEqual([1, 2], storage.actions[0].tolist())
+        self.assertEqual([1.0, 2.0], storage.rewards[0].tolist())
+        self.assertEqual([0.0, 1.0], storage.dones[0].tolist())
+        np.testing.assert_allclose([0.5, 0.6], storage.values[0].numpy())
+        np.testing.assert_allclose([0.1, 0.2], storage.entropies[0].numpy())
+
+        # the properties are views of the storage
+        self.assertEqual(storage._rewards.data_ptr(), storage.rewards.data_ptr())
+
+    def test_insert_full(self):
+        storage = RolloutStorage(n_steps=1, n_workers=1, state_shape=(1,))
+        storage.insert(states=[[0.0]], actions=[0], rewards=[1.0], dones=[False])
+
+        self.assertTrue(storage.full())
+        with pytest.raises(ValueError) as e:
+            storage.insert(states=[[0.0]], actions=[0], rewards=[1.0], dones=[False])
+
+        self.assertEqual("ValueError", e.typename)
+
+    def test_backward_after_reset(self):
+        weight = torch.ones(1, requires_grad=True)
+        storage = RolloutStorage(n_steps=3, n_workers=2, state_shape=(1,))
+
+        for rollout in range(2):
+            storage.reset()
+            for step in range(3):
+                storage.insert(states=np.zeros((2, 1)), actions=[0, 0], rewards=[0.0, 0.0], dones=[False, False],
+                               values=weight * torch.tensor([1.0, 2.0]))
+
+            weight.grad = None
+            storage.values.sum().backward()
+            self.assertEqual(9.0, weight.grad.item())
+
+        # reset keeps the memory of the storage
+        data_ptr = storage._values.data_ptr()
+        storage.reset()
+        self.assertEqual(data_ptr, storage._values.data_ptr())
+        self.assertFalse(storage._values.requires_grad)
+
+
+if __name__ == '__main__':
+    unittest.main()
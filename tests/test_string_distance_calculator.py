@@ -0,0 +1,42 @@
+"""
+Unit tests for TextDistanceCalculator
+"""
+import unittest
+import pytest
+
+from src.maths.string_distance_calculator import TextDistanceCalculator, StringDistanceType
+from src.exceptions.exceptions import Error
+
+
+class TestTextDistanceCalculator(unittest.TestCase):
+
+    def test_calculate_from_counts_throws(self):
+        calculator = TextDistanceCalculator(dist_type=StringDistanceType.HAMMING)
+
+        with pytest.raises(Error) as e:
+            calculator.calculate_from_counts(counts1={"Male": 1}, counts2={"Female": 1})
+
+    def test_calculate_from_counts(self):
+
+        column1 = ["Male", "Female", "Male", "Male", "*"]
+        column2 = ["Male", "Female", "Female", "Male", "Female"]
+
+        counts1 = {value: column1.count(value) for value in set(column1)}
+        counts2 = {value: column2.count(value) for value in set(column2)}
+
+        for dist_type in TextDistanceCalculator.COUNTS_DISTANCE_TYPES:
+            calculator = TextDistanceCalculator(dist_type=dist_type)
+            self.assertEqual(calculator.calculate(txt1="".join(column1), txt2="".join(column2)),
+                             calculator.calculate_from_counts(counts1=counts1, counts2=counts2))
+
+    def test_calculate_from_counts_empty(self):
+        calculator = TextDistanceCalculator(dist_type=StringDistanceType.COSINE)
+
+        self.assertEqual(calculator.calculate(txt1="", txt2=""),
+                         calculator.calculate_from_counts(counts1={}, counts2={"": 2}))
+        self.assertEqual(calculator.calculate(txt1="", txt2="Male"),
+                         calculator.calculate_from_counts(counts1={"Male": 0}, counts2={"Male": 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Unit tests for SuccessiveHalving
+"""
+import unittest
+import pytest
+import numpy as np
+import pandas as pd
+
+from src.trainers.hyperparameter_sweep import SweepMethod, init_search_worker
+from src.trainers.successive_halving import SuccessiveHalving, SuccessiveHalvingConfig, \
+    halving_worker, load_checkpoint
+from .toy_environment import make_data_set, build_q_learning
+
+
+class TestSuccessiveHalving(unittest.TestCase):
+
+    def test_rung_episodes(self):
+        search = SuccessiveHalving(data_set=None, builder=build_q_learning, param_space={},
+                                   config=SuccessiveHalvingConfig(min_episodes=10, max_episodes=100,
+                                                                  reduction_factor=3))
+
+        self.assertEqual([10, 30, 90, 100], search.rung_episodes())
+        self.assertEqual(3, search.n_promoted(n_runs=9))
+        self.assertEqual(1, search.n_promoted(n_runs=2))
+
+    def test_invalid_reduction_factor(self):
+        search = SuccessiveHalving(data_set=make_data_set(), builder=build_q_learning,
+                                   param_space={"agent.alpha": [0.1]},
+                                   config=SuccessiveHalvingConfig(reduction_factor=1))
+
+        with pytest.raises(ValueError) as e:
+            search.run()
+
+        self.assertEqual("ValueError", e.typename)
+
+    def test_resume_from_checkpoint(self):
+        data_set = make_data_set()
+        init_search_worker(data_set=data_set, builder=build_q_learning)
+        params = {"policy.eps": 0.5}
+
+        _, _, expected = halving_worker(run_idx=1, params=params, checkpoint=None, n_episodes=4,
+                                        max_episodes=4, seed=42, verbose=False)
+
+        _, checkpoint, _ = halving_worker(run_idx=1, params=params, checkpoint=None, n_episodes=2,
+                                          max_episodes=4, seed=42, verbose=False)
+        _, checkpoint, result = halving_worker(run_idx=1, params=params, checkpoint=checkpoint, n_episodes=4,
+                                               max_episodes=4, seed=42, verbose=False)
+
+        np.testing.assert_array_equal(expected["total_rewards"], result["total_rewards"])
+        np.testing.assert_array_equal(expected["total_distortions"], result["total_distortions"])
+
+        # the checkpoint refers to the data set and does not copy it
+        trainer = load_checkpoint(checkpoint=checkpoint, data_set=data_set)
+        self.assertIs(data_set, trainer.env.config.data_set)
+        self.assertEqual(4, trainer.current_episode)
+
+    def test_checkpoint_size(self):
+        params = {"policy.eps": 0.5}
+
+        sizes = []
+        for n_copies in [1, 1000]:
+            data_set = make_data_set()
+            data_set.ds = pd.concat([data_set.ds] * n_copies, ignore_index=True)
+            init_search_worker(data_set=data_set, builder=build_q_learning)
+
+            _, checkpoint, _ = halving_worker(run_idx=0, params=params, checkpoint=None, n_episodes=2,
+                                              max_episodes=2, seed=42, verbose=False)
+            sizes.append(len(checkpoint))
+
+        # neither the data set nor the columns
+        # derived from it are in the checkpoint
+        self.assertLess(sizes[1], 1.1 * sizes[0])
+
+    def test_run(self):
+        search = SuccessiveHalving(data_set=make_data_set(), builder=build_q_learning,
+                                   param_space={"agent.alpha": [0.1, 0.5], "policy.eps": [0.1, 0.9]},
+                                   config=SuccessiveHalvingConfig(method=SweepMethod.GRID, n_procs=2,
+                                                                  min_episodes=2, max_episodes=8,
+                                                                  reduction_factor=2))
+        search.run()
+
+        # 4 runs at 2 episodes, 2 at 4 episodes and 1 at 8 episodes
+        self.assertEqual([4, 2, 1], search.rung_results.groupby("rung").size().tolist())
+        self.assertEqual(2 + 2 + 4 + 8, len(search.results))
+        self.assertEqual(1, len(search.checkpoints))
+
+        survivors = search.rung_results[search.rung_results["rung"] == 1]["run_idx"].tolist()
+        promoted = search.rung_results[(search.rung_results["rung"] == 0) & search.rung_results["promoted"]]
+        self.assertEqual(sorted(promoted["run_idx"].tolist()), sorted(survivors))
+
+        trainer = search.best_trainer()
+        self.assertEqual(8, trainer.current_episode)
+        self.assertEqual(search.rung_results["run_idx"].iloc[-1], list(search.checkpoints)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,24 @@ from .test_semi_gradient_sarsa import TestSemiGradSARSA
 from .test_actions import TestActions
 from .test_serial_hierarchy import TestSerialHierarchy
 from .test_preprocessor import TestPreprocessor
+from .test_dataset_wrapper import TestCopyOnWriteDSWrapper
+from .test_distortion_cache import TestDistortionCache
+from .test_discrete_state_environment import TestDiscreteStateEnvironment
+from .test_string_distance_calculator import TestTextDistanceCalculator
+from .test_distortion_calculator import TestColumnDistortion
+from .test_generalization_levels import TestColumnGeneralizationLevels
+from .test_generalization_lattice import TestGeneralizationLattice
+from .test_dynamic_programming import TestDPSolver
+from .test_batched_discrete_state_environment import TestBatchedDiscreteStateEnvironment
+from .test_multi_column_state_space import TestMultiColumnStateSpace
+from .test_tile_coding import TestTileCoding
+from .test_q_table import TestQTable
+from .test_q_learning import TestQLearning
+from .test_hogwild_q_learning_trainer import TestHogwildQLearningTrainer
+from .test_hyperparameter_sweep import TestHyperparameterSweep
+from .test_successive_halving import TestSuccessiveHalving
+from .test_a2c import TestA2C
+from .test_rollout_storage import TestRolloutStorage
 
 
 def suite():
@@ -19,6 +37,24 @@ def suite():
     suite.addTest(TestSemiGradSARSA)
     suite.addTest(TestTiledEnv)
     suite.addTest(TestEpsilonGreedyQEstimator)
+    suite.addTest(TestCopyOnWriteDSWrapper)
+    suite.addTest(TestDistortionCache)
+    suite.addTest(TestDiscreteStateEnvironment)
+    suite.addTest(TestTextDistanceCalculator)
+    suite.addTest(TestColumnDistortion)
+    suite.addTest(TestColumnGeneralizationLevels)
+    suite.addTest(TestGeneralizationLattice)
+    suite.addTest(TestDPSolver)
+    suite.addTest(TestBatchedDiscreteStateEnvironment)
+    suite.addTest(TestMultiColumnStateSpace)
+    suite.addTest(TestTileCoding)
+    suite.addTest(TestQTable)
+    suite.addTest(TestQLearning)
+    suite.addTest(TestHogwildQLearningTrainer)
+    suite.addTest(TestHyperparameterSweep)
+    suite.addTest(TestSuccessiveHalving)
+    suite.addTest(TestA2C)
+    suite.addTest(TestRolloutStorage)
     return suite
 
 
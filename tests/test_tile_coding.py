@@ -0,0 +1,67 @@
+"""Unit-tests for the hashed tile coding
+"""
+import unittest
+import pytest
+
+from src.extern.tile_coding import IHT, tiles
+
+
+class TestTileCoding(unittest.TestCase):
+
+    def test_iht_invalid_size(self):
+
+        with pytest.raises(ValueError) as e:
+            IHT(size=0)
+
+    def test_iht_get_index(self):
+
+        iht = IHT(size=2)
+        self.assertEqual(0, iht.get_index((0, 1)))
+        self.assertEqual(1, iht.get_index((0, 2)))
+        self.assertEqual(0, iht.get_index((0, 1)))
+        self.assertTrue(iht.full())
+
+        # new coordinates are hashed into the table
+        index = iht.get_index((0, 3))
+        self.assertTrue(0 <= index < 2)
+        self.assertEqual(1, iht.overfull_count)
+        self.assertEqual(2, iht.count())
+
+    def test_iht_read_only(self):
+
+        iht = IHT(size=2)
+        self.assertIsNone(iht.get_index((0, 1), read_only=True))
+        self.assertEqual(0, iht.count())
+
+    def test_tiles(self):
+
+        iht = IHT(size=1024)
+        active_tiles = tiles(iht, 4, [0.1, 0.2, 0.3, 0.4, 0.5, 0.6], [0])
+
+        # one distinct tile per tiling
+        self.assertEqual(4, len(active_tiles))
+        self.assertEqual(4, len(set(active_tiles)))
+
+        # the same point gives the same tiles
+        self.assertEqual(active_tiles, tiles(iht, 4, [0.1, 0.2, 0.3, 0.4, 0.5, 0.6], [0]))
+
+        # a different integer variable gives different tiles
+        self.assertEqual(0, len(set(active_tiles) & set(tiles(iht, 4, [0.1, 0.2, 0.3, 0.4, 0.5, 0.6], [1]))))
+
+        # a nearby point shares some tiles
+        # but not all of them
+        n_shared = len(set(active_tiles) & set(tiles(iht, 4, [0.4, 0.2, 0.3, 0.4, 0.5, 0.6], [0])))
+        self.assertTrue(0 < n_shared < 4)
+
+    def test_tiles_bounded_memory(self):
+
+        iht = IHT(size=16)
+        for i in range(100):
+            active_tiles = tiles(iht, 4, [float(i), float(i)], [0])
+            self.assertTrue(all(0 <= index < 16 for index in active_tiles))
+
+        self.assertEqual(16, iht.count())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,7 +3,8 @@
 import unittest
 import pytest
 from pathlib import Path
-from src.spaces.tiled_environment import TiledEnv, TiledEnvConfig
+import numpy as np
+from src.spaces.tiled_environment import TiledEnv, TiledEnvConfig, Layer, INVALID_ID
 from src.spaces.discrete_state_environment import DiscreteStateEnvironment
 from src.datasets.datasets_loaders import MockSubjectsLoader, MockSubjectsData
 from src.spaces.time_step import StepType
@@ -17,6 +18,10 @@ class DummyEnv(object):
 
     def __init__(self):
         self.column_names = ["col1", "col2"]
+        self.action_space = [0, 1, 2]
+
+    def n_quasi_identifying_columns(self) -> int:
+        return len(self.column_names)
 
 
 class TestTiledEnv(unittest.TestCase):
@@ -93,6 +98,107 @@ class TestTiledEnv(unittest.TestCase):
         global_index = layer0.get_global_tile_index(raw_state=raw_state, action=0)
         self.assertEqual(10, global_index)
 
+    def test_layer_global_tile_index_four_columns(self):
+
+        n_bins = 4
+        column_bins = {name: np.linspace(0.0, 1.0, n_bins) for name in ["col1", "col2", "col3", "col4"]}
+        layer = Layer(column_bins=column_bins, n_bins=n_bins, n_actions=2,
+                      start_index=0, end_index=0, env=DummyEnv())
+        self.assertEqual(2 * n_bins ** 4, layer.build_tiles(next_tile_global_idx=0))
+        self.assertEqual(2 * n_bins ** 4, len(layer))
+
+        raw_state = State()
+        raw_state.column_distortions = {"col1": 0.5, "col2": 0.1, "col3": 1.0, "col4": 0.4}
+
+        # the bin indices are (2, 1, 4, 2) so the local
+        # index has digits (1, 0, 3, 1) in base n_bins
+        local_idx = 1 * n_bins ** 3 + 0 * n_bins ** 2 + 3 * n_bins + 1
+        self.assertEqual(local_idx, layer.get_global_tile_index(raw_state=raw_state, action=0))
+        self.assertEqual(n_bins ** 4 + local_idx, layer.get_global_tile_index(raw_state=raw_state, action=1))
+
+    def test_layer_global_tile_index_invalid(self):
+
+        n_bins = 4
+        column_bins = {name: np.linspace(0.25, 1.25, n_bins) for name in ["col1", "col2"]}
+        layer = Layer(column_bins=column_bins, n_bins=n_bins, n_actions=2,
+                      start_index=0, end_index=0, env=DummyEnv())
+        layer.build_tiles(next_tile_global_idx=0)
+
+        # col1 is below the first bin of the layer
+        raw_state = State()
+        raw_state.column_distortions = {"col1": 0.1, "col2": 0.5}
+        self.assertEqual(INVALID_ID, layer.get_global_tile_index(raw_state=raw_state, action=0))
+
+    def test_featurize_state_action(self):
+
+        config = TiledEnvConfig(n_layers=3, n_bins=4, env=DummyEnv(),
+                                column_ranges={"col1": [0.0, 1.0], "col2": [0.0, 1.0]})
+        tiled_env = TiledEnv(config)
+        tiled_env.create_tiles()
+
+        raw_state = State()
+        raw_state.column_distortions = {"col1": 0.3, "col2": 0.6}
+
+        dense_state = tiled_env.featurize_raw_state(raw_state)
+        for action in range(tiled_env.n_actions):
+            active_tiles = tiled_env.featurize_state_action(state=raw_state, action=action)
+
+            # at most one active tile per layer
+            self.assertLessEqual(len(active_tiles), config.n_layers)
+            self.assertEqual(len(active_tiles), len(set(active_tiles)))
+
+            for tile_idx in active_tiles:
+                self.assertEqual(1.0, dense_state[tile_idx])
+
+    def test_featurize_state_action_hashed(self):
+
+        env = DummyEnv()
+        env.column_names = ["col{0}".format(i) for i in range(8)]
+
+        config = TiledEnvConfig(n_layers=5, n_bins=10, env=env, max_size=1024,
+                                column_ranges={name: [0.0, 1.0] for name in env.column_names})
+        tiled_env = TiledEnv(config)
+        tiled_env.create_tiles()
+        self.assertEqual(1024, tiled_env.n_features)
+
+        raw_state = State()
+        raw_state.column_distortions = {name: 0.1 * i for i, name in enumerate(env.column_names)}
+
+        for action in range(tiled_env.n_actions):
+            active_tiles = tiled_env.featurize_state_action(state=raw_state, action=action)
+
+            # one tile per layer
+            self.assertEqual(config.n_layers, len(active_tiles))
+            self.assertTrue(all(0 <= idx < config.max_size for idx in active_tiles))
+
+        dense_state = tiled_env.featurize_raw_state(raw_state)
+        self.assertEqual(config.max_size, dense_state.shape[0])
+        self.assertEqual(config.n_layers * tiled_env.n_actions, dense_state.sum())
+
+    def test_featurize_state_actions(self):
+
+        for max_size in [None, 4096]:
+            config = TiledEnvConfig(n_layers=3, n_bins=4, env=DummyEnv(), max_size=max_size,
+                                    column_ranges={"col1": [0.0, 1.0], "col2": [0.0, 1.0]})
+            tiled_env = TiledEnv(config)
+            tiled_env.create_tiles()
+
+            raw_state = State()
+            raw_state.column_distortions = {"col1": 0.3, "col2": 0.6}
+
+            features = tiled_env.featurize_state_actions(state=raw_state)
+            self.assertEqual(tiled_env.n_actions, features.shape[0])
+
+            for action in range(tiled_env.n_actions):
+                self.assertEqual(tiled_env.featurize_state_action(state=raw_state, action=action).tolist(),
+                                 features[action].tolist())
+
+    def test_invalid_max_size(self):
+        config = TiledEnvConfig(n_layers=5, n_bins=10, env=DummyEnv(), max_size=0,
+                                column_ranges={"col1": [0.0, 1.0], "col2": [0.0, 1.0]})
+        with pytest.raises(InvalidParamValue) as e:
+            env = TiledEnv(config)
+
     def test_none_column_ranges(self):
         config = TiledEnvConfig()
         config.env = None
@@ -0,0 +1,112 @@
+"""
+The toy data set, action space and environment shared by the unit tests
+"""
+import pandas as pd
+
+from src.algorithms.q_learning import QLearning, QLearnConfig
+from src.datasets import ColumnType
+from src.datasets.dataset_wrapper import PandasDSWrapper
+from src.maths.distortion_calculator import DistortionCalculator, DistortionCalculationType
+from src.maths.numeric_distance_type import NumericDistanceType
+from src.maths.string_distance_calculator import StringDistanceType
+from src.policies.epsilon_greedy_policy import EpsilonGreedyPolicy, EpsilonGreedyConfig, EpsilonDecayOption
+from src.spaces.action_space import ActionSpace
+from src.spaces.actions import ActionIdentity, ActionStringGeneralize, ActionNumericBinGeneralize
+from src.spaces.discrete_state_environment import DiscreteStateEnvironment
+from src.spaces.env_type import DiscreteEnvType
+from src.trainers.hyperparameter_sweep import replace_config_fields
+from src.utils.reward_manager import RewardManager
+
+GENERALIZATION_TABLE = {"col1": "Alex", "col2": "Alex2", "col3": "Alex3",
+                        "Alex": "1", "Alex2": "1", "Alex3": "1", "1": "1"}
+
+
+def make_data_set(with_identifying_column: bool = True) -> PandasDSWrapper:
+    columns = {"name": str, "salary": float}
+    data = {"name": ["col1", "col2", "col3", "col1"], "salary": [1.0, 2.5, 7.0, 9.0]}
+
+    if with_identifying_column:
+        columns["surname"] = str
+        data["surname"] = ["A", "B", "C", "D"]
+
+    ds = PandasDSWrapper(columns=columns)
+    ds.ds = pd.DataFrame(data)
+    return ds
+
+
+def make_action_space() -> ActionSpace:
+    action_space = ActionSpace(n=3)
+    action_space.add_many(ActionIdentity(column_name="name"),
+                          ActionStringGeneralize(column_name="name", generalization_table=GENERALIZATION_TABLE),
+                          ActionNumericBinGeneralize(column_name="salary",
+                                                     generalization_table=[0.0, 5.0, 10.0]))
+    return action_space
+
+
+def make_distortion_calculator() -> DistortionCalculator:
+    return DistortionCalculator(numeric_column_distortion_metric_type=NumericDistanceType.L2_AVG,
+                                string_column_distortion_metric_type=StringDistanceType.COSINE_NORMALIZE,
+                                dataset_distortion_type=DistortionCalculationType.SUM)
+
+
+def make_env(data_set: PandasDSWrapper = None, env_type: DiscreteEnvType = DiscreteEnvType.TOTAL_DISTORTION_STATE,
+             reward_manager: RewardManager = None, action_space: ActionSpace = None,
+             **options) -> DiscreteStateEnvironment:
+    """Returns the toy environment. The options
+    override the arguments of from_options
+
+    """
+
+    if data_set is None:
+        data_set = make_data_set()
+
+    if action_space is None:
+        action_space = make_action_space()
+
+    min_distortion, max_distortion = 0.5, 0.8
+    if env_type == DiscreteEnvType.MULTI_COLUMN_STATE:
+        min_distortion = {name: 0.1 for name in data_set.columns}
+        max_distortion = {name: 0.9 for name in data_set.columns}
+
+    if reward_manager is None:
+        reward_manager = RewardManager(bounds=(0.5, 0.8), out_of_max_bound_reward=-1.0,
+                                       out_of_min_bound_reward=-1.0, in_bounds_reward=5.0,
+                                       min_distortions=min_distortion, max_distortions=max_distortion,
+                                       punish_factor=2.0)
+
+    column_types = {"name": ColumnType.QUASI_IDENTIFYING_ATTRIBUTE,
+                    "salary": ColumnType.QUASI_IDENTIFYING_ATTRIBUTE}
+    if "surname" in data_set.columns:
+        column_types["surname"] = ColumnType.IDENTIFYING_ATTRIBUTE
+
+    env_options = {"min_distortion": min_distortion, "min_total_distortion": 0.5,
+                   "max_distortion": max_distortion, "max_total_distortion": 1.0,
+                   "n_states": 10, "gamma": 0.9, "n_rounds_below_min_distortion": 3,
+                   "use_identifying_column_dist_factor": 0.1, "env_type": env_type,
+                   "column_types": column_types}
+    env_options.update(options)
+
+    return DiscreteStateEnvironment.from_options(data_set=data_set, action_space=action_space,
+                                                 reward_manager=reward_manager,
+                                                 distortion_calculator=make_distortion_calculator(),
+                                                 **env_options)
+
+
+def make_q_learning(env: DiscreteStateEnvironment) -> QLearning:
+    policy = EpsilonGreedyPolicy(eps=0.5, n_actions=env.n_actions, decay_op=EpsilonDecayOption.NONE)
+    return QLearning(QLearnConfig(gamma=0.9, alpha=0.1, n_itrs_per_episode=10, policy=policy))
+
+
+def build_q_learning(params: dict, data_set: PandasDSWrapper) -> tuple:
+    """Builder of the configuration searches. The
+    params override the fields of the configurations
+
+    """
+    env = make_env(data_set=data_set)
+    env = DiscreteStateEnvironment(env_config=replace_config_fields(env.config, params, "env"))
+
+    policy_config = replace_config_fields(EpsilonGreedyConfig(eps=0.5, n_actions=env.n_actions), params, "policy")
+    agent_config = replace_config_fields(QLearnConfig(gamma=0.9, alpha=0.1, n_itrs_per_episode=10,
+                                                      policy=EpsilonGreedyPolicy.from_config(policy_config)),
+                                         params, "agent")
+    return env, QLearning(algo_config=agent_config)